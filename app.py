@@ -7,7 +7,22 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource
+def bootstrap_schema():
+    """Apply pending schema migrations once per server process."""
+    from utils.schema import migrate
+    return migrate()
+
+@st.cache_resource
+def bootstrap_record_index():
+    """Load the in-memory player/match index in the background, once per server process."""
+    from utils.record_index import ENABLED, record_index
+    if ENABLED:
+        record_index.load_in_background()
+
 def main():
+    bootstrap_schema()
+    bootstrap_record_index()
     st.sidebar.title("🏏 Cricbuzz LiveStats")
     page = st.sidebar.radio(
         "Navigation",
@@ -16,7 +31,9 @@ def main():
             "Live Matches",
             "Top Player Stats",
             "SQL Analytics",
-            "CRUD Operations"
+            "CRUD Operations",
+            "Bulk Import",
+            "Query Performance"
         ]
     )
 
@@ -35,6 +52,12 @@ def main():
     elif page == "CRUD Operations":
         from modules import crud_operations
         crud_operations.show()
+    elif page == "Bulk Import":
+        from modules import bulk_import
+        bulk_import.show()
+    elif page == "Query Performance":
+        from modules import query_performance
+        query_performance.show()
 
 if __name__ == "__main__":
     main()
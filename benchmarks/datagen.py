@@ -0,0 +1,259 @@
+"""Synthetic cricket dataset for the analytics benchmarks.
+
+Generates players, venues, matches and per-innings batting and bowling rows
+shaped like real data: twelve national squads, Test/ODI/T20I fixtures
+spread over the last decade, home venues named after their country, and
+format-dependent scoring. Rows are loaded through ``utils.bulk_import`` into
+whatever database ``.env`` / the environment selects.
+
+    python benchmarks/datagen.py --rows 100000
+    DB_PATH=benchmarks/data/bench.db python benchmarks/datagen.py --rows 1000000 --reset
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+TEAMS = {
+    "India": ["Mumbai", "Kolkata", "Chennai", "Delhi", "Ahmedabad"],
+    "Australia": ["Melbourne", "Sydney", "Perth", "Adelaide", "Brisbane"],
+    "England": ["London", "Birmingham", "Manchester", "Leeds", "Nottingham"],
+    "Pakistan": ["Lahore", "Karachi", "Rawalpindi", "Multan"],
+    "South Africa": ["Johannesburg", "Cape Town", "Durban", "Centurion"],
+    "New Zealand": ["Auckland", "Wellington", "Christchurch", "Hamilton"],
+    "Sri Lanka": ["Colombo", "Galle", "Kandy"],
+    "West Indies": ["Bridgetown", "Kingston", "Port of Spain", "St John's"],
+    "Bangladesh": ["Dhaka", "Chattogram", "Sylhet"],
+    "Afghanistan": ["Kabul", "Kandahar"],
+    "Zimbabwe": ["Harare", "Bulawayo"],
+    "Ireland": ["Dublin", "Belfast"],
+}
+
+FIRST_NAMES = [
+    "Aarav", "Rohan", "Virat", "Jasprit", "Steve", "Pat", "Joe", "Ben", "Babar", "Shaheen",
+    "Kagiso", "Quinton", "Kane", "Trent", "Kusal", "Wanindu", "Shai", "Jason", "Shakib", "Litton",
+    "Rashid", "Ibrahim", "Sikandar", "Paul", "Harry", "Mitchell", "Tom", "Adam", "Imam", "Keshav",
+]
+LAST_NAMES = [
+    "Sharma", "Kohli", "Bumrah", "Smith", "Cummins", "Root", "Stokes", "Azam", "Afridi", "Rabada",
+    "de Kock", "Williamson", "Boult", "Mendis", "Hasaranga", "Hope", "Holder", "Hasan", "Das", "Khan",
+    "Zadran", "Raza", "Stirling", "Brook", "Starc", "Latham", "Zampa", "Haq", "Maharaj", "Patel",
+]
+
+ROLES = [("Batsman", 0.4), ("Bowler", 0.35), ("All-rounder", 0.15), ("Wicket-keeper", 0.1)]
+FORMATS = [("Test", 0.2), ("ODI", 0.35), ("T20I", 0.45)]
+# Mean runs per innings and strike rate by format
+SCORING = {"Test": (32, 52), "ODI": (30, 85), "T20I": (19, 135)}
+OVERS = {"Test": 22.0, "ODI": 8.0, "T20I": 3.5}
+
+TABLE_ORDER = ["venues", "players", "matches", "batting_stats", "bowling_stats"]
+# Emitted together, match by match; the other tables come out in one run each
+MATCH_TABLES = ("matches", "batting_stats", "bowling_stats")
+
+
+def _pick(rng, weighted):
+    return rng.choices([v for v, _ in weighted], [w for _, w in weighted])[0]
+
+
+def sizes_for(rows):
+    """Players and matches needed for roughly ``rows`` batting rows."""
+    players = min(max(1000, rows // 100), 100000)
+    # Generation stops at ``rows``; Test matches give 44 batting rows, others 22
+    matches = max(50, rows // 20)
+    return players, matches
+
+
+def generate(rows, seed=7, batch_size=5000):
+    """Yield ``(table, batch)`` pairs; parents are emitted before children."""
+    rng = random.Random(seed)
+    n_players, n_matches = sizes_for(rows)
+    countries = list(TEAMS)
+
+    venues = []
+    for country, cities in TEAMS.items():
+        for city in cities:
+            for k in range(1, 3):
+                venues.append({
+                    "venue_name": f"{city} Ground {k}, {city}, {country}",
+                    "city": city, "country": country,
+                    "capacity": rng.randrange(15000, 100000, 500),
+                })
+    yield "venues", venues
+    venues_by_country = {c: [v["venue_name"] for v in venues if v["country"] == c] for c in countries}
+
+    squads = {c: [] for c in countries}
+    names = {}
+    batch = []
+    for player_id in range(1, n_players + 1):
+        country = countries[player_id % len(countries)]
+        squads[country].append(player_id)
+        names[player_id] = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {player_id}"
+        batch.append({
+            "player_id": player_id,
+            "player_name": names[player_id],
+            "country": country,
+            "playing_role": _pick(rng, ROLES),
+            "batting_style": rng.choice(["Right-hand bat", "Left-hand bat"]),
+            "bowling_style": rng.choice(["Right-arm fast", "Right-arm offbreak", "Left-arm orthodox",
+                                         "Left-arm fast-medium", "Legbreak googly"]),
+        })
+        if len(batch) >= batch_size:
+            yield "players", batch
+            batch = []
+    if batch:
+        yield "players", batch
+
+    # Career figures are denormalised onto every innings row, per player and format
+    careers = {}
+
+    def career(player_id, fmt):
+        key = (player_id, fmt)
+        if key not in careers:
+            innings = rng.randint(5, 250)
+            avg = max(3.0, rng.gauss(SCORING[fmt][0], 12))
+            careers[key] = {
+                "total_runs": int(innings * avg), "batting_avg": round(avg, 2),
+                "centuries": int(innings * avg / 1500 * rng.random() * 3),
+                "highest_score": int(avg * rng.uniform(2, 6)),
+                "total_wickets": rng.randint(0, 400), "bowling_avg": round(rng.uniform(18, 60), 2),
+            }
+        return careers[key]
+
+    today = date.today()
+    first_day = today - timedelta(days=3650)
+    matches, batting, bowling = [], [], []
+    produced = 0
+    for match_id in range(1, n_matches + 1):
+        if produced >= rows:
+            break
+        team1, team2 = rng.sample(countries, 2)
+        fmt = _pick(rng, FORMATS)
+        home = team1 if rng.random() < 0.55 else team2
+        winner = rng.choice([team1, team2]) if rng.random() > 0.04 else None
+        toss_winner = rng.choice([team1, team2])
+        matches.append({
+            "match_id": match_id,
+            "match_description": f"{rng.randint(1, 5)}th {fmt}, {team2} tour of {team1}",
+            "team1": team1, "team2": team2,
+            "venue": rng.choice(venues_by_country[home]),
+            "match_date": (first_day + timedelta(days=rng.randrange(3650))).isoformat(),
+            "format": fmt,
+            "status": "Completed" if rng.random() > 0.03 else "Abandoned",
+            "winner": winner,
+            "victory_margin": rng.randint(1, 250) if winner else None,
+            "victory_type": rng.choice(["Runs", "Wickets"]) if winner else None,
+            "toss_winner": toss_winner,
+            "toss_decision": rng.choice(["bat", "bowl"]),
+        })
+        mean_runs, strike = SCORING[fmt]
+        innings_per_team = 2 if fmt == "Test" else 1
+        for innings in range(1, innings_per_team + 1):
+            for batting_team, bowling_team in ((team1, team2), (team2, team1)):
+                for player_id in rng.sample(squads[batting_team], 11):
+                    runs = int(rng.expovariate(1 / mean_runs))
+                    sr = max(10.0, rng.gauss(strike, strike * 0.3))
+                    c = career(player_id, fmt)
+                    batting.append({
+                        "player_id": player_id, "match_id": match_id, "innings": innings,
+                        "player_name": names[player_id], "team": batting_team, "format": fmt,
+                        "runs": runs, "balls": max(1, int(runs * 100 / sr)),
+                        "fours": runs // 9, "sixes": runs // (40 if fmt == "Test" else 18),
+                        "strike_rate": round(sr, 2),
+                        "total_runs": c["total_runs"], "batting_avg": c["batting_avg"],
+                        "centuries": c["centuries"], "highest_score": c["highest_score"],
+                    })
+                for player_id in rng.sample(squads[bowling_team], 5):
+                    overs = round(max(0.1, rng.gauss(OVERS[fmt], OVERS[fmt] / 3)), 1)
+                    conceded = int(overs * rng.uniform(2.5, 10))
+                    c = career(player_id, fmt)
+                    bowling.append({
+                        "player_id": player_id, "match_id": match_id, "innings": innings, "format": fmt,
+                        "overs": overs, "runs_conceded": conceded, "wickets": min(10, int(rng.expovariate(1.1))),
+                        "economy": round(conceded / overs, 2),
+                        "bowling_avg": c["bowling_avg"], "total_wickets": c["total_wickets"],
+                    })
+                produced += 11
+        if len(batting) >= batch_size:
+            yield "matches", matches
+            yield "batting_stats", batting
+            yield "bowling_stats", bowling
+            matches, batting, bowling = [], [], []
+    if matches:
+        yield "matches", matches
+        yield "batting_stats", batting
+        yield "bowling_stats", bowling
+
+
+def reset():
+    """Empty the benchmark tables. Only point this at a scratch database."""
+    from utils.db_connection import db_instance
+    with db_instance.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            for table in reversed(TABLE_ORDER):
+                cursor.execute(f"DELETE FROM {table}")
+            conn.commit()
+        finally:
+            cursor.close()
+
+
+def table_batches(rows, seed, table):
+    """One table's batches, from its own run of ``generate`` with the same seed.
+
+    The seeded generator repeats itself exactly, so each table can be
+    streamed separately without holding the others in memory.
+    """
+    seen = False
+    for name, batch in generate(rows, seed):
+        if name == table:
+            seen = True
+            yield batch
+        elif seen and table not in MATCH_TABLES:
+            return
+
+
+def load(rows, seed=7, progress=None):
+    """Generate and upsert a dataset of about ``rows`` batting rows. Returns counts.
+
+    Each table is loaded with a single ``import_batches`` call, so derived
+    data such as the materialized aggregates is rebuilt once per table
+    rather than once per batch.
+    """
+    from utils.bulk_import import import_batches
+
+    counts = dict.fromkeys(TABLE_ORDER, 0)
+
+    def counted(table):
+        for batch in table_batches(rows, seed, table):
+            yield batch
+            counts[table] += len(batch)
+            if progress:
+                progress(counts)
+
+    for table in TABLE_ORDER:
+        import_batches(table, counted(table))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000, help="approximate batting rows")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--reset", action="store_true", help="empty the tables first")
+    args = parser.parse_args()
+
+    from utils.schema import migrate
+    migrate()
+    if args.reset:
+        reset()
+    started = time.perf_counter()
+    counts = load(args.rows, args.seed, lambda c: print(f"\r{c['batting_stats']:,} batting rows", end="", flush=True))
+    print(f"\nLoaded {counts} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Row-by-row vs columnar parsing of scorecards and recent-form tables.
+
+Synthetic payloads shaped like the Cricbuzz responses are parsed with the
+loops the pages used before ``utils.parsers`` and with the columnar parsers,
+both cold and on a rerun that hits the parse cache.
+
+    python benchmarks/parse_bench.py
+    python benchmarks/parse_bench.py --matches 40 --players 200 --rows 5000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils import parsers  # noqa: E402
+
+
+def make_scorecard(players, seed):
+    rng = random.Random(seed)
+    innings = []
+    for number in range(4):
+        batsmen = {
+            f"bat_{i}": {
+                "batName": f"Batter {number}-{i}",
+                "runs": str(rng.randint(0, 150)),
+                "balls": str(rng.randint(1, 200)),
+                "fours": str(rng.randint(0, 15)),
+                "sixes": str(rng.randint(0, 8)),
+                "strikeRate": f"{rng.uniform(20, 250):.2f}",
+            }
+            for i in range(players)
+        }
+        bowlers = {
+            f"bowl_{i}": {
+                "bowlName": f"Bowler {number}-{i}",
+                "overs": f"{rng.randint(0, 20)}.{rng.randint(0, 5)}",
+                "runs": str(rng.randint(0, 90)),
+                "wickets": str(rng.randint(0, 6)),
+                "economy": f"{rng.uniform(2, 12):.2f}",
+            }
+            for i in range(players)
+        }
+        innings.append({
+            "batTeam": {"teamName": f"Team {number % 2}"},
+            "batTeamDetails": {"batsmenData": batsmen},
+            "bowlTeamDetails": {"bowlersData": bowlers},
+        })
+    return {"scoreCard": innings}
+
+
+def make_section(rows, seed):
+    rng = random.Random(seed)
+    return {
+        "headers": ["Opposition", "Format", "Score", "Balls", "SR", "Date"],
+        "rows": [
+            {"values": [f"vs T{rng.randint(1, 12)}", rng.choice(["TEST", "ODI", "T20"]),
+                        str(rng.randint(0, 200)), str(rng.randint(1, 250)),
+                        f"{rng.uniform(10, 250):.2f}", f"2024-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}"]}
+            for _ in range(rows)
+        ],
+    }
+
+
+def legacy_scorecard(scorecard):
+    """The per-row dict loops previously inlined in live_matches.show()."""
+    frames = []
+    for innings in scorecard["scoreCard"]:
+        batters = innings["batTeamDetails"].get("batsmenData", {}).values()
+        frames.append(pd.DataFrame([
+            {"Batsman": b.get("batName"), "Runs": b.get("runs"), "Balls": b.get("balls"),
+             "4s": b.get("fours"), "6s": b.get("sixes"), "SR": b.get("strikeRate")}
+            for b in batters
+        ]))
+        bowlers = innings["bowlTeamDetails"].get("bowlersData", {}).values()
+        frames.append(pd.DataFrame([
+            {"Bowler": bw.get("bowlName"), "Overs": bw.get("overs"), "Runs": bw.get("runs"),
+             "Wickets": bw.get("wickets"), "Economy": bw.get("economy")}
+            for bw in bowlers
+        ]))
+    return frames
+
+
+def legacy_section(section):
+    """The per-row loop previously in top_stats.parse_recent()."""
+    records = []
+    headers = section.get("headers", [])
+    for row in section["rows"]:
+        vals = row.get("values", [])
+        row_dict = {}
+        for i, h in enumerate(headers):
+            if i < len(vals):
+                row_dict[h] = vals[i]
+        if row_dict:
+            records.append(row_dict)
+    return pd.DataFrame(records)
+
+
+def timed(fn, payloads, runs):
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        for payload in payloads:
+            fn(payload)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def cold(fn):
+    def run(payload):
+        parsers._memo.clear()
+        return fn(payload)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, default=20, help="scorecards on one page")
+    parser.add_argument("--players", type=int, default=11, help="batters and bowlers per innings")
+    parser.add_argument("--rows", type=int, default=1000, help="rows per recent-form table")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    parsers.CACHE_ENTRIES = max(parsers.CACHE_ENTRIES, args.matches * 2)
+    scorecards = [make_scorecard(args.players, seed) for seed in range(args.matches)]
+    sections = [make_section(args.rows, seed) for seed in range(2)]
+
+    cases = [
+        (f"{args.matches} scorecards x {args.players} players", scorecards,
+         legacy_scorecard, parsers.scorecard_frames),
+        (f"2 recent-form tables x {args.rows} rows", sections,
+         legacy_section, parsers.header_rows_frame),
+    ]
+    print(f"{'case':<36}{'loops ms':>10}{'columnar ms':>13}{'rerun ms':>10}")
+    for name, payloads, legacy, columnar in cases:
+        loops = timed(legacy, payloads, args.runs)
+        fresh = timed(cold(columnar), payloads, args.runs)
+        timed(columnar, payloads, 1)  # populate the parse cache
+        rerun = timed(columnar, payloads, args.runs)
+        print(f"{name:<36}{loops:>10.1f}{fresh:>13.1f}{rerun:>10.1f}")
+
+    sample = parsers.scorecard_frames(scorecards[0])[0]
+    print("\nBatting dtypes:", dict(sample["batting"].dtypes.astype(str)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Latency and memory of every SQL Analytics query at several data sizes.
+
+Each size runs in a fresh interpreter against its own database, filled by
+``benchmarks/datagen.py``. Every ``SQL_QUERIES`` entry is timed uncached
+through ``execute_query``, queries with a summary-table version also through
+``materialized.run_materialized`` (reported as "<name> (materialized)"),
+together with a CRUD insert / update / delete round, and the results are saved as JSON under ``benchmarks/results`` so a
+later run can be compared against them.
+
+    python benchmarks/query_bench.py --rows 10000 100000 1000000
+    python benchmarks/query_bench.py --compare benchmarks/results/<earlier>.json
+    DB_NAME=cricket_bench python benchmarks/query_bench.py --backend mysql --rows 100000 --generate
+
+SQLite databases are kept in ``benchmarks/data`` and reused between runs.
+MySQL uses the configured server and ``DB_NAME``; point it at a scratch
+database, since ``--generate`` empties the benchmark tables first.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT / "benchmarks" / "data"
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+# A change is flagged when its median grows by more than this factor
+THRESHOLD = 1.25
+# Medians below this many ms are too noisy to flag
+NOISE_MS = 2.0
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _measure(fn, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    # (rows, columns) for SELECTs, a rowcount for writes
+    rows = len(result[0]) if isinstance(result, tuple) else result
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(samples[max(0, round(0.95 * len(samples)) - 1)], 2),
+        "rows": rows,
+    }
+
+
+def _peak_kb(fn):
+    """Peak traced allocation of one call.
+
+    Kept out of the timed runs: tracemalloc slows allocation-heavy code
+    several times over.
+    """
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def _crud_cases():
+    from utils.db_connection import execute_query
+
+    player_id = 10 ** 9
+    return [
+        ("CRUD insert player", lambda: execute_query(
+            "INSERT INTO players (player_id, player_name, country, playing_role) VALUES (?, ?, ?, ?)",
+            (player_id, "Benchmark Player", "India", "Batsman"), fetch=False)),
+        ("CRUD update player", lambda: execute_query(
+            "UPDATE players SET playing_role = ? WHERE player_id = ?", ("All-rounder", player_id), fetch=False)),
+        ("CRUD delete player", lambda: execute_query(
+            "DELETE FROM players WHERE player_id = ?", (player_id,), fetch=False)),
+    ]
+
+
+def worker(rows, runs, generate):
+    """Run inside the child interpreter; prints one JSON document."""
+    sys.path.insert(0, str(ROOT))
+    sys.path.insert(0, str(ROOT / "benchmarks"))
+    import datagen
+    from utils.db_connection import execute_query
+    from utils.schema import migrate
+
+    migrate()
+    count = execute_query("SELECT COUNT(*) FROM batting_stats", use_cache=False)[0][0][0]
+    load_seconds = None
+    if generate or count == 0:
+        datagen.reset()
+        started = time.perf_counter()
+        datagen.load(rows)
+        load_seconds = round(time.perf_counter() - started, 1)
+        count = execute_query("SELECT COUNT(*) FROM batting_stats", use_cache=False)[0][0][0]
+
+    from modules.sql_queries import SQL_QUERIES
+    from utils import materialized
+
+    # Catch the summaries up with the load so the timed runs don't include it
+    summaries = materialized.ensure_ready()
+    if summaries:
+        materialized.refresh()
+
+    results = {}
+    for level, queries in SQL_QUERIES.items():
+        for name, query in queries.items():
+            # execute_query reports failures through st.error and returns None
+            if execute_query(query, use_cache=False) is None:
+                results[name] = {"level": level, "error": "query failed on this backend"}
+                continue
+            def run(query=query):
+                return execute_query(query, use_cache=False)
+
+            results[name] = {"level": level, **_measure(run, runs), "peak_kb": _peak_kb(run)}
+            if summaries and name in materialized.MATERIALIZED_QUERIES:
+                def run_materialized(name=name):
+                    return materialized.run_materialized(name, use_cache=False)
+
+                results[f"{name} (materialized)"] = {
+                    "level": level, **_measure(run_materialized, runs), "peak_kb": _peak_kb(run_materialized)
+                }
+    # Each CRUD step depends on the one before, so memory gets its own round
+    crud = _crud_cases()
+    for name, fn in crud:
+        results[name] = {"level": "CRUD", **_measure(fn, 1)}
+    for name, fn in crud:
+        results[name]["peak_kb"] = _peak_kb(fn)
+
+    print(json.dumps({
+        "rows": count,
+        "load_seconds": load_seconds,
+        "peak_rss_mb": _peak_rss_mb(),
+        "queries": results,
+    }))
+
+
+def run_size(backend, rows, runs, generate):
+    env = dict(os.environ, DB_TYPE=backend, SLOW_QUERY_MS="1e9")
+    if backend == "sqlite":
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        env["DB_PATH"] = str((DATA_DIR / f"bench_{rows}.db").relative_to(ROOT))
+        env["DB_SQLITE_READ_POOL"] = "0"
+    out = subprocess.run(
+        [sys.executable, __file__, "--worker", "--rows", str(rows), "--runs", str(runs)]
+        + (["--generate"] if generate else []),
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "worker failed")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _commit():
+    out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return out.stdout.strip() or None
+
+
+def compare(current, baseline, threshold):
+    """Print per-query median ratios; returns the number of regressions."""
+    regressions = 0
+    for size, result in current["sizes"].items():
+        previous = baseline.get("sizes", {}).get(size)
+        if previous is None:
+            print(f"\n{size} rows: not in baseline")
+            continue
+        print(f"\n{size} rows vs {baseline.get('commit') or 'baseline'}")
+        for name, stats in result["queries"].items():
+            old = previous["queries"].get(name, {})
+            if "median_ms" not in stats or "median_ms" not in old:
+                continue
+            ratio = stats["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+            flag = ""
+            if ratio > threshold and stats["median_ms"] >= NOISE_MS:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"  {name[:58]:<60}{old['median_ms']:>9.1f}{stats['median_ms']:>9.1f}{ratio:>7.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["sqlite", "mysql"], default="sqlite")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000],
+                        help="approximate batting_stats rows per dataset")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--generate", action="store_true", help="rebuild the datasets even if they exist")
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.rows[0], args.runs, args.generate)
+        return
+
+    report = {
+        "backend": args.backend,
+        "commit": _commit(),
+        "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "runs": args.runs,
+        "sizes": {},
+    }
+    for rows in args.rows:
+        print(f"{rows:,} rows on {args.backend}...", flush=True)
+        result = run_size(args.backend, rows, args.runs, args.generate)
+        report["sizes"][str(rows)] = result
+        loaded = f", loaded in {result['load_seconds']}s" if result["load_seconds"] else ""
+        print(f"  {result['rows']:,} batting rows{loaded}, peak RSS {result['peak_rss_mb']} MB")
+        print(f"  {'query':<60}{'median':>9}{'p95':>9}{'rows':>8}{'peak KB':>10}")
+        for name, stats in result["queries"].items():
+            if "error" in stats:
+                print(f"  {name[:58]:<60}  {stats['error']}")
+            else:
+                print(f"  {name[:58]:<60}{stats['median_ms']:>9.1f}{stats['p95_ms']:>9.1f}"
+                      f"{stats['rows']:>8}{stats['peak_kb']:>10.0f}")
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    path = RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}_{args.backend}.json"
+    path.write_text(json.dumps(report, indent=2))
+    print(f"\nSaved {path.relative_to(ROOT)}")
+
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text()), args.threshold)
+        if regressions:
+            print(f"\n{regressions} regression(s) above {args.threshold:g}x")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
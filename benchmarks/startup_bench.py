@@ -0,0 +1,90 @@
+"""Cold-start import cost of the app and each page module.
+
+Every measurement runs in a fresh interpreter so module caches do not hide
+the real first-render cost a new replica or rerun pays.
+
+    python benchmarks/startup_bench.py            # 5 runs per module
+    python benchmarks/startup_bench.py --runs 10 --top 8
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+TARGETS = [
+    ("config", "utils.config"),
+    ("db_connection", "utils.db_connection"),
+    ("Home", "modules.home"),
+    ("Live Matches", "modules.live_matches"),
+    ("Top Player Stats", "modules.top_stats"),
+    ("SQL Analytics", "modules.sql_queries"),
+    ("CRUD Operations", "modules.crud_operations"),
+    ("Bulk Import", "modules.bulk_import"),
+    ("Query Performance", "modules.query_performance"),
+]
+
+_TIMER = (
+    "import time, importlib; t = time.perf_counter(); "
+    "importlib.import_module({module!r}); print(time.perf_counter() - t)"
+)
+
+
+def time_import(module, runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _TIMER.format(module=module)],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        if out.returncode != 0:
+            return None, out.stderr.strip().splitlines()[-1]
+        samples.append(float(out.stdout.strip()))
+    return samples, None
+
+
+def _import_times(code):
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    return out.stderr.splitlines()
+
+
+def heaviest_imports(module, top):
+    """Direct imports of ``module`` ranked by cumulative time (``-X importtime``)."""
+    startup = {line.rsplit("|", 1)[1].strip() for line in _import_times("pass") if "|" in line}
+    totals = {}
+    for line in _import_times(f"import {module}"):
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name_field = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # Names are indented two spaces per nesting level; level 1 = direct imports
+        depth = (len(name_field) - len(name_field.lstrip()) - 1) // 2
+        if depth == 1 and name_field.strip() not in startup:
+            totals[name_field.strip()] = int(cumulative)
+    return sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'target':<20} {'median ms':>10} {'min ms':>10}  heaviest imports")
+    for label, module in TARGETS:
+        samples, error = time_import(module, args.runs)
+        if samples is None:
+            print(f"{label:<20} {'failed':>10} {'':>10}  {error}")
+            continue
+        heavy = ", ".join(f"{name} {us / 1000:.0f}ms" for name, us in heaviest_imports(module, args.top))
+        print(f"{label:<20} {statistics.median(samples) * 1000:>10.1f} {min(samples) * 1000:>10.1f}  {heavy}")
+
+
+if __name__ == "__main__":
+    main()
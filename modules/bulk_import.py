@@ -0,0 +1,38 @@
+import streamlit as st
+import tempfile
+from pathlib import Path
+from utils.bulk_import import NATURAL_KEYS, FORMATS, detect_format, import_file
+
+def show():
+    st.title("📥 Bulk Import")
+    st.markdown("Load historical players, matches, venues and innings stats from CSV, JSON or Parquet dumps.")
+
+    table = st.selectbox("Target Table", sorted(NATURAL_KEYS))
+    st.caption(f"Rows are upserted on: {', '.join(NATURAL_KEYS[table])}")
+    uploaded = st.file_uploader("Data File", type=["csv", "json", "jsonl", "parquet"])
+
+    if uploaded and st.button("Import"):
+        fmt = detect_format(uploaded.name)
+        if fmt not in FORMATS:
+            st.error(f"Unsupported file type: {uploaded.name}")
+            return
+
+        # Spool to disk so large uploads are read in batches, not held as one blob
+        with tempfile.NamedTemporaryFile(suffix=Path(uploaded.name).suffix, delete=False) as tmp:
+            while chunk := uploaded.read(8 * 1024 * 1024):
+                tmp.write(chunk)
+            tmp_path = tmp.name
+
+        counter = st.empty()
+        try:
+            with st.spinner(f"Importing into {table}..."):
+                stats = import_file(table, tmp_path, fmt, progress=lambda n: counter.write(f"{n:,} rows loaded"))
+        except Exception as e:
+            st.error(f"Import failed: {e}")
+            return
+        finally:
+            Path(tmp_path).unlink(missing_ok=True)
+
+        st.success(f"Loaded {stats['rows']:,} rows into {table} in {stats['seconds']:.1f}s")
+        if stats["skipped_columns"]:
+            st.info(f"Ignored unknown columns: {', '.join(stats['skipped_columns'])}")
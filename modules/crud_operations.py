@@ -1,20 +1,59 @@
 import streamlit as st
 import pandas as pd
 from utils.db_connection import execute_query
+from utils.player_edits import COLUMNS, EDITABLE, ConcurrentEditError, apply_changes, search_players
+from utils.record_index import record_index
+from utils.result_streaming import export_csv, show_export
+
+# Primary key of each browsable table, used for keyset pagination
+TABLE_KEYS = {
+    "players": "player_id",
+    "matches": "match_id",
+    "batting_stats": "id",
+    "bowling_stats": "id"
+}
 
 def show():
     st.title("🛠️ CRUD Operations")
     
     # CRUD implementation with parameterized queries
-    operation = st.selectbox("Operation", ["View Data", "Add Player", "Update Player", "Delete Player"])
+    operation = st.selectbox("Operation", ["View Data", "Batch Edit Players", "Add Player", "Update Player", "Delete Player"])
     
     if operation == "View Data":
-        table = st.selectbox("Select Table", ["players", "matches", "batting_stats", "bowling_stats"])
-        if st.button("Load Data"):
-            result = execute_query(f"SELECT * FROM {table} LIMIT 100")
-            if result:
-                df = pd.DataFrame(result[0], columns=result[1])
-                st.dataframe(df)
+        table = st.selectbox("Select Table", list(TABLE_KEYS.keys()))
+        page_size = st.selectbox("Rows per page", [50, 100, 500], index=1)
+        key_col = TABLE_KEYS[table]
+
+        # Keyset pagination: remember the last key of every page we passed
+        state_key = f"page_keys_{table}_{page_size}"
+        page_keys = st.session_state.setdefault(state_key, [None])
+
+        after = page_keys[-1]
+        if after is None:
+            result = execute_query(f"SELECT * FROM {table} ORDER BY {key_col} LIMIT ?", (page_size,))
+        else:
+            result = execute_query(
+                f"SELECT * FROM {table} WHERE {key_col} > ? ORDER BY {key_col} LIMIT ?",
+                (after, page_size)
+            )
+        if result:
+            df = add_labels(pd.DataFrame(result[0], columns=result[1]), table)
+            st.caption(f"Page {len(page_keys)}")
+            st.dataframe(df)
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                if len(page_keys) > 1 and st.button("⬅️ Previous"):
+                    page_keys.pop()
+                    st.rerun()
+            with col2:
+                if len(result[0]) == page_size and st.button("Next ➡️"):
+                    page_keys.append(result[0][-1][result[1].index(key_col)])
+                    st.rerun()
+            with col3:
+                if st.button("📤 Export full table"):
+                    path, rows = export_csv(f"SELECT * FROM {table} ORDER BY {key_col}", name=table)
+                    show_export(path, rows)
     
     elif operation == "Add Player":
         with st.form("Add Form"):
@@ -29,29 +68,90 @@ def show():
                 )
                 st.success("Player added!")
     
+    elif operation == "Batch Edit Players":
+        batch_edit()
+
     elif operation == "Update Player":
-        players = execute_query("SELECT player_id, player_name FROM players LIMIT 50")
-        if players:
-            player_map = {f"{name} (ID: {id})": id for id, name in players[0]}
-            selected = st.selectbox("Select Player", list(player_map.keys()))
-            new_name = st.text_input("New Name")
+        player = pick_player("update")
+        if player:
+            new_name = st.text_input("New Name", value=player["player_name"])
             if st.button("Update"):
-                execute_query(
-                    "UPDATE players SET player_name = ? WHERE player_id = ?",
-                    (new_name, player_map[selected]),
-                    fetch=False
-                )
-                st.success("Updated!")
-    
+                save({"updates": [{**player, "player_name": new_name}]}, "Updated!")
+
     elif operation == "Delete Player":
-        players = execute_query("SELECT player_id, player_name FROM players LIMIT 50")
-        if players:
-            player_map = {f"{name} (ID: {id})": id for id, name in players[0]}
-            selected = st.selectbox("Select Player", list(player_map.keys()))
-            if st.button("Delete"):
-                execute_query(
-                    "DELETE FROM players WHERE player_id = ?",
-                    (player_map[selected],),
-                    fetch=False
-                )
-                st.success("Deleted!")
\ No newline at end of file
+        player = pick_player("delete")
+        if player and st.button("Delete"):
+            save({"deletes": [(player["player_id"], player["version"])]}, "Deleted!")
+
+
+def add_labels(df, table):
+    """Name the players and matches that stats rows refer to, joined from the in-memory index."""
+    if table not in ("batting_stats", "bowling_stats") or df.empty:
+        return df
+    if "player_name" not in df:
+        df.insert(df.columns.get_loc("player_id") + 1, "player_name", df["player_id"].map(record_index.player_name))
+    df.insert(df.columns.get_loc("match_id") + 1, "match", df["match_id"].map(record_index.match_label))
+    return df
+
+
+def pick_player(key):
+    """Search box plus a picker over the matching players; returns a row dict."""
+    text = st.text_input("Search player by name prefix or ID", key=f"{key}_search")
+    if not text.strip():
+        st.info("Type the start of a player's name or their ID.")
+        return None
+    players = search_players(text)
+    if not players:
+        st.warning("No matching players.")
+        return None
+    options = {f"{p['player_name']} (ID: {p['player_id']})": p for p in players}
+    return options[st.selectbox("Select Player", list(options), key=f"{key}_player")]
+
+
+def save(changes, message):
+    try:
+        counts = apply_changes(**changes)
+    except ConcurrentEditError as e:
+        st.error(str(e))
+        return False
+    except Exception as e:
+        st.error(f"Save failed: {e}")
+        return False
+    st.success(f"{message} ({counts['inserted']} added, {counts['updated']} updated, {counts['deleted']} deleted)")
+    return True
+
+
+def batch_edit():
+    """Edit many players in a grid and save every change in one transaction."""
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        text = st.text_input("Load players by name prefix or ID (blank for the first rows)")
+    with col2:
+        limit = st.selectbox("Max rows", [50, 200, 1000])
+    if st.button("Load"):
+        st.session_state["batch_players"] = search_players(text, limit)
+        st.session_state.pop("batch_editor", None)
+
+    loaded = st.session_state.get("batch_players")
+    if loaded is None:
+        return
+    st.caption("Edit cells, add rows at the bottom or select rows to delete, then save once.")
+    st.data_editor(
+        pd.DataFrame(loaded, columns=COLUMNS),
+        key="batch_editor",
+        num_rows="dynamic",
+        disabled=["player_id", "version"],
+        hide_index=True,
+    )
+    if st.button("💾 Save changes"):
+        # Positions in the editor state refer to the rows as loaded
+        edits = st.session_state.get("batch_editor", {})
+        changes = {
+            "inserts": [{c: row.get(c) for c in EDITABLE} for row in edits.get("added_rows", [])],
+            "updates": [{**loaded[int(i)], **values} for i, values in edits.get("edited_rows", {}).items()],
+            "deletes": [(loaded[i]["player_id"], loaded[i]["version"]) for i in edits.get("deleted_rows", [])],
+        }
+        if save(changes, "Saved"):
+            # Reload so the next edit starts from the new versions
+            st.session_state["batch_players"] = search_players(text, limit)
+            st.session_state.pop("batch_editor", None)
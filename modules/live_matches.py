@@ -1,136 +1,129 @@
 import streamlit as st
-import requests
 import pandas as pd
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")
-RAPIDAPI_HOST = os.getenv("RAPIDAPI_HOST")
-LIVE_URL = os.getenv("CRICBUZZ_LIVE_URL")
-SCORECARD_URL = os.getenv("CRICBUZZ_SCORECARD_URL")
-
-HEADERS = {
-    "x-rapidapi-key": RAPIDAPI_KEY,
-    "x-rapidapi-host": RAPIDAPI_HOST
-}
-
-@st.cache_data(ttl=60)  # cache live matches for 1 min
-def fetch_live_matches():
-    """Fetch live matches (cached)"""
-    try:
-        resp = requests.get(LIVE_URL, headers=HEADERS, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-
-        matches = []
-        for series in data.get("typeMatches", []):
-            for match in series.get("seriesMatches", []):
-                if "seriesAdWrapper" in match:
-                    for m in match["seriesAdWrapper"].get("matches", []):
-                        info = m.get("matchInfo", {})
-                        score = m.get("matchScore", {})
-
-                        matches.append({
-                            "match_id": info.get("matchId"),
-                            "series_name": info.get("seriesName"),
-                            "match_desc": info.get("matchDesc"),
-                            "team1": info.get("team1", {}).get("teamName"),
-                            "team2": info.get("team2", {}).get("teamName"),
-                            "venue": info.get("venueInfo", {}).get("ground"),
-                            "status": info.get("status"),
-                            "score": f"{score.get('team1', {}).get('score', '')}/{score.get('team1', {}).get('wickets', '')} ({score.get('team1', {}).get('overs', '')})",
-                        })
-        return matches
-    except Exception as e:
-        st.error(f"Error fetching live matches: {e}")
-        return []
-
-
-def fetch_scorecard(match_id):
-    """Fetch detailed scorecard (only when needed)"""
-    try:
-        url = f"{SCORECARD_URL}?matchId={match_id}"
-        resp = requests.get(url, headers=HEADERS, timeout=10)
-        resp.raise_for_status()
-        return resp.json()
-    except Exception as e:
-        st.error(f"Error fetching scorecard: {e}")
-        return None
+import time
+from utils import scorecards, score_events
+from utils.live_hub import PUSH_INTERVAL, live_hub
+from utils.live_ingestion import get_ingestion_worker, refresh_hub
+from utils.parsers import scorecard_frames
+
+def live_view():
+    """This session's copy of the live fields, patched with the hub's diffs."""
+    refresh_hub()
+    view = st.session_state.get("live_view")
+    changes = None if view is None else live_hub.changes_since(st.session_state["live_version"])
+    if changes is None:
+        version, view = live_hub.snapshot()
+    else:
+        version, diffs = changes
+        for match_id, diff in diffs.items():
+            if diff is None:
+                view.pop(match_id, None)
+            else:
+                view.setdefault(match_id, {}).update(diff)
+    st.session_state["live_view"] = view
+    st.session_state["live_version"] = version
+    return view
+
+
+@st.fragment(run_every=PUSH_INTERVAL)
+def live_status(match_ids):
+    """Freshness line; reruns the page when matches join the feed."""
+    view = live_view()
+    if set(view) - set(match_ids):
+        st.rerun(scope="app")
+    if live_hub.updated_at:
+        st.caption(f"Last updated {int(time.time() - live_hub.updated_at)}s ago")
+
+
+@st.fragment(run_every=PUSH_INTERVAL)
+def live_score(match_id):
+    """Status and score of one match, re-rendered from the hub's diffs only."""
+    fields = live_view().get(match_id)
+    if fields is None:
+        st.info("This match has left the live feed.")
+        return
+    st.write(f"**Status**: 🟢 {fields['status']}")
+    st.write("📊 **Score**")
+    for line in fields["innings"] or (fields["score"],):
+        st.write(line)
+    figures = fields.get("analytics")
+    if figures:
+        show_figures(figures)
+
+
+def show_figures(figures):
+    metrics = [
+        ("Run rate", figures["crr"], "{:.2f}"),
+        ("Required rate", figures["rrr"], "{:.2f}"),
+        ("Projected", figures["projected"], "{:.0f}"),
+        (f"{figures['batting']} win", figures["win_prob"], "{:.0%}"),
+    ]
+    shown = [(label, fmt.format(value)) for label, value, fmt in metrics if value is not None]
+    if shown:
+        st.caption(" · ".join(f"{label}: **{value}**" for label, value in shown))
 
 
 def show():
     st.title("⚡ Live Matches")
     st.markdown("Real-time cricket match updates with minimal API calls (trial safe).")
 
+    worker = get_ingestion_worker()
     if st.button("🔄 Refresh Live Data"):
-        st.cache_data.clear()  # clear cache manually on refresh
-        st.rerun()
-
-    matches = fetch_live_matches()
+        # Nudge the shared poller; the live fragments pick the result up from the hub
+        if worker and worker.trigger():
+            st.toast("Refresh requested; scores update within a few seconds.")
+    if worker:
+        worker.wait_ready()
 
+    matches = live_view()
     if not matches:
         st.warning("No live matches currently available.")
         return
 
-    for match in matches:
+    match_ids = sorted(matches)
+    live_status(match_ids)
+
+    # Fetch every scorecard up front in parallel instead of one per expander
+    score_cards, score_errors = scorecards.prefetch_scorecards(match_ids)
+
+    for match_id in match_ids:
+        match = matches[match_id]
         with st.container():
             st.markdown(f"### {match['match_desc']}")
 
-            col1, col2, col3 = st.columns([2, 1, 1])
+            col1, col2 = st.columns([2, 2])
             with col1:
                 st.write(f"**Series**: {match['series_name']}")
                 st.write(f"**Venue**: {match['venue']}")
-                st.write(f"**Status**: 🟢 {match['status']}")
+                st.write(f"**{match['team1']}** vs **{match['team2']}**")
 
             with col2:
-                st.write(f"**{match['team1']}** vs **{match['team2']}**")
+                live_score(match_id)
 
-            with col3:
-                st.write("📊 **Score**")
-                st.write(match['score'])
+            progression = score_events.replay(match_id)
+            if len(progression) > 1:
+                with st.expander("📈 Score Progression"):
+                    worm = pd.DataFrame(progression)
+                    worm["over"] = worm["balls"] / 6
+                    worm["innings"] = worm["innings"].astype(str) + " - " + worm["team"].fillna("")
+                    st.line_chart(worm, x="over", y="runs", color="innings")
 
-            # Expandable scorecard - only fetch when opened
             with st.expander("📑 View Detailed Scorecard"):
-                score_data = fetch_scorecard(match["match_id"])
+                if match_id in score_errors:
+                    st.error(f"Error fetching scorecard: {score_errors[match_id]}")
+                score_data = score_cards.get(match_id)
                 if score_data and "scoreCard" in score_data:
-                    for innings in score_data["scoreCard"]:
-                        st.subheader(f"{innings.get('batTeam', {}).get('teamName', 'Unknown')} Innings")
+                    for innings in scorecard_frames(score_data):
+                        st.subheader(f"{innings['team']} Innings")
 
                         # Batting Table
-                        if "batTeamDetails" in innings:
-                            batters = innings["batTeamDetails"].get("batsmenData", {}).values()
-                            if batters:
-                                bat_df = pd.DataFrame([
-                                    {
-                                        "Batsman": b.get("batName"),
-                                        "Runs": b.get("runs"),
-                                        "Balls": b.get("balls"),
-                                        "4s": b.get("fours"),
-                                        "6s": b.get("sixes"),
-                                        "SR": b.get("strikeRate")
-                                    }
-                                    for b in batters
-                                ])
-                                st.write("**Batting**")
-                                st.dataframe(bat_df)
+                        if innings["batting"] is not None:
+                            st.write("**Batting**")
+                            st.dataframe(innings["batting"])
 
                         # Bowling Table
-                        if "bowlTeamDetails" in innings:
-                            bowlers = innings["bowlTeamDetails"].get("bowlersData", {}).values()
-                            if bowlers:
-                                bowl_df = pd.DataFrame([
-                                    {
-                                        "Bowler": bw.get("bowlName"),
-                                        "Overs": bw.get("overs"),
-                                        "Runs": bw.get("runs"),
-                                        "Wickets": bw.get("wickets"),
-                                        "Economy": bw.get("economy")
-                                    }
-                                    for bw in bowlers
-                                ])
-                                st.write("**Bowling**")
-                                st.dataframe(bowl_df)
+                        if innings["bowling"] is not None:
+                            st.write("**Bowling**")
+                            st.dataframe(innings["bowling"])
 
             st.markdown("---")
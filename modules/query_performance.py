@@ -0,0 +1,58 @@
+import streamlit as st
+import pandas as pd
+from modules.sql_queries import SQL_QUERIES
+from utils.db_connection import get_pool_stats
+from utils.query_stats import SLOW_QUERY_LOG, SLOW_QUERY_MS, query_stats
+
+def predefined_table():
+    """p50/p95/p99 for every SQL_QUERIES entry, including ones not run yet."""
+    timings = query_stats.by_label()
+    rows = []
+    for difficulty, queries in SQL_QUERIES.items():
+        for name in queries:
+            t = timings.get(name, {})
+            rows.append({
+                "Level": difficulty,
+                "Query": name,
+                "Runs": t.get("runs", 0),
+                "p50 ms": t.get("p50_ms"),
+                "p95 ms": t.get("p95_ms"),
+                "p99 ms": t.get("p99_ms"),
+                "Max ms": t.get("max_ms"),
+            })
+    return pd.DataFrame(rows)
+
+def show():
+    st.title("⏱️ Query Performance")
+    st.markdown(
+        f"Latency of queries run by this server process. Statements slower than "
+        f"{SLOW_QUERY_MS:.0f} ms are logged with their plan to `{SLOW_QUERY_LOG}`."
+    )
+
+    if st.button("Reset statistics"):
+        query_stats.reset()
+
+    st.subheader("📊 Predefined Queries")
+    st.dataframe(predefined_table(), use_container_width=True)
+
+    st.subheader("🧾 All Statements")
+    summary = query_stats.summary()
+    if summary:
+        df = pd.DataFrame(summary).sort_values("p95_ms", ascending=False)
+        st.dataframe(df, use_container_width=True)
+    else:
+        st.info("No queries recorded yet.")
+
+    st.subheader("🐢 Slow Queries")
+    slow = query_stats.slow_queries()
+    if not slow:
+        st.info("No slow queries recorded.")
+    for record in slow[:50]:
+        with st.expander(f"{record['ms']:.0f} ms · {record['label'] or record['site']} · {record['at']}"):
+            st.code(record["sql"], language="sql")
+            st.caption(f"{record['rows']} rows · ~{record['bytes']:,} bytes · {record['site']}")
+            if record["plan"]:
+                st.code("\n".join(record["plan"]), language="text")
+
+    st.subheader("🔌 Connection Pool")
+    st.json(get_pool_stats())
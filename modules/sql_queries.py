@@ -1,6 +1,7 @@
+import time
 import streamlit as st
-import pandas as pd
-from utils.db_connection import execute_query
+from utils import columnar, query_runner
+from utils.result_streaming import EXPORT_MAX_BYTES, EXPORT_MAX_ROWS, show_export
 
 # Predefined SQL queries adapted to your schema
 SQL_QUERIES = {
@@ -49,7 +50,7 @@ SQL_QUERIES = {
         "Question 8: Series in 2024 (Matches)": """
             SELECT match_description, team1, team2, match_date, venue
             FROM matches
-            WHERE strftime('%Y', match_date) = '2024';
+            WHERE match_date >= '2024-01-01' AND match_date < '2025-01-01';
         """
     },
 
@@ -117,6 +118,7 @@ SQL_QUERIES = {
                OR (m.victory_type = 'Wickets' AND m.victory_margin < 5)
             GROUP BY p.player_name;
         """,
+        # Bounded on both sides so the planner seeks idx_matches_date instead of scanning innings
         "Question 16: Yearly Batting Performance": """
             SELECT p.player_name, strftime('%Y', m.match_date) AS year,
                    AVG(b.runs) AS avg_runs,
@@ -124,7 +126,7 @@ SQL_QUERIES = {
             FROM batting_stats b
             JOIN players p ON b.player_id = p.player_id
             JOIN matches m ON b.match_id = m.match_id
-            WHERE strftime('%Y', m.match_date) >= '2020'
+            WHERE m.match_date >= '2020-01-01' AND m.match_date <= DATE('now')
             GROUP BY p.player_name, strftime('%Y', m.match_date)
             HAVING COUNT(b.match_id) >= 5;
         """
@@ -221,7 +223,33 @@ SQL_QUERIES = {
 }
 
 
+def wait_for(job, key):
+    """Wait for a query job on this rerun, offering a cancel button meanwhile.
+
+    Returns ``(result, error)``.
+    """
+    if not job.done:
+        if st.button("⛔ Cancel query", key=f"cancel_{key}"):
+            job.cancel()
+        status = st.empty()
+        while not job.done:
+            status.info(f"⏳ Running for {job.elapsed:.1f}s...")
+            time.sleep(0.2)
+        status.empty()
+    try:
+        return job.result(), None
+    except Exception as e:
+        return None, e
+
+def show_columnar_caption():
+    age = columnar.snapshot_age()
+    synced = f", synced {age / 60:.0f} min ago" if age is not None else ""
+    st.caption(f"🦆 Ran on the DuckDB analytics snapshot{synced}")
+
 def show():
+    # Deferred so tools that only need SQL_QUERIES skip loading pandas
+    import pandas as pd
+
     st.title("🔍 SQL Analytics")
     
     st.markdown("""
@@ -241,35 +269,85 @@ def show():
             st.code(query, language="sql")
             
             if st.button("Execute Query"):
-                with st.spinner("Executing query..."):
-                    result = execute_query(query)
-                    
-                    if result:
-                        data, columns = result
-                        if data:
-                            df = pd.DataFrame(data, columns=columns)
-                            st.subheader("Query Results")
-                            st.dataframe(df)
-                        else:
-                            st.info("Query executed successfully but returned no results.")
+                # Heavy aggregates are served from precomputed summary tables first.
+                # Predefined queries are checked on DuckDB by `python -m utils.columnar verify`.
+                job = query_runner.submit(
+                    query, use_cache=True, label=query_name, materialized=query_name, columnar=True
+                )
+                st.session_state["predefined_job"] = job.id
+
+            job = query_runner.get_job(st.session_state.get("predefined_job"))
+            if job and job.label == query_name:
+                result, error = wait_for(job, "predefined")
+                if error:
+                    st.error(f"Error executing query: {error}")
+                else:
+                    data, columns, truncated = result
+                    if job.from_materialized:
+                        st.caption("⚡ Served from precomputed aggregates")
+                    elif job.from_columnar:
+                        show_columnar_caption()
+                    if data:
+                        df = pd.DataFrame(data, columns=columns)
+                        st.subheader("Query Results")
+                        st.dataframe(df)
+                        if truncated:
+                            st.warning(f"Showing the first {len(data)} rows; the result is larger.")
                     else:
-                        st.error("Error executing query. Please check your database connection.")
+                        st.info("Query executed successfully but returned no results.")
     
     # Custom query
     st.markdown("---")
     st.subheader("Custom SQL Query")
     custom_query = st.text_area("Enter your own SQL query:", height=150)
+    timeout = st.number_input("Time limit (seconds)", min_value=1, max_value=600, value=int(query_runner.TIMEOUT))
+    # DuckDB differs from SQLite on integer division and LIKE case, so custom SQL opts in
+    use_duckdb = columnar.enabled() and st.checkbox(
+        "Run on the DuckDB snapshot", help="Faster for large rollups; uses DuckDB SQL semantics"
+    )
     
     if st.button("Execute Custom Query") and custom_query:
-        with st.spinner("Executing custom query..."):
-            result = execute_query(custom_query)
-            
-            if result:
-                data, columns = result
-                if data:
-                    df = pd.DataFrame(data, columns=columns)
-                    st.dataframe(df)
-                else:
-                    st.success("Query executed successfully.")
+        job = query_runner.submit(custom_query, timeout=timeout, columnar=use_duckdb)
+        st.session_state["custom_job"] = job.id
+
+    job = query_runner.get_job(st.session_state.get("custom_job"))
+    if job and job.query == custom_query.strip().rstrip(";"):
+        result, error = wait_for(job, "custom")
+        if error:
+            st.error(f"Error executing custom query: {error}")
+        elif isinstance(result, tuple):
+            data, columns, truncated = result
+            if job.from_columnar:
+                show_columnar_caption()
+            st.session_state["custom_query_shown"] = (custom_query, len(data) if truncated else None)
+            if data:
+                df = pd.DataFrame(data, columns=columns)
+                st.dataframe(df)
+                if truncated:
+                    st.warning(f"Showing the first {len(data)} rows; the result is larger.")
+            else:
+                st.success("Query executed successfully.")
+        elif result >= 0:
+            st.success(f"Query executed successfully ({result} rows affected).")
+        else:
+            st.success("Query executed successfully.")
+
+    shown = st.session_state.get("custom_query_shown")
+    if shown and shown[1] is not None and shown[0] == custom_query:
+        if st.button("📤 Export the rest to CSV"):
+            job = query_runner.submit(
+                shown[0], timeout=timeout, max_rows=EXPORT_MAX_ROWS, max_bytes=EXPORT_MAX_BYTES,
+                export={"name": "custom_query", "skip_rows": shown[1]},
+            )
+            st.session_state["export_job"] = job.id
+
+        job = query_runner.get_job(st.session_state.get("export_job"))
+        if job and job.query == shown[0].strip().rstrip(";"):
+            result, error = wait_for(job, "export")
+            if error:
+                st.error(f"Error exporting query: {error}")
             else:
-                st.error("Error executing custom query.")
+                path, rows, truncated = result
+                if truncated:
+                    st.warning(f"Export stopped after {rows} rows at the export size limit.")
+                show_export(path, rows)
@@ -1,22 +1,9 @@
 import streamlit as st
-import requests
-import pandas as pd
-import os
-from dotenv import load_dotenv
+from utils import player_catalog
+from utils.parsers import header_rows_frame, rankings_frame
+from utils.player_catalog import PLAYER_PROFILE_URL
 
-load_dotenv()
-
-RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")
-RAPIDAPI_HOST = os.getenv("RAPIDAPI_HOST")
-
-PLAYER_PROFILE_URL = "https://cricbuzz-cricket.p.rapidapi.com/stats/v1/player"
-
-HEADERS = {
-    "X-RapidAPI-Key": RAPIDAPI_KEY,
-    "X-RapidAPI-Host": RAPIDAPI_HOST
-}
-
-# Verified IDs
+# Verified IDs, seeded into an empty catalog and shown before a search
 KNOWN_PLAYERS = {
     "Virat Kohli": 1413,
     "Rohit Sharma": 576,
@@ -29,54 +16,73 @@ KNOWN_PLAYERS = {
     "Hardik Pandya": 9647
 }
 
-@st.cache_data(ttl=21600)
 def fetch_player_profile(player_id):
-    """Fetch player profile (basic info, rankings, recent matches)."""
-    url = f"{PLAYER_PROFILE_URL}/{player_id}"
+    """Player profile (basic info, rankings, recent matches) from the catalog, else the API."""
+    profile = player_catalog.get_profile(player_id)
+    if profile:
+        return profile
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=10)
-        resp.raise_for_status()
-        return resp.json()
+        return player_catalog.fetch_profiles([player_id])[player_id]
     except Exception as e:
         st.error(f"❌ Could not fetch profile for ID {player_id}: {e}")
         return None
 
+def live_teams():
+    """(team_id, team_name) pairs from the stored live feed, for squad loading."""
+    from utils.live_ingestion import load_snapshots
+    teams = {}
+    for match in load_snapshots():
+        info = match["payload"].get("matchInfo", {})
+        for side in ("team1", "team2"):
+            team = info.get(side, {})
+            if team.get("teamId"):
+                teams[team["teamId"]] = team.get("teamName")
+    return list(teams.items())
+
+def choose_player():
+    """Search box over the local catalog; returns (name, player_id)."""
+    query = st.text_input("🔎 Search player", placeholder="e.g. kohli, joe r")
+    if not query.strip():
+        player_name = st.selectbox("Select Player", list(KNOWN_PLAYERS.keys()))
+        return player_name, KNOWN_PLAYERS[player_name]
+
+    found = player_catalog.search(query)
+    if not found:
+        st.info("No player in the local catalog matches that name.")
+        if st.button(f"Search Cricbuzz for '{query}'"):
+            try:
+                found = player_catalog.search_remote(query)
+            except Exception as e:
+                st.error(f"❌ Player search failed: {e}")
+        if not found:
+            return None, None
+
+    labels = {
+        f"{p['name']} ({p['team']})" if p.get("team") else p["name"]: p["player_id"]
+        for p in found
+    }
+    label = st.selectbox("Select Player", list(labels.keys()))
+    return label, labels[label]
+
 def parse_recent(data, key):
-    """Extract recent batting/bowling records into a DataFrame."""
-    records = []
-    section = data.get(key, {})
-    if "rows" in section:
-        headers = section.get("headers", [])
-        for row in section["rows"]:
-            vals = row.get("values", [])
-            row_dict = {}
-            for i, h in enumerate(headers):
-                if i < len(vals):
-                    row_dict[h] = vals[i]
-            if row_dict:
-                records.append(row_dict)
-    return pd.DataFrame(records)
+    """Recent batting/bowling records as a typed DataFrame."""
+    return header_rows_frame(data.get(key, {}))
 
 def parse_rankings(rankings):
     """Convert rankings dict into a clean DataFrame."""
-    if not rankings:
-        return pd.DataFrame()
-    rows = []
-    for category, stats in rankings.items():
-        for k, v in stats.items():
-            rows.append({
-                "Category": category.upper(),
-                "Metric": k,
-                "Value": v
-            })
-    return pd.DataFrame(rows)
+    return rankings_frame(rankings)
 
 def show():
-    st.title("📊 Player Stats (Predefined Players)")
-    st.markdown("Select a player to view their profile, rankings, and recent performance.")
+    st.title("📊 Player Stats")
+    st.markdown("Search for a player to view their profile, rankings, and recent performance.")
 
-    player_name = st.selectbox("Select Player", list(KNOWN_PLAYERS.keys()))
-    player_id = KNOWN_PLAYERS[player_name]
+    player_catalog.seed(KNOWN_PLAYERS)
+    # live_teams reads the snapshot table, so it only runs when a sync starts
+    player_catalog.sync_in_background(live_teams)
+
+    player_name, player_id = choose_player()
+    if player_id is None:
+        return
 
     with st.spinner(f"Fetching stats for {player_name} (ID: {player_id})..."):
         profile = fetch_player_profile(player_id)
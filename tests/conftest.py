@@ -0,0 +1,31 @@
+"""Run the tests against a throwaway SQLite database.
+
+The settings are read from the environment when ``utils`` is imported, so
+they are set here, before any test module imports the app.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+_TMP = Path(tempfile.mkdtemp(prefix="cricbuzz-tests-"))
+os.environ.update({
+    "DB_TYPE": "sqlite",
+    "DB_PATH": str(_TMP / "test.db"),
+    "HTTP_CACHE_PATH": str(_TMP / "http_cache.db"),
+    "SHARED_STATE_PATH": str(_TMP / "shared_state.db"),
+    "MULTI_PROCESS": "0",
+    "SLOW_QUERY_MS": "1e9",
+})
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    from utils.schema import migrate
+
+    migrate()
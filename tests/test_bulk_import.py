@@ -0,0 +1,31 @@
+from utils import bulk_import, materialized
+from utils.db_connection import db_instance
+
+
+def _pragmas():
+    with db_instance.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            return bulk_import._read_pragmas(cursor, bulk_import.LOAD_PRAGMAS)
+        finally:
+            cursor.close()
+
+
+def test_load_restores_the_settings_it_found(monkeypatch):
+    monkeypatch.setattr(materialized, "rebuild_if_built", lambda: None)
+    before = _pragmas()
+
+    bulk_import.import_batches("players", [[{"player_id": 90001, "player_name": "Bulk Pragma"}]])
+
+    assert _pragmas() == before
+
+
+def test_only_source_tables_rebuild_the_summaries(monkeypatch):
+    rebuilt = []
+    monkeypatch.setattr(materialized, "rebuild_if_built", lambda: rebuilt.append(True))
+
+    bulk_import.import_batches("venues", [[{"venue_name": "Bulk Oval", "city": "Kathmandu"}]])
+    assert rebuilt == []
+
+    bulk_import.import_batches("matches", [[{"match_id": 90001, "team1": "Nepal", "team2": "Oman"}]])
+    assert rebuilt == [True]
@@ -0,0 +1,26 @@
+from datetime import date
+
+from utils.columnar import _same_rows, translate
+
+
+def test_dates_match_their_iso_strings_whatever_the_order():
+    sqlite_rows = [("Test", "2024-03-01"), ("ODI", "2024-11-20"), ("T20I", "2024-06-15")]
+    duckdb_rows = [("T20I", date(2024, 6, 15)), ("Test", date(2024, 3, 1)), ("ODI", date(2024, 11, 20))]
+
+    assert _same_rows(sqlite_rows, duckdb_rows)
+
+
+def test_float_noise_is_ignored_but_real_differences_are_not():
+    assert _same_rows([("Root", 25.151304347826088)], [("Root", 25.15130434782609)])
+    assert not _same_rows([("Root", 25.15)], [("Root", 25.16)])
+    assert not _same_rows([("Root", 2)], [("Root", 3)])
+    assert not _same_rows([("Root", 1)], [])
+
+
+def test_translate_sqlite_date_functions():
+    assert translate("SELECT strftime('%Y', match_date) FROM matches") == (
+        "SELECT strftime(CAST(match_date AS DATE), '%Y') FROM matches"
+    )
+    assert translate("WHERE match_date >= DATE('now','-3 year')") == (
+        "WHERE match_date >= CAST(current_date - INTERVAL 3 YEAR AS DATE)"
+    )
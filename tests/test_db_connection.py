@@ -0,0 +1,93 @@
+import sqlite3
+import threading
+
+import pytest
+
+from utils.db_connection import ConnectionPool, DatabaseConnection, PoolTimeoutError, ThreadLocalPool
+
+
+def _memory():
+    return sqlite3.connect(":memory:", check_same_thread=False)
+
+
+def test_release_returns_connection_for_reuse():
+    pool = ConnectionPool(_memory, size=2, timeout=0.1)
+    conn = pool.acquire()
+    pool.release(conn)
+
+    assert pool.acquire() is conn
+    assert pool.stats.snapshot()["open"] == 1
+
+
+def test_acquire_times_out_when_exhausted():
+    pool = ConnectionPool(_memory, size=1, timeout=0.05)
+    conn = pool.acquire()
+
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    pool.release(conn)
+    pool.release(pool.acquire())
+
+
+def test_broken_connection_is_discarded():
+    pool = ConnectionPool(_memory, size=1, timeout=0.1)
+    conn = pool.acquire()
+    pool.release(conn, broken=True)
+
+    assert pool.acquire() is not conn
+    assert pool.stats.snapshot()["discarded"] == 1
+
+
+def test_thread_local_pool_pins_one_connection_per_thread():
+    pool = ThreadLocalPool(_memory, size=2, timeout=0.1)
+    conn = pool.acquire()
+    pool.release(conn)
+    other = []
+
+    def _borrow():
+        c = pool.acquire()
+        other.append(c)
+        pool.release(c)
+
+    thread = threading.Thread(target=_borrow)
+    thread.start()
+    thread.join()
+
+    assert pool.acquire() is conn
+    assert other[0] is not conn
+
+
+def test_nested_checkout_is_not_recycled_under_the_outer_block():
+    pool = ThreadLocalPool(_memory, size=2, timeout=0.1, recycle=0.001)
+    outer = pool.acquire()
+    pool._born[id(outer)] -= 1  # stale from here on
+    inner = pool.acquire()
+    pool.release(inner)
+
+    assert inner is outer
+    outer.execute("SELECT 1")
+    pool.release(outer)
+    # Recycled once the outermost checkout is back
+    assert pool.acquire() is not outer
+
+
+def test_nested_read_checkouts_release_to_the_read_pool():
+    db = DatabaseConnection()
+    db.pool = ThreadLocalPool(_memory, size=1, timeout=0.1)
+    db.read_pools = [ThreadLocalPool(_memory, size=2, timeout=0.1)]
+
+    with db.connection(read=True) as outer:
+        with db.connection(read=True) as inner:
+            assert inner is outer
+        assert db.is_replica(outer) is False  # only MySQL replicas lag
+
+        assert db.pool_of(outer) is db.read_pools[0]
+
+    assert db._owners == {}
+    assert db.read_pools[0].stats.snapshot()["checked_out"] == 0
+    assert db.pool.stats.snapshot()["checked_out"] == 0
+    # The primary's single slot was never over-released
+    conn = db.pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        db.pool.acquire()
+    db.pool.release(conn)
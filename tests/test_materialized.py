@@ -0,0 +1,52 @@
+from utils import materialized
+from utils.db_connection import db_instance
+
+Q11 = "Question 11: Player Format Comparison"
+
+
+def _write(sql, params=()):
+    with db_instance.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            conn.commit()
+            return cursor.lastrowid
+        finally:
+            cursor.close()
+
+
+def _add_innings(player_id, format, total_runs):
+    match_id = _write("INSERT INTO matches (team1, team2, match_date) VALUES ('India', 'Nepal', '2024-01-01')")
+    _write(
+        "INSERT INTO batting_stats (player_id, match_id, format, runs, balls, total_runs, batting_avg)"
+        " VALUES (?, ?, ?, 10, 12, ?, 40.5)",
+        (player_id, match_id, format, total_runs)
+    )
+
+
+def test_format_runs_stay_integers():
+    player_id = _write("INSERT INTO players (player_name) VALUES ('Agg Two Formats')")
+    _add_innings(player_id, "Test", 5100)
+    _add_innings(player_id, "ODI", 3200)
+    materialized.refresh()
+
+    rows, _ = materialized.run_materialized(Q11)
+    row = next(r for r in rows if r[0] == "Agg Two Formats")
+
+    assert row[1:4] == (5100, 3200, 0)
+    assert all(isinstance(v, int) for v in row[1:4])
+
+
+def test_served_queries_do_not_wait_for_the_refresh(monkeypatch):
+    started = []
+
+    def refresh():
+        raise AssertionError("refresh ran on the serving thread")
+
+    monkeypatch.setattr(materialized, "refresh", refresh)
+    monkeypatch.setattr(materialized, "refresh_in_background", lambda: started.append(True))
+    player_id = _write("INSERT INTO players (player_name) VALUES ('Agg Pending')")
+    _add_innings(player_id, "T20I", 700)
+
+    assert materialized.run_materialized(Q11) is not None
+    assert started == [True]
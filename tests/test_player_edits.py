@@ -0,0 +1,79 @@
+import pytest
+
+from utils.db_connection import execute_query
+from utils.player_edits import ConcurrentEditError, apply_changes
+
+
+def _player(name):
+    rows, _ = execute_query(
+        "SELECT player_id, version, country FROM players WHERE player_name = ?", (name,), use_cache=False
+    )
+    return rows[0] if rows else None
+
+
+def _insert(name, country="India"):
+    apply_changes(inserts=[{"player_name": name, "country": country, "playing_role": "Batsman"}])
+    return _player(name)
+
+
+def _update(player_id, version, name, country):
+    return {"player_id": player_id, "version": version, "player_name": name, "country": country}
+
+
+def test_update_bumps_version():
+    player_id, version, _ = _insert("Edit Once")
+
+    assert apply_changes(updates=[_update(player_id, version, "Edit Once", "Nepal")])["updated"] == 1
+    assert _player("Edit Once") == (player_id, version + 1, "Nepal")
+
+
+def test_stale_update_applies_nothing():
+    first_id, first_version, _ = _insert("Stale A")
+    second_id, second_version, _ = _insert("Stale B")
+    # Someone else saves "Stale B" first
+    apply_changes(updates=[_update(second_id, second_version, "Stale B", "Oman")])
+
+    with pytest.raises(ConcurrentEditError) as raised:
+        apply_changes(updates=[
+            _update(first_id, first_version, "Stale A", "Kenya"),
+            _update(second_id, second_version, "Stale B", "Kenya"),
+        ])
+    assert raised.value.player_ids == [second_id]
+    # The whole batch was rolled back, including the row that was current
+    assert _player("Stale A") == (first_id, first_version, "India")
+    assert _player("Stale B") == (second_id, second_version + 1, "Oman")
+
+
+def test_delete_needs_current_version():
+    player_id, version, _ = _insert("Delete Me")
+    apply_changes(updates=[_update(player_id, version, "Delete Me", "Italy")])
+
+    with pytest.raises(ConcurrentEditError):
+        apply_changes(deletes=[(player_id, version)])
+    assert _player("Delete Me") is not None
+
+    assert apply_changes(deletes=[(player_id, version + 1)])["deleted"] == 1
+    assert _player("Delete Me") is None
+
+
+def test_deleted_row_is_reported_as_stale():
+    player_id, version, _ = _insert("Gone Already")
+    apply_changes(deletes=[(player_id, version)])
+
+    with pytest.raises(ConcurrentEditError) as raised:
+        apply_changes(updates=[_update(player_id, version, "Gone Already", "Fiji")])
+    assert raised.value.player_ids == [player_id]
+
+
+def test_every_player_needs_a_name():
+    with pytest.raises(ValueError):
+        apply_changes(inserts=[{"player_name": "  "}])
+
+
+def test_edits_invalidate_cached_reads():
+    player_id, version, _ = _insert("Cached Player")
+    query = "SELECT country FROM players WHERE player_id = ?"
+    assert execute_query(query, (player_id,))[0] == [("India",)]
+
+    apply_changes(updates=[_update(player_id, version, "Cached Player", "Chile")])
+    assert execute_query(query, (player_id,))[0] == [("Chile",)]
@@ -0,0 +1,77 @@
+from utils.query_cache import QueryCache, tables_read, table_written
+
+RESULT = ([(1, "Virat Kohli")], ["player_id", "player_name"])
+QUERY = "SELECT player_id, player_name FROM players p JOIN batting_stats b ON b.player_id = p.player_id"
+
+
+def _read(cache, query=QUERY):
+    key = cache.make_key(query)
+    tables = tables_read(query)
+    return key, tables, cache.generations(tables)
+
+
+def test_put_then_get():
+    cache = QueryCache()
+    key, tables, generations = _read(cache)
+    cache.put(key, RESULT, tables, generations)
+
+    assert cache.get(cache.make_key(" " + QUERY + " ;")) == RESULT
+
+
+def test_write_during_read_skips_put():
+    cache = QueryCache()
+    key, tables, generations = _read(cache)
+    # A write lands while the read is still running
+    cache.invalidate_table("batting_stats")
+    cache.put(key, RESULT, tables, generations)
+
+    assert cache.get(key) is None
+
+
+def test_clear_during_read_skips_put():
+    cache = QueryCache()
+    key, tables, generations = _read(cache)
+    cache.clear()
+    cache.put(key, RESULT, tables, generations)
+
+    assert cache.get(key) is None
+
+
+def test_invalidation_drops_only_readers_of_the_table():
+    cache = QueryCache()
+    key, tables, generations = _read(cache)
+    cache.put(key, RESULT, tables, generations)
+    venues = "SELECT venue_name FROM venues"
+    venues_key, venues_tables, venues_generations = _read(cache, venues)
+    cache.put(venues_key, ([("Eden Gardens",)], ["venue_name"]), venues_tables, venues_generations)
+
+    cache.invalidate_for_write("UPDATE batting_stats SET runs = 0 WHERE player_id = 1")
+
+    assert cache.get(key) is None
+    assert cache.get(venues_key) is not None
+
+
+def test_listeners_see_changed_keys():
+    cache = QueryCache()
+    seen = []
+    cache.subscribe(lambda table, keys: seen.append((table, keys)))
+
+    cache.invalidate_for_write("INSERT INTO players (player_name) VALUES ('New')")
+    cache.invalidate_table("players", [7])
+    cache.invalidate_for_write("DELETE FROM players WHERE player_id = 7")
+
+    assert seen == [("players", ()), ("players", [7]), ("players", None)]
+
+
+def test_tables_read():
+    assert tables_read(QUERY) == {"players", "batting_stats"}
+    assert tables_read("SELECT * FROM matches m, venues AS v, players WHERE m.venue = v.venue_name") == {
+        "matches", "venues", "players"
+    }
+    assert tables_read("SELECT * FROM `players`") == {"players"}
+
+
+def test_table_written():
+    assert table_written("INSERT OR REPLACE INTO players VALUES (1)") == "players"
+    assert table_written("DELETE FROM matches WHERE match_id = 1") == "matches"
+    assert table_written("SELECT 1") is None
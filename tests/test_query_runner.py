@@ -0,0 +1,72 @@
+from concurrent.futures import Future
+
+import pytest
+
+from utils import query_runner
+
+
+class _Cursor:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def execute(self, statement):
+        self.pool.statements.append(statement)
+        if self.pool.error:
+            raise self.pool.error
+
+    def close(self):
+        pass
+
+
+class _Pool:
+    def __init__(self, error=None):
+        self.statements = []
+        self.error = error
+        self.released = 0
+
+    def acquire(self):
+        return self
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def release(self, conn, broken=False):
+        self.released += 1
+
+
+def _running_job(pool, thread_id=42):
+    job = query_runner.QueryJob("SELECT 1", None, 30, 10, 1024, False, None, None, False)
+    job.future = Future()
+    job.future.set_running_or_notify_cancel()
+    job.mysql_thread_id = thread_id
+    job.mysql_pool = pool
+    return job
+
+
+@pytest.fixture
+def mysql(monkeypatch):
+    monkeypatch.setattr(query_runner, "is_mysql", lambda: True)
+
+
+def test_kill_goes_to_the_pool_running_the_statement(mysql):
+    replica = _Pool()
+    _running_job(replica).cancel()
+
+    assert replica.statements == ["KILL QUERY 42"]
+    assert replica.released == 1
+
+
+def test_failed_kill_does_not_raise(mysql):
+    replica = _Pool(error=RuntimeError("Unknown thread id: 42"))
+    job = _running_job(replica)
+    job.cancel()
+
+    assert job.cancelled.is_set()
+    assert replica.released == 1
+
+
+def test_finished_statement_is_not_killed(mysql):
+    job = _running_job(_Pool(), thread_id=None)
+    job.cancel()
+
+    assert job.mysql_pool.statements == []
@@ -0,0 +1,40 @@
+from utils import score_events
+
+
+def _match(match_id, runs, wickets, overs):
+    return {
+        "match_id": match_id,
+        "payload": {
+            "matchInfo": {"team1": {"teamName": "India"}, "team2": {"teamName": "Australia"}},
+            "matchScore": {"team1Score": {"inngs1": {"inningsId": 1, "runs": runs, "wickets": wickets, "overs": overs}}},
+        },
+    }
+
+
+def test_overs_to_balls():
+    assert score_events.overs_to_balls("12.3") == 75
+    assert score_events.overs_to_balls(20) == 120
+    assert score_events.overs_to_balls(None) == 0
+
+
+def test_only_changes_are_recorded_and_replayed_in_order():
+    score_events.ensure_events_table()
+    match_id = 900001
+
+    assert score_events.record_deltas([_match(match_id, 10, 0, "2.0")]) == 1
+    assert score_events.record_deltas([_match(match_id, 10, 0, "2.0")]) == 0
+    assert score_events.record_deltas([_match(match_id, 24, 1, "4.2")]) == 1
+
+    assert [(e["balls"], e["runs"], e["wickets"]) for e in score_events.replay(match_id)] == [
+        (12, 10, 0), (26, 24, 1)
+    ]
+
+
+def test_state_is_reloaded_after_a_match_leaves_the_feed():
+    score_events.ensure_events_table()
+    match_id = 900002
+    score_events.record_deltas([_match(match_id, 50, 2, "8.0")])
+    score_events.record_deltas([])
+
+    # Reloaded from the table, so the unchanged score is not written again
+    assert score_events.record_deltas([_match(match_id, 50, 2, "8.0")]) == 0
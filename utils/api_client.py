@@ -0,0 +1,308 @@
+"""Shared Cricbuzz (RapidAPI) HTTP client with request budgeting.
+
+Every outbound call goes through one keep-alive session and:
+
+- waits on a token bucket (``RAPIDAPI_RATE_PER_SEC`` / ``RAPIDAPI_BURST``),
+- is counted against a daily quota (``RAPIDAPI_DAILY_QUOTA``, 0 = unlimited),
+  both shared by every worker on the host with ``MULTI_PROCESS=1``,
+- retries 429/5xx/network errors with jittered exponential backoff and
+  honours ``Retry-After``,
+- is short-circuited while the circuit breaker is open,
+- is coalesced with identical in-flight calls, so concurrent viewers share
+  one HTTP request.
+
+``get_json`` reads through the persistent response cache
+(``utils.response_cache``): fresh entries cost no call, expired ones are
+revalidated with ``ETag`` / ``Last-Modified``, and the last stored payload is
+served when the API is unavailable or the budget is spent.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.config import RAPIDAPI_HEADERS
+from utils.response_cache import response_cache
+from utils.shared_state import ENABLED as MULTI_PROCESS, shared_state
+
+log = logging.getLogger(__name__)
+
+RATE_PER_SEC = float(os.getenv("RAPIDAPI_RATE_PER_SEC", "5"))
+BURST = int(os.getenv("RAPIDAPI_BURST", "10"))
+DAILY_QUOTA = int(os.getenv("RAPIDAPI_DAILY_QUOTA", "0"))
+MAX_RETRIES = int(os.getenv("RAPIDAPI_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("RAPIDAPI_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("RAPIDAPI_BACKOFF_MAX", "8"))
+BREAKER_THRESHOLD = int(os.getenv("RAPIDAPI_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("RAPIDAPI_BREAKER_COOLDOWN", "60"))
+POOL_SIZE = int(os.getenv("RAPIDAPI_POOL_SIZE", "16"))
+TIMEOUT = float(os.getenv("RAPIDAPI_TIMEOUT", "10"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ApiError(Exception):
+    """The API could not produce a response and no fallback was available."""
+
+
+class QuotaExceededError(ApiError):
+    pass
+
+
+class CircuitOpenError(ApiError):
+    pass
+
+
+class TokenBucket:
+    """Classic token bucket; ``acquire`` blocks until a token is free."""
+
+    def __init__(self, rate=RATE_PER_SEC, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class DailyQuota:
+    """Counts calls per UTC day and refuses them once ``limit`` is reached."""
+
+    def __init__(self, limit=DAILY_QUOTA):
+        self.limit = limit
+        self.day = None
+        self.used = 0
+        self.lock = threading.Lock()
+
+    def consume(self):
+        with self.lock:
+            today = datetime.now(timezone.utc).date()
+            if today != self.day:
+                self.day, self.used = today, 0
+            if self.limit and self.used >= self.limit:
+                return False
+            self.used += 1
+            return True
+
+    def remaining(self):
+        with self.lock:
+            return None if not self.limit else max(0, self.limit - self.used)
+
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket kept in ``shared_state``, so all workers on the host share one rate."""
+
+    def __init__(self, rate=RATE_PER_SEC, capacity=BURST, name="rapidapi"):
+        super().__init__(rate, capacity)
+        self.name = name
+
+    def acquire(self):
+        waited = 0.0
+        while True:
+            delay = shared_state.take_token(self.name, self.rate, self.capacity)
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+
+class SharedDailyQuota(DailyQuota):
+    """Daily quota counted in ``shared_state`` across all workers."""
+
+    def __init__(self, limit=DAILY_QUOTA, name="rapidapi"):
+        super().__init__(limit)
+        self.name = name
+
+    def consume(self):
+        return shared_state.consume(self.name, self.limit)
+
+    def remaining(self):
+        return None if not self.limit else max(0, self.limit - shared_state.used_today(self.name))
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures, then allows one trial call."""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                # Half-open: let this call probe the API
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record(self, ok):
+        with self.lock:
+            if ok:
+                self.failures, self.opened_at = 0, None
+            else:
+                self.failures += 1
+                if self.failures >= self.threshold:
+                    self.opened_at = time.monotonic()
+
+    @property
+    def state(self):
+        return "closed" if self.opened_at is None else "open"
+
+
+class ApiClient:
+    def __init__(self, headers=RAPIDAPI_HEADERS, limiter=None, quota=None, breaker=None, cache=response_cache):
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.limiter = limiter or (SharedTokenBucket() if MULTI_PROCESS else TokenBucket())
+        self.quota = quota or (SharedDailyQuota() if MULTI_PROCESS else DailyQuota())
+        self.breaker = breaker or CircuitBreaker()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self.cache = cache
+        self.counters = {
+            "requests": 0, "retries": 0, "coalesced": 0, "fallbacks": 0,
+            "cache_hits": 0, "revalidated": 0, "throttled_s": 0.0,
+        }
+        self._counters_lock = threading.Lock()
+
+    def _count(self, name, amount):
+        with self._counters_lock:
+            self.counters[name] += amount
+
+    @staticmethod
+    def _key(url, params, headers):
+        return (
+            url,
+            tuple(sorted((params or {}).items())),
+            tuple(sorted((headers or {}).items())),
+        )
+
+    def _send(self, url, params, headers):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {url}")
+        for attempt in range(MAX_RETRIES + 1):
+            self._count("throttled_s", self.limiter.acquire())
+            if not self.quota.consume():
+                raise QuotaExceededError("Daily RapidAPI quota exhausted")
+            self._count("requests", 1)
+            retry_after = None
+            try:
+                resp = self.session.get(url, params=params, headers=headers, timeout=TIMEOUT)
+                if resp.status_code not in RETRY_STATUSES:
+                    self.breaker.record(resp.status_code < 500)
+                    return resp
+                retry_after = resp.headers.get("Retry-After")
+                error = ApiError(f"HTTP {resp.status_code} from {url}")
+            except requests.RequestException as e:
+                error = ApiError(str(e))
+            if attempt == MAX_RETRIES:
+                break
+            self._count("retries", 1)
+            delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            if retry_after and str(retry_after).isdigit():
+                delay = max(delay, float(retry_after))
+            time.sleep(delay)
+        self.breaker.record(False)
+        raise error
+
+    def request(self, url, params=None, headers=None):
+        """GET with budgeting, retries and coalescing. Returns the Response."""
+        key = self._key(url, params, headers)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self._count("coalesced", 1)
+        if not owner:
+            return future.result()
+        try:
+            resp = self._send(url, params, headers)
+            future.set_result(resp)
+            return resp
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def get_json(self, url, params=None):
+        """Fetch JSON through the response cache, falling back to a stale copy on failure."""
+        cached = self.cache.get(url, params) if self.cache else None
+        if cached and cached["fresh"]:
+            self._count("cache_hits", 1)
+            return cached["payload"]
+        headers = {}
+        if cached:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+        try:
+            resp = self.request(url, params, headers or None)
+            if resp.status_code == 304 and cached:
+                self._count("revalidated", 1)
+                self.cache.touch(url, params)
+                return cached["payload"]
+            resp.raise_for_status()
+            payload = resp.json()
+        except Exception as e:
+            if cached:
+                self._count("fallbacks", 1)
+                log.warning("Serving cached payload for %s: %s", url, e)
+                return cached["payload"]
+            raise
+        if self.cache:
+            self.cache.put(
+                url, params, payload,
+                etag=resp.headers.get("ETag"),
+                last_modified=resp.headers.get("Last-Modified"),
+            )
+        return payload
+
+    def stats(self):
+        with self._counters_lock:
+            counters = dict(self.counters)
+        return dict(
+            counters,
+            breaker=self.breaker.state,
+            quota_remaining=self.quota.remaining(),
+            cache=self.cache.stats() if self.cache else None,
+        )
+
+
+client = ApiClient()
+
+
+def get_json(url, params=None):
+    return client.get_json(url, params)
@@ -0,0 +1,229 @@
+"""Bulk loader for historical players, matches, venues and innings stats.
+
+Rows are read from CSV, JSON / JSON Lines or Parquet, batched, and written
+with ``executemany`` upserts keyed on each table's natural key. Re-running
+an import therefore updates rows instead of duplicating them. One
+transaction is committed every ``BULK_COMMIT_ROWS`` rows. On SQLite the
+database is switched to WAL with load-friendly pragmas for the duration.
+
+    python -m utils.bulk_import players data/players.csv
+    python -m utils.bulk_import batting_stats data/batting.parquet --batch-size 20000
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from utils import materialized
+from utils.config import is_mysql
+from utils.db_connection import db_instance
+from utils.query_cache import query_cache
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "5000"))
+COMMIT_ROWS = int(os.getenv("BULK_COMMIT_ROWS", "100000"))
+
+# Natural key of every importable table
+NATURAL_KEYS = {
+    "players": ["player_id"],
+    "matches": ["match_id"],
+    "venues": ["venue_name"],
+    "batting_stats": ["player_id", "match_id", "innings"],
+    "bowling_stats": ["player_id", "match_id", "innings"],
+}
+
+FORMATS = ["csv", "json", "parquet"]
+
+# Applied while loading into SQLite; the values found beforehand are restored after
+LOAD_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+    "cache_size": "-262144",
+}
+
+
+def detect_format(path):
+    suffix = Path(path).suffix.lower().lstrip(".")
+    if suffix in ("jsonl", "ndjson"):
+        return "json"
+    if suffix in ("parq", "pq"):
+        return "parquet"
+    return suffix
+
+
+def read_records(path, fmt=None, batch_size=BATCH_SIZE):
+    """Yield lists of row dicts from a CSV, JSON/JSONL or Parquet file."""
+    fmt = fmt or detect_format(path)
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8") as handle:
+            batch = []
+            for row in csv.DictReader(handle):
+                batch.append({k: (v if v != "" else None) for k, v in row.items()})
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+    elif fmt == "json":
+        with open(path, encoding="utf-8") as handle:
+            first = handle.read(1)
+            while first.isspace():
+                first = handle.read(1)
+            handle.seek(0)
+            if first == "[":
+                records = json.load(handle)
+                for start in range(0, len(records), batch_size):
+                    yield records[start:start + batch_size]
+            else:
+                batch = []
+                for line in handle:
+                    if line.strip():
+                        batch.append(json.loads(line))
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+                if batch:
+                    yield batch
+    elif fmt == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet import needs pyarrow (pip install pyarrow)")
+        for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield record_batch.to_pylist()
+    else:
+        raise ValueError(f"Unsupported format '{fmt}' (expected one of {', '.join(FORMATS)})")
+
+
+def _table_columns(cursor, table):
+    cursor.execute(f"SELECT * FROM {table} WHERE 1 = 0")
+    columns = [d[0] for d in cursor.description]
+    cursor.fetchall()
+    return columns
+
+
+def _read_pragmas(cursor, names):
+    values = {}
+    for name in names:
+        cursor.execute(f"PRAGMA {name}")
+        values[name] = cursor.fetchone()[0]
+    return values
+
+
+def _restore_pragmas(cursor, values):
+    # journal_mode last: it can only change outside a transaction
+    for name, value in reversed(list(values.items())):
+        try:
+            cursor.execute(f"PRAGMA {name}={value}")
+        except sqlite3.Error as exc:
+            log.warning("Could not restore PRAGMA %s=%s after bulk load: %s", name, value, exc)
+
+
+def upsert_sql(table, columns, keys=None, keep_existing=()):
+    """Dialect-specific INSERT that updates existing rows on natural-key conflict.
+
+    Columns in ``keep_existing`` keep their stored value when the new row has NULL.
+    """
+    keys = keys or NATURAL_KEYS[table]
+    updates = [c for c in columns if c not in keys]
+    if is_mysql():
+        marks = ", ".join(["%s"] * len(columns))
+        assign = ", ".join(
+            f"{c} = IFNULL(VALUES({c}), {c})" if c in keep_existing else f"{c} = VALUES({c})" for c in updates
+        ) or f"{keys[0]} = {keys[0]}"
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({marks}) ON DUPLICATE KEY UPDATE {assign}"
+    marks = ", ".join(["?"] * len(columns))
+    conflict = ", ".join(keys)
+    if updates:
+        assign = ", ".join(
+            f"{c} = COALESCE(excluded.{c}, {c})" if c in keep_existing else f"{c} = excluded.{c}" for c in updates
+        )
+        action = f"DO UPDATE SET {assign}"
+    else:
+        action = "DO NOTHING"
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({marks}) ON CONFLICT ({conflict}) {action}"
+
+
+def import_file(table, path, fmt=None, batch_size=BATCH_SIZE, commit_rows=COMMIT_ROWS, progress=None):
+    """Load a file into ``table``. Returns ``{"rows", "seconds", "skipped_columns"}``.
+
+    ``progress`` is an optional callback receiving the running row count.
+    """
+    return import_batches(table, read_records(path, fmt, batch_size), commit_rows, progress)
+
+
+def import_batches(table, batches, commit_rows=COMMIT_ROWS, progress=None):
+    """Upsert an iterable of row-dict lists into ``table``; see ``import_file``."""
+    if table not in NATURAL_KEYS:
+        raise ValueError(f"Unsupported table '{table}'")
+    started = time.perf_counter()
+    loaded = 0
+    skipped = set()
+    with db_instance.connection() as conn:
+        if conn is None:
+            raise RuntimeError("No database connection")
+        cursor = conn.cursor()
+        previous = {}
+        try:
+            if not is_mysql():
+                conn.commit()
+                previous = _read_pragmas(cursor, LOAD_PRAGMAS)
+                for name, value in LOAD_PRAGMAS.items():
+                    cursor.execute(f"PRAGMA {name}={value}")
+            known = _table_columns(cursor, table)
+            since_commit = 0
+            for batch in batches:
+                if not batch:
+                    continue
+                columns = [c for c in batch[0].keys() if c in known]
+                skipped.update(c for c in batch[0].keys() if c not in known)
+                missing = [k for k in NATURAL_KEYS[table] if k not in columns]
+                if missing:
+                    raise ValueError(f"{table} rows need natural key column(s): {', '.join(missing)}")
+                cursor.executemany(
+                    upsert_sql(table, columns),
+                    [tuple(row.get(c) for c in columns) for row in batch]
+                )
+                loaded += len(batch)
+                since_commit += len(batch)
+                if since_commit >= commit_rows:
+                    conn.commit()
+                    since_commit = 0
+                if progress:
+                    progress(loaded)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            _restore_pragmas(cursor, previous)
+            cursor.close()
+    query_cache.invalidate_table(table)
+    if table in materialized.SOURCE_TABLES:
+        materialized.rebuild_if_built()
+    return {"rows": loaded, "seconds": time.perf_counter() - started, "skipped_columns": sorted(skipped)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load historical cricket data")
+    parser.add_argument("table", choices=sorted(NATURAL_KEYS))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    from utils.schema import migrate
+    migrate()
+    stats = import_file(
+        args.table, args.path, args.format, args.batch_size,
+        progress=lambda n: print(f"\r{n:,} rows", end="", flush=True)
+    )
+    print(f"\nLoaded {stats['rows']:,} rows into {args.table} in {stats['seconds']:.1f}s")
+    if stats["skipped_columns"]:
+        print(f"Ignored unknown columns: {', '.join(stats['skipped_columns'])}")
@@ -0,0 +1,328 @@
+"""Optional DuckDB snapshot of the analytics tables for SQL Analytics.
+
+With ``ANALYTICS_ENGINE=duckdb`` the read-only analytics tables are copied
+from the main database into a DuckDB file (``DUCKDB_PATH``), and SELECTs from
+the SQL Analytics page that only touch those tables run there. DuckDB stores
+columns and runs vectorised, so the GROUP BY rollups over long histories
+scan a fraction of the data a row store reads. CRUD, imports and every other
+page keep using SQLite / MySQL.
+
+Tables are copied in batches into a staging table and swapped in, so
+queries never see a half-synced table. A write seen by the query cache
+(including other workers' with ``MULTI_PROCESS=1``) marks its table dirty:
+queries reading it go to the main database until it is re-copied. A table
+is also re-copied when its row count or highest key changed or its copy is
+older than ``COLUMNAR_MAX_AGE`` seconds, which catches writes made while
+the app was down. Syncs run in the background at most every
+``COLUMNAR_SYNC_INTERVAL`` seconds. Until the first sync finishes, queries
+run on the main database.
+
+The SQL is written for SQLite, so ``translate`` rewrites the few functions
+DuckDB spells differently: ``strftime('%Y', col)`` takes its arguments the
+other way round and ``DATE('now', '-N unit')`` becomes date arithmetic.
+Other semantics still differ (``/`` on integers, case-sensitive ``LIKE``),
+so only the predefined queries, checked with ``verify``, run here by
+default; custom SQL has to opt in.
+
+    python -m utils.columnar sync
+    python -m utils.columnar sync --parquet exports/parquet   # also write Parquet files
+    python -m utils.columnar verify    # compare the predefined queries on both engines
+"""
+import argparse
+import logging
+import math
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+from utils.config import is_mysql
+from utils.db_connection import db_instance, execute_query
+from utils.query_cache import query_cache, tables_read
+from utils.shared_state import ENABLED as MULTI_PROCESS
+
+log = logging.getLogger(__name__)
+
+ENGINE = os.getenv("ANALYTICS_ENGINE", "").lower()
+DUCKDB_PATH = Path(__file__).parent.parent / os.getenv("DUCKDB_PATH", "analytics.duckdb")
+SYNC_INTERVAL = int(os.getenv("COLUMNAR_SYNC_INTERVAL", "60"))
+MAX_AGE = int(os.getenv("COLUMNAR_MAX_AGE", "3600"))
+SYNC_BATCH = int(os.getenv("COLUMNAR_SYNC_BATCH", "50000"))
+
+# Snapshotted tables and the key used to notice appends
+TABLES = {
+    "batting_stats": "id",
+    "bowling_stats": "id",
+    "matches": "match_id",
+    "players": "player_id",
+    "venues": "venue_id",
+}
+
+_STRFTIME = re.compile(r"strftime\(\s*('[^']*')\s*,\s*([^()]+?)\s*\)", re.IGNORECASE)
+_DATE_NOW = re.compile(r"DATE\(\s*'now'\s*(?:,\s*'([+-]?\d+)\s+(day|month|year)s?'\s*)?\)", re.IGNORECASE)
+
+_conn = None
+_conn_lock = threading.Lock()
+_sync_lock = threading.Lock()
+_synced = {}
+# Tables written since their last copy
+_dirty = set()
+_last_sync_started = 0.0
+
+
+def enabled():
+    return ENGINE == "duckdb"
+
+
+def _duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise RuntimeError("ANALYTICS_ENGINE=duckdb needs duckdb (pip install duckdb)")
+    return duckdb
+
+
+def _connection():
+    global _conn
+    with _conn_lock:
+        if _conn is None:
+            _conn = _duckdb().connect(str(DUCKDB_PATH))
+            _conn.execute("CREATE TABLE IF NOT EXISTS _columnar_sync "
+                          "(table_name VARCHAR PRIMARY KEY, signature VARCHAR, synced_at DOUBLE)")
+            for table, signature, synced_at in _conn.execute("SELECT * FROM _columnar_sync").fetchall():
+                _synced[table] = (signature, synced_at)
+        return _conn
+
+
+def cursor():
+    """A DuckDB cursor for the calling thread; cursors share the one database."""
+    return _connection().cursor()
+
+
+def translate(query):
+    """Rewrite SQLite-only date functions into DuckDB SQL."""
+    query = _STRFTIME.sub(lambda m: f"strftime(CAST({m.group(2)} AS DATE), {m.group(1)})", query)
+
+    def _date(match):
+        if match.group(1) is None:
+            return "current_date"
+        amount = int(match.group(1))
+        sign = "-" if amount < 0 else "+"
+        return f"CAST(current_date {sign} INTERVAL {abs(amount)} {match.group(2).upper()} AS DATE)"
+
+    return _DATE_NOW.sub(_date, query)
+
+
+def _source_types(source, table):
+    """``[(column, duckdb_type)]`` from the main database's declared types."""
+    if is_mysql():
+        source.execute(
+            "SELECT column_name, data_type FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = %s ORDER BY ordinal_position", (table,)
+        )
+    else:
+        source.execute(f"SELECT name, type FROM pragma_table_info('{table}')")
+    columns = []
+    for name, declared in source.fetchall():
+        declared = (declared or "").upper()
+        if "INT" in declared:
+            kind = "BIGINT"
+        elif any(t in declared for t in ("DOUBLE", "REAL", "FLOAT", "DECIMAL", "NUMERIC")):
+            kind = "DOUBLE"
+        elif declared == "DATE":
+            kind = "DATE"
+        else:
+            kind = "VARCHAR"
+        columns.append((name, kind))
+    return columns
+
+
+def _on_change(table, keys):
+    if table == "*":
+        _dirty.update(TABLES)
+    elif table in TABLES:
+        _dirty.add(table)
+
+
+query_cache.subscribe(_on_change)
+
+
+def _signature(source, table):
+    source.execute(f"SELECT COUNT(*), MAX({TABLES[table]}) FROM {table}")
+    count, high = source.fetchone()
+    return f"{count}:{high}"
+
+
+def _copy_table(duck, source, table, columns):
+    import pandas as pd
+
+    staging = f"{table}__sync"
+    names = [name for name, _ in columns]
+    duck.execute(f"DROP TABLE IF EXISTS {staging}")
+    duck.execute(f"CREATE TABLE {staging} ({', '.join(f'{n} {k}' for n, k in columns)})")
+    source.execute(f"SELECT {', '.join(names)} FROM {table}")
+    copied = 0
+    while True:
+        rows = source.fetchmany(SYNC_BATCH)
+        if not rows:
+            break
+        batch = pd.DataFrame.from_records(rows, columns=names)
+        duck.register("_sync_batch", batch)
+        duck.execute(f"INSERT INTO {staging} SELECT * FROM _sync_batch")
+        duck.unregister("_sync_batch")
+        copied += len(rows)
+    duck.execute("BEGIN TRANSACTION")
+    try:
+        duck.execute(f"DROP TABLE IF EXISTS {table}")
+        duck.execute(f"ALTER TABLE {staging} RENAME TO {table}")
+        duck.execute("COMMIT")
+    except Exception:
+        duck.execute("ROLLBACK")
+        raise
+    return copied
+
+
+def sync(force=False):
+    """Copy changed or expired tables into DuckDB. Returns ``{table: rows}`` copied."""
+    copied = {}
+    with _sync_lock:
+        duck = cursor()
+        with db_instance.connection(read=True) as conn:
+            if conn is None:
+                return copied
+            source = conn.cursor()
+            try:
+                for table in TABLES:
+                    signature = _signature(source, table)
+                    previous = _synced.get(table)
+                    if (not force and table not in _dirty and previous and previous[0] == signature
+                            and time.time() - previous[1] < MAX_AGE):
+                        continue
+                    # Before copying, so a write during the copy marks it again
+                    _dirty.discard(table)
+                    started = time.perf_counter()
+                    try:
+                        copied[table] = _copy_table(duck, source, table, _source_types(source, table))
+                    except Exception:
+                        _dirty.add(table)
+                        raise
+                    now = time.time()
+                    duck.execute("INSERT OR REPLACE INTO _columnar_sync VALUES (?, ?, ?)", (table, signature, now))
+                    _synced[table] = (signature, now)
+                    log.info("Synced %s rows of %s to DuckDB in %.1fs",
+                             copied[table], table, time.perf_counter() - started)
+            finally:
+                source.close()
+    return copied
+
+
+def _sync_quietly():
+    try:
+        sync()
+    except Exception as e:
+        log.warning("DuckDB sync failed: %s", e)
+
+
+def sync_in_background():
+    """Start a sync unless one started within ``COLUMNAR_SYNC_INTERVAL``."""
+    global _last_sync_started
+    now = time.time()
+    if now - _last_sync_started < SYNC_INTERVAL or _sync_lock.locked():
+        return
+    _last_sync_started = now
+    threading.Thread(target=_sync_quietly, name="columnar-sync", daemon=True).start()
+
+
+def ready():
+    """True once every table has been copied at least once."""
+    _connection()
+    return all(table in _synced for table in TABLES)
+
+
+def handles(tables):
+    """Whether a SELECT reading ``tables`` can run on the snapshot, with none written since."""
+    if MULTI_PROCESS:
+        query_cache.sync_shared()
+    return enabled() and bool(tables) and set(tables) <= set(TABLES) and not _dirty & set(tables)
+
+
+def snapshot_age():
+    """Seconds since the oldest table copy, or None before the first sync."""
+    if not ready():
+        return None
+    return time.time() - min(synced_at for _, synced_at in _synced.values())
+
+
+def export_parquet(directory):
+    """Write each snapshotted table to ``directory/<table>.parquet``."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    duck = cursor()
+    for table in TABLES:
+        duck.execute(f"COPY {table} TO '{directory / (table + '.parquet')}' (FORMAT PARQUET)")
+    return [directory / f"{table}.parquet" for table in TABLES]
+
+
+def _comparable(row):
+    """Floats stay numeric; everything else compares as text (DuckDB returns
+    ``date`` objects where SQLite returns ISO strings)."""
+    return tuple(v if isinstance(v, float) else (None if v is None else str(v)) for v in row)
+
+
+def _sort_key(row):
+    # Floats are rounded only for ordering, so last-digit noise cannot reorder rows
+    return [(0, "") if v is None else (1, f"{v:.6g}" if isinstance(v, float) else v) for v in row]
+
+
+def _same_rows(expected, actual):
+    if len(expected) != len(actual):
+        return False
+    expected = sorted(map(_comparable, expected), key=_sort_key)
+    actual = sorted(map(_comparable, actual), key=_sort_key)
+    for left, right in zip(expected, actual):
+        for a, b in zip(left, right):
+            if isinstance(a, float) or isinstance(b, float):
+                if a is None or b is None or not math.isclose(float(a), float(b), rel_tol=1e-9):
+                    return False
+            elif a != b:
+                return False
+    return True
+
+
+def verify():
+    """Run every predefined query on both engines; returns the names whose results differ."""
+    from modules.sql_queries import SQL_QUERIES
+
+    sync()
+    duck = cursor()
+    different = []
+    for queries in SQL_QUERIES.values():
+        for name, query in queries.items():
+            if not set(tables_read(query)) <= set(TABLES):
+                continue
+            expected = execute_query(query, use_cache=False)
+            duck.execute(translate(query.strip().rstrip(";")))
+            if expected is None or not _same_rows(expected[0], duck.fetchall()):
+                different.append(name)
+    return different
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync the analytics tables into DuckDB")
+    parser.add_argument("command", choices=["sync", "verify"])
+    parser.add_argument("--parquet", help="also export the tables as Parquet into this directory")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "verify":
+        different = verify()
+        for name in different:
+            print(f"Differs on DuckDB: {name}")
+        print(f"{len(different)} predefined queries differ")
+        raise SystemExit(1 if different else 0)
+    counts = sync(force=True)
+    print(f"Synced {sum(counts.values()):,} rows into {DUCKDB_PATH.name}")
+    if args.parquet:
+        for path in export_parquet(args.parquet):
+            print(f"Wrote {path}")
@@ -0,0 +1,35 @@
+"""Process-wide settings. ``.env`` is loaded here exactly once.
+
+Every module imports its settings from here (or reads ``os.getenv`` after
+importing this module), so no page repeats the dotenv work.
+"""
+import os
+from dotenv import load_dotenv
+
+_loaded = False
+
+
+def load_config():
+    global _loaded
+    if not _loaded:
+        load_dotenv()
+        _loaded = True
+
+
+load_config()
+
+RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")
+RAPIDAPI_HOST = os.getenv("RAPIDAPI_HOST")
+
+RAPIDAPI_HEADERS = {
+    "x-rapidapi-key": RAPIDAPI_KEY,
+    "x-rapidapi-host": RAPIDAPI_HOST
+}
+
+
+def db_type():
+    return os.getenv('DB_TYPE', 'sqlite')
+
+
+def is_mysql():
+    return db_type() == 'mysql'
@@ -1,69 +1,528 @@
-import mysql.connector
 import sqlite3
 import os
-from dotenv import load_dotenv
+import itertools
+import queue
+import threading
+import time
+from contextlib import contextmanager
 import streamlit as st
 from pathlib import Path
+from utils.config import is_mysql
+from utils.query_cache import query_cache, tables_read
+from utils.query_stats import estimate_bytes, query_stats
+
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '3600'))
+STREAM_BATCH_SIZE = int(os.getenv('DB_STREAM_BATCH_SIZE', '1000'))
+# MySQL read replicas as "host[:port],host[:port]"; empty means primary only
+REPLICA_HOSTS = [h.strip() for h in os.getenv('DB_REPLICA_HOSTS', '').split(',') if h.strip()]
+SQLITE_READ_POOL = os.getenv('DB_SQLITE_READ_POOL', '1') == '1'
+# After a write, this session reads from the primary for this many seconds
+READ_YOUR_WRITES = float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '5'))
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection frees up within the checkout timeout."""
+
+
+class _PoolStats:
+    """Counters shared by both pool flavours, read by get_pool_stats()."""
+
+    def __init__(self, size):
+        self.lock = threading.Lock()
+        self.size = size
+        self.open = 0
+        self.checked_out = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.recycled = 0
+        self.discarded = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_checkout(self, waited):
+        with self.lock:
+            self.checked_out += 1
+            self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "size": self.size,
+                "open": self.open,
+                "checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "recycled": self.recycled,
+                "discarded": self.discarded,
+                "avg_wait_ms": (self.total_wait / self.checkouts * 1000) if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+
+class ConnectionPool:
+    """Bounded pool of reusable connections with health checks and recycling."""
+
+    def __init__(self, factory, size=POOL_SIZE, timeout=POOL_TIMEOUT, recycle=POOL_RECYCLE):
+        self.factory = factory
+        self.timeout = timeout
+        self.recycle = recycle
+        self.stats = _PoolStats(size)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._born = {}
+
+    def _open(self):
+        conn = self.factory()
+        self._born[id(conn)] = time.monotonic()
+        with self.stats.lock:
+            self.stats.open += 1
+        return conn
+
+    def _discard(self, conn):
+        if self._born.pop(id(conn), None) is None:
+            return
+        with self.stats.lock:
+            self.stats.open -= 1
+            self.stats.discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn):
+        try:
+            if hasattr(conn, "ping"):
+                conn.ping(reconnect=False)
+            else:
+                conn.execute("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    def _is_stale(self, conn):
+        born = self._born.get(id(conn), 0)
+        return self.recycle > 0 and time.monotonic() - born > self.recycle
+
+    def acquire(self):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self.stats.lock:
+                self.stats.timeouts += 1
+            raise PoolTimeoutError(f"No database connection available after {self.timeout}s")
+        try:
+            conn = None
+            while conn is None:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    conn = self._open()
+                    break
+                if self._is_stale(conn):
+                    self._discard(conn)
+                    with self.stats.lock:
+                        self.stats.recycled += 1
+                    conn = None
+                elif not self._is_healthy(conn):
+                    self._discard(conn)
+                    conn = None
+        except Exception:
+            self._slots.release()
+            raise
+        self.stats.record_checkout(time.monotonic() - started)
+        return conn
+
+    def release(self, conn, broken=False):
+        with self.stats.lock:
+            self.stats.checked_out -= 1
+        if broken or self._is_stale(conn):
+            self._discard(conn)
+        else:
+            self._idle.put(conn)
+        self._slots.release()
+
+    def close_all(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+class ThreadLocalPool(ConnectionPool):
+    """SQLite pool that pins one connection to each thread.
+
+    SQLite connections are cheap to keep but unsafe to share mid-transaction,
+    so every Streamlit script thread reuses its own handle while the semaphore
+    still caps how many run queries at once. A thread may check its handle out
+    again while holding it; it is only recycled once the outermost checkout
+    is released.
+    """
+
+    def __init__(self, factory, size=POOL_SIZE, timeout=POOL_TIMEOUT, recycle=POOL_RECYCLE):
+        super().__init__(factory, size, timeout, recycle)
+        self._local = threading.local()
+        self._by_thread = {}
+        self._lock = threading.Lock()
+
+    def _prune_dead_threads(self):
+        alive = {t.ident for t in threading.enumerate()}
+        with self._lock:
+            dead = [ident for ident in self._by_thread if ident not in alive]
+            conns = [self._by_thread.pop(ident) for ident in dead]
+        for conn in conns:
+            self._discard(conn)
+
+    def acquire(self):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self.stats.lock:
+                self.stats.timeouts += 1
+            raise PoolTimeoutError(f"No database connection available after {self.timeout}s")
+        try:
+            conn = getattr(self._local, "conn", None)
+            depth = getattr(self._local, "depth", 0)
+            # Checks only on the outermost checkout; an outer block still uses it
+            if conn is not None and not depth:
+                if self._is_stale(conn):
+                    self._forget(conn)
+                    with self.stats.lock:
+                        self.stats.recycled += 1
+                    conn = None
+                elif not self._is_healthy(conn):
+                    self._forget(conn)
+                    conn = None
+            if conn is None:
+                self._prune_dead_threads()
+                conn = self._open()
+                self._local.conn = conn
+                with self._lock:
+                    self._by_thread[threading.get_ident()] = conn
+            self._local.depth = depth + 1
+        except Exception:
+            self._slots.release()
+            raise
+        self.stats.record_checkout(time.monotonic() - started)
+        return conn
+
+    def _forget(self, conn):
+        self._local.conn = None
+        with self._lock:
+            self._by_thread.pop(threading.get_ident(), None)
+        self._discard(conn)
+
+    def release(self, conn, broken=False):
+        with self.stats.lock:
+            self.stats.checked_out -= 1
+        self._local.depth = depth = max(getattr(self._local, "depth", 1) - 1, 0)
+        if broken or (not depth and self._is_stale(conn)):
+            self._forget(conn)
+        self._slots.release()
+
+    def close_all(self):
+        with self._lock:
+            conns = list(self._by_thread.values())
+            self._by_thread.clear()
+        for conn in conns:
+            self._discard(conn)
 
-load_dotenv()
 
 class DatabaseConnection:
+    """Primary connection pool plus optional read-only pools.
+
+    MySQL reads are spread round-robin over ``DB_REPLICA_HOSTS``; SQLite
+    reads use ``mode=ro`` connections to the same WAL-mode file. When no
+    read pool can serve, reads fall back to the primary.
+    """
+
     def __init__(self):
-        self.connection = None
-    
-    def get_connection(self):
-        """Get database connection with Windows path fix"""
+        self.pool = None
+        self.read_pools = None
+        self._pool_lock = threading.Lock()
+        # id(conn) -> [read pool, checkouts]; a thread-local SQLite handle
+        # can be checked out again before the outer checkout is released
+        self._owners = {}
+        self._owners_lock = threading.Lock()
+        self._next_replica = itertools.count()
+
+    def _sqlite_path(self):
+        # SQLite with Windows path handling
+        base_dir = Path(__file__).parent.parent
+        return base_dir / os.getenv('DB_PATH', 'cricket_stats.db')
+
+    def _connect(self, host=None, read_only=False):
+        """Open a raw database connection with Windows path fix"""
+        if is_mysql():
+            # Imported only when MySQL is the configured backend
+            import mysql.connector
+            host, _, port = (host or os.getenv('DB_HOST', 'localhost')).partition(':')
+            return mysql.connector.connect(
+                host=host,
+                port=int(port or os.getenv('DB_PORT', '3306')),
+                user=os.getenv('DB_USER', 'root'),
+                password=os.getenv('DB_PASSWORD', ''),
+                database=os.getenv('DB_NAME', 'cricket_stats')
+            )
+        db_path = self._sqlite_path()
+        if read_only:
+            return sqlite3.connect(f"{db_path.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        if SQLITE_READ_POOL:
+            # WAL lets the read-only connections run alongside a writer
+            conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get_pool(self):
+        if self.pool is None:
+            with self._pool_lock:
+                if self.pool is None:
+                    if is_mysql():
+                        self.pool = ConnectionPool(self._connect)
+                    else:
+                        self.pool = ThreadLocalPool(self._connect)
+        return self.pool
+
+    def get_read_pools(self):
+        if self.read_pools is None:
+            with self._pool_lock:
+                if self.read_pools is None:
+                    if is_mysql():
+                        self.read_pools = [
+                            ConnectionPool(lambda host=host: self._connect(host))
+                            for host in REPLICA_HOSTS
+                        ]
+                    elif SQLITE_READ_POOL:
+                        self.read_pools = [ThreadLocalPool(lambda: self._connect(read_only=True))]
+                    else:
+                        self.read_pools = []
+        return self.read_pools
+
+    def _acquire_read(self):
+        pools = self.get_read_pools()
+        if not pools:
+            return None
+        start = next(self._next_replica)
+        for offset in range(len(pools)):
+            pool = pools[(start + offset) % len(pools)]
+            try:
+                conn = pool.acquire()
+            except Exception:
+                continue
+            with self._owners_lock:
+                self._owners.setdefault(id(conn), [pool, 0])[1] += 1
+            return conn
+        return None
+
+    def get_connection(self, read=False):
+        """Check a connection out of the pool; pair with release_connection().
+
+        ``read=True`` prefers a read-only pool for SELECTs.
+        """
+        if read:
+            conn = self._acquire_read()
+            if conn is not None:
+                return conn
         try:
-            db_type = os.getenv('DB_TYPE', 'sqlite')
-            
-            if db_type == 'mysql':
-                self.connection = mysql.connector.connect(
-                    host=os.getenv('DB_HOST', 'localhost'),
-                    user=os.getenv('DB_USER', 'root'),
-                    password=os.getenv('DB_PASSWORD', ''),
-                    database=os.getenv('DB_NAME', 'cricket_stats')
-                )
-            else:  # SQLite with Windows path handling
-                base_dir = Path(__file__).parent.parent
-                db_path = base_dir / os.getenv('DB_PATH', 'cricket_stats.db')
-                self.connection = sqlite3.connect(str(db_path), check_same_thread=False)
-                
-            return self.connection
+            return self.get_pool().acquire()
         except Exception as e:
             st.error(f"Database connection error: {str(e)}")
             return None
 
+    def pool_of(self, conn):
+        """The pool ``conn`` is checked out of: a read pool, or the primary."""
+        with self._owners_lock:
+            owner = self._owners.get(id(conn))
+        return owner[0] if owner else self.get_pool()
+
+    def release_connection(self, conn, broken=False):
+        if conn is None:
+            return
+        with self._owners_lock:
+            owner = self._owners.get(id(conn))
+            if owner is not None:
+                owner[1] -= 1
+                if not owner[1]:
+                    del self._owners[id(conn)]
+        (owner[0] if owner else self.get_pool()).release(conn, broken=broken)
+
+    @contextmanager
+    def connection(self, read=False):
+        """Borrow a pooled connection for the duration of a with-block."""
+        conn = self.get_connection(read)
+        broken = False
+        try:
+            yield conn
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release_connection(conn, broken=broken)
+
+    def is_replica(self, conn):
+        """True for MySQL replica connections, which may lag the primary."""
+        return is_mysql() and id(conn) in self._owners
+
     def close_connection(self):
-        if self.connection:
-            self.connection.close()
+        if self.pool:
+            self.pool.close_all()
+        for pool in self.read_pools or []:
+            pool.close_all()
 
 db_instance = DatabaseConnection()
 
-def get_db_connection():
-    return db_instance.get_connection()
+def get_db_connection(read=False):
+    return db_instance.connection(read)
 
-def execute_query(query, params=None, fetch=True):
-    """Universal query executor"""
-    conn = get_db_connection()
-    if conn is None:
+def get_pool_stats():
+    """Pool metrics (open/checked-out connections, wait times) for dashboards."""
+    stats = db_instance.get_pool().stats.snapshot()
+    stats["read_pools"] = [pool.stats.snapshot() for pool in db_instance.get_read_pools()]
+    return stats
+
+def _session_state():
+    """Streamlit session state, or None on threads outside a script run."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
         return None
-    
+    return st.session_state if get_script_run_ctx() is not None else None
+
+_last_write = [0.0]
+
+def mark_write():
+    """Pin this session's reads to the primary for READ_YOUR_WRITES seconds."""
+    _last_write[0] = time.time()
+    state = _session_state()
+    if state is not None and READ_YOUR_WRITES > 0:
+        state["_db_primary_until"] = time.time() + READ_YOUR_WRITES
+
+def cacheable_read(conn):
+    """False for replica reads soon after a write: a lagging replica may miss it."""
+    return not db_instance.is_replica(conn) or time.time() - _last_write[0] > READ_YOUR_WRITES
+
+def reads_from_primary():
+    """True while this session should read its own recent writes."""
+    state = _session_state()
+    return state is not None and state.get("_db_primary_until", 0) > time.time()
+
+def _to_mysql_params(query):
+    """Rewrite qmark placeholders as %s for mysql.connector, escaping literal %."""
+    out, quote = [], None
+    for ch in query:
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in ("'", '"'):
+            quote = ch
+        elif ch == '?':
+            out.append('%s')
+            continue
+        out.append('%%' if ch == '%' else ch)
+    return ''.join(out)
+
+def execute_query(query, params=None, fetch=True, use_cache=True):
+    """Universal query executor
+
+    SELECT results are served from the shared query cache when possible;
+    writes invalidate cached results for the table they touch.
+    """
+    is_select = fetch and query.strip().upper().startswith('SELECT')
+    started = time.perf_counter()
+    sql = query
+    if is_select and use_cache:
+        key = query_cache.make_key(query, params)
+        cached = query_cache.get(key)
+        if cached is not None:
+            query_stats.record(sql, params, time.perf_counter() - started, len(cached[0]), cached=True)
+            return cached
+        tables = tables_read(query)
+        generations = query_cache.generations(tables)
+
+    with get_db_connection(read=is_select and not reads_from_primary()) as conn:
+        if conn is None:
+            return None
+
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            if params:
+                if is_mysql():
+                    query = _to_mysql_params(query)
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+
+            if is_select:
+                result = cursor.fetchall()
+                columns = [desc[0] for desc in cursor.description]
+                query_stats.record(
+                    sql, params, time.perf_counter() - started, len(result), estimate_bytes(result)
+                )
+                if use_cache and cacheable_read(conn):
+                    query_cache.put(key, (result, columns), tables, generations)
+                return result, columns
+            else:
+                conn.commit()
+                query_cache.invalidate_for_write(query)
+                mark_write()
+                query_stats.record(sql, params, time.perf_counter() - started, max(cursor.rowcount, 0))
+                return cursor.rowcount if not fetch else None
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            query_stats.record(sql, params, time.perf_counter() - started, error=str(e))
+            st.error(f"Query error: {str(e)}")
+            return None
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+def iter_query(query, params=None, batch_size=STREAM_BATCH_SIZE):
+    """Stream a SELECT as ``(rows, columns)`` batches via ``fetchmany``.
+
+    The pooled connection is held until the generator is exhausted or
+    closed. On MySQL the cursor is unbuffered, so rows stay on the server
+    until they are read.
+    """
+    started = time.perf_counter()
+    conn = db_instance.get_connection(read=not reads_from_primary())
+    if conn is None:
+        return
+    broken = False
+    cursor = None
+    streamed, size, error = 0, 0, None
+    sql = query
     try:
         cursor = conn.cursor()
         if params:
+            if is_mysql():
+                query = _to_mysql_params(query)
             cursor.execute(query, params)
         else:
             cursor.execute(query)
-        
-        if fetch and query.strip().upper().startswith('SELECT'):
-            result = cursor.fetchall()
-            columns = [desc[0] for desc in cursor.description]
-            return result, columns
-        else:
-            conn.commit()
-            return cursor.rowcount if not fetch else None
+        columns = [desc[0] for desc in cursor.description]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            streamed += len(rows)
+            size += estimate_bytes(rows)
+            yield rows, columns
     except Exception as e:
+        broken = True
+        error = str(e)
         st.error(f"Query error: {str(e)}")
-        return None
     finally:
-        cursor.close()
\ No newline at end of file
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                # Unread server-side rows: the connection cannot be reused
+                broken = True
+        db_instance.release_connection(conn, broken=broken)
+        query_stats.record(sql, params, time.perf_counter() - started, streamed, size, error=error)
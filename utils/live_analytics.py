@@ -0,0 +1,157 @@
+"""Run rates, projected totals and win probability for every live match.
+
+The numeric state of each match's current innings (runs, wickets, balls,
+target) is kept in one row of a set of numpy arrays. On each poll only
+matches whose score changed are written, and their figures are recomputed
+together in one vectorised pass, so a poll with dozens of live matches costs
+a few array operations.
+
+The win-probability model is deliberately simple. The batting side is
+expected to add runs at the format's par rate, scaled down by wickets lost.
+The final margin is treated as logistic with a spread that grows with the
+overs left. Test matches get run rates only: draws do not fit the model.
+"""
+import threading
+
+import numpy as np
+
+from utils.score_events import extract_innings, overs_to_balls
+
+# Balls per innings and a par first-innings total for limited-overs formats
+FORMAT_BALLS = {"T20": 120, "T20I": 120, "ODI": 300}
+PAR_TOTAL = {120: 165.0, 300: 275.0}
+# How strongly wickets lost cut the runs still expected
+WICKET_EXPONENT = 0.75
+# Spread of the final margin, in runs per square root of overs left
+SPREAD = 6.0
+
+INPUTS = ("runs", "wickets", "balls", "max_balls", "target", "par")
+OUTPUTS = ("crr", "rrr", "projected", "win_prob")
+
+
+def match_inputs(payload):
+    """``(innings number, batting team, inputs tuple)`` of the current innings."""
+    innings = extract_innings(payload)
+    if not innings:
+        return None
+    fmt = (payload.get("matchInfo", {}).get("matchFormat") or "").upper()
+    max_balls = FORMAT_BALLS.get(fmt, np.nan)
+    current = max(innings, key=lambda inn: inn["innings"])
+    target = np.nan
+    if max_balls == max_balls and current["innings"] == 2:
+        first = min(innings, key=lambda inn: inn["innings"])
+        target = first["runs"] + 1
+    inputs = (
+        float(current["runs"]), float(current["wickets"]), float(overs_to_balls(current["overs"])),
+        float(max_balls), float(target), PAR_TOTAL.get(max_balls, np.nan),
+    )
+    return current["innings"], current["team"], inputs
+
+
+def _logistic(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def compute(runs, wickets, balls, max_balls, target, par):
+    """Figures for arrays of innings states; NaN where a figure does not apply."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crr = np.where(balls > 0, runs * 6 / balls, np.nan)
+        remaining = np.clip(max_balls - balls, 0, None)
+        wickets_left = np.clip(10 - wickets, 0, 10)
+        resources = (wickets_left / 10) ** WICKET_EXPONENT
+        par_rate = par / max_balls
+        # Early on the current rate says little, so lean on the par rate
+        weight = np.where(balls > 0, np.minimum(balls / 60, 1.0), 0.0)
+        rate = weight * np.nan_to_num(crr / 6) + (1 - weight) * par_rate
+        projected = runs + rate * remaining * resources
+
+        chasing = ~np.isnan(target)
+        need = target - runs
+        rrr = np.where(chasing & (remaining > 0) & (need > 0), need * 6 / remaining, np.nan)
+
+        expected = runs + par_rate * remaining * resources
+        chase_prob = _logistic((expected - target) / (SPREAD * np.sqrt(remaining / 6 + 1)))
+        chase_prob = np.where(need <= 0, 1.0, chase_prob)
+        chase_prob = np.where((need > 0) & ((remaining == 0) | (wickets_left == 0)), 0.0, chase_prob)
+        # Batting first: the whole second innings is still uncertain
+        first_prob = _logistic((projected - par) / (SPREAD * np.sqrt((remaining + max_balls) / 6 + 1)))
+        win_prob = np.where(chasing, chase_prob, first_prob)
+
+    return {
+        "crr": crr,
+        "rrr": rrr,
+        "projected": np.where(chasing, np.nan, projected),
+        "win_prob": win_prob,
+    }
+
+
+class LiveAnalytics:
+    def __init__(self, capacity=64):
+        self._rows = {}
+        self._free = []
+        self._seen = {}
+        self._batting = {}
+        self._inputs = {name: np.full(capacity, np.nan) for name in INPUTS}
+        self._outputs = {name: np.full(capacity, np.nan) for name in OUTPUTS}
+        self._lock = threading.Lock()
+
+    def _row(self, match_id):
+        row = self._rows.get(match_id)
+        if row is not None:
+            return row
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = len(self._rows)
+            capacity = len(self._inputs["runs"])
+            if row >= capacity:
+                for arrays in (self._inputs, self._outputs):
+                    for name, values in arrays.items():
+                        arrays[name] = np.concatenate([values, np.full(capacity, np.nan)])
+        self._rows[match_id] = row
+        return row
+
+    def update(self, matches):
+        """Take one poll's snapshot dicts; recompute only matches whose score moved."""
+        with self._lock:
+            changed = []
+            live = set()
+            for match in matches:
+                match_id = match.get("match_id")
+                state = match_inputs(match.get("payload") or {}) if match_id is not None else None
+                if state is None:
+                    continue
+                live.add(match_id)
+                if self._seen.get(match_id) == state:
+                    continue
+                self._seen[match_id] = state
+                self._batting[match_id] = state[1]
+                row = self._row(match_id)
+                for name, value in zip(INPUTS, state[2]):
+                    self._inputs[name][row] = value
+                changed.append(row)
+            for match_id in [i for i in self._rows if i not in live]:
+                self._free.append(self._rows.pop(match_id))
+                self._seen.pop(match_id, None)
+                self._batting.pop(match_id, None)
+            if changed:
+                rows = np.array(changed)
+                figures = compute(*(self._inputs[name][rows] for name in INPUTS))
+                for name, values in figures.items():
+                    self._outputs[name][rows] = values
+            return len(changed)
+
+    def figures(self, match_id):
+        """``{"batting", "crr", "rrr", "projected", "win_prob"}``; None for figures that do not apply."""
+        with self._lock:
+            row = self._rows.get(match_id)
+            if row is None:
+                return None
+            figures = {"batting": self._batting.get(match_id)}
+            for name in OUTPUTS:
+                value = self._outputs[name][row]
+                figures[name] = None if np.isnan(value) else round(float(value), 2)
+            return figures
+
+
+live_analytics = LiveAnalytics()
@@ -0,0 +1,126 @@
+"""In-process pub/sub of live score changes for the Live Matches page.
+
+The ingestion poller publishes every poll to ``live_hub``. The hub keeps the
+latest display fields of each live match, including the run rates and win
+probability from ``live_analytics``, and a bounded log of per-match
+diffs, each tagged with an increasing version. A viewer remembers the last
+version it rendered and asks for ``changes_since(version)``, which returns
+only the fields that changed. Keeping a page current is then a dict merge
+inside a fragment instead of a full script rerun with a snapshot query and
+scorecard fetches for every viewer.
+
+When the poller runs as a separate service (``LIVE_INGESTION_EMBEDDED=0``),
+the hub feeds itself from ``live_match_snapshots`` instead. It reads the
+table at most once per ``LIVE_HUB_STORE_INTERVAL`` seconds for the whole
+process, however many viewers are connected.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from utils.live_analytics import live_analytics
+from utils.score_events import extract_innings
+
+# Versions kept for catching up; older viewers get a fresh snapshot
+HISTORY = int(os.getenv("LIVE_HUB_HISTORY", "1000"))
+STORE_INTERVAL = float(os.getenv("LIVE_HUB_STORE_INTERVAL", "5"))
+# How often an open Live Matches page checks the hub for changes
+PUSH_INTERVAL = float(os.getenv("LIVE_PUSH_INTERVAL", "5"))
+
+FIELDS = ("series_name", "match_desc", "team1", "team2", "venue", "status", "score")
+
+
+def display_fields(match):
+    """The fields a viewer renders for one snapshot dict."""
+    fields = {key: match.get(key) for key in FIELDS}
+    fields["innings"] = tuple(
+        f"{inn['team']} {inn['runs']}/{inn['wickets']} ({inn['overs']})"
+        for inn in extract_innings(match.get("payload") or {})
+    )
+    return fields
+
+
+class LiveHub:
+    def __init__(self, history=HISTORY):
+        self._matches = {}
+        # (version, match_id, changed fields or None once the match left the feed)
+        self._log = deque(maxlen=history)
+        self._version = 0
+        self._lock = threading.Lock()
+        self._store_checked = 0.0
+        self.updated_at = None
+
+    def publish(self, matches, at=None):
+        """Record what changed since the last poll. Returns the number of changed matches."""
+        changed = 0
+        live_analytics.update(matches)
+        with self._lock:
+            live = set()
+            for match in matches:
+                match_id = match.get("match_id")
+                if match_id is None:
+                    continue
+                live.add(match_id)
+                fields = display_fields(match)
+                fields["analytics"] = live_analytics.figures(match_id)
+                previous = self._matches.get(match_id)
+                if previous is None:
+                    diff = fields
+                else:
+                    diff = {key: value for key, value in fields.items() if previous[key] != value}
+                if diff:
+                    self._matches[match_id] = fields
+                    self._version += 1
+                    self._log.append((self._version, match_id, diff))
+                    changed += 1
+            for match_id in [i for i in self._matches if i not in live]:
+                del self._matches[match_id]
+                self._version += 1
+                self._log.append((self._version, match_id, None))
+                changed += 1
+            self.updated_at = at or time.time()
+        return changed
+
+    def snapshot(self):
+        """``(version, {match_id: fields})`` for a first render."""
+        with self._lock:
+            return self._version, {match_id: dict(fields) for match_id, fields in self._matches.items()}
+
+    def changes_since(self, version):
+        """``(version, {match_id: diff})`` merged over every publish after ``version``.
+
+        A diff of None means the match left the feed. Returns None when
+        ``version`` is older than the kept history; take a ``snapshot`` then.
+        """
+        with self._lock:
+            if version > self._version or (self._log and version < self._log[0][0] - 1):
+                return None
+            merged = {}
+            for logged, match_id, diff in reversed(self._log):
+                if logged <= version:
+                    break
+                if match_id in merged and merged[match_id] is None:
+                    continue
+                if diff is None:
+                    merged.setdefault(match_id, None)
+                else:
+                    # Walking backwards, so newer values win
+                    merged[match_id] = {**diff, **(merged.get(match_id) or {})}
+            return self._version, merged
+
+    def refresh_from_store(self, force=False):
+        """Publish the stored snapshots, at most once per ``STORE_INTERVAL``."""
+        now = time.time()
+        with self._lock:
+            if not force and now - self._store_checked < STORE_INTERVAL:
+                return False
+            self._store_checked = now
+        from utils.live_ingestion import load_snapshots
+
+        matches = load_snapshots()
+        self.publish(matches, max((m["fetched_at"] for m in matches), default=None))
+        return True
+
+
+live_hub = LiveHub()
@@ -0,0 +1,268 @@
+"""Background poller that keeps normalized live-match snapshots in the database.
+
+One worker per server process polls ``CRICBUZZ_LIVE_URL`` on a fixed schedule
+and writes the results to ``live_match_snapshots``. Pages only read that
+table, so API usage no longer grows with the number of viewers. Every poll
+is also published to ``live_hub`` so open pages receive just the changes.
+
+Run ``python -m utils.live_ingestion`` to host the poller as its own service.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+
+from utils import api_client
+from utils.config import is_mysql
+from utils.db_connection import db_instance, execute_query, mark_write
+from utils import score_events
+from utils.live_hub import live_hub
+from utils.query_cache import query_cache
+from utils.shared_state import ENABLED as MULTI_PROCESS, shared_state
+
+log = logging.getLogger(__name__)
+
+LIVE_URL = os.getenv("CRICBUZZ_LIVE_URL")
+
+POLL_INTERVAL = int(os.getenv("LIVE_POLL_INTERVAL", "60"))
+MIN_REFRESH_INTERVAL = int(os.getenv("LIVE_MIN_REFRESH_INTERVAL", "15"))
+# Set to 0 when the poller runs as a separate service
+EMBEDDED_WORKER = os.getenv("LIVE_INGESTION_EMBEDDED", "1") == "1"
+# With MULTI_PROCESS=1 only the worker holding this lease polls
+LEASE_SECONDS = int(os.getenv("LEADER_LEASE_SECONDS", str(POLL_INTERVAL * 3)))
+LEASE_NAME = "live-poller"
+
+CREATE_SNAPSHOT_TABLE = """
+    CREATE TABLE IF NOT EXISTS live_match_snapshots (
+        match_id INTEGER PRIMARY KEY,
+        series_name VARCHAR(255),
+        match_desc VARCHAR(255),
+        team1 VARCHAR(100),
+        team2 VARCHAR(100),
+        venue VARCHAR(255),
+        status VARCHAR(255),
+        score VARCHAR(100),
+        payload TEXT,
+        fetched_at DOUBLE
+    )
+"""
+
+
+def normalize_live_matches(data):
+    """Flatten the Cricbuzz live feed into one dict per match."""
+    matches = []
+    for series in data.get("typeMatches", []):
+        for match in series.get("seriesMatches", []):
+            if "seriesAdWrapper" in match:
+                for m in match["seriesAdWrapper"].get("matches", []):
+                    info = m.get("matchInfo", {})
+                    score = m.get("matchScore", {})
+
+                    matches.append({
+                        "match_id": info.get("matchId"),
+                        "series_name": info.get("seriesName"),
+                        "match_desc": info.get("matchDesc"),
+                        "team1": info.get("team1", {}).get("teamName"),
+                        "team2": info.get("team2", {}).get("teamName"),
+                        "venue": info.get("venueInfo", {}).get("ground"),
+                        "status": info.get("status"),
+                        "score": f"{score.get('team1', {}).get('score', '')}/{score.get('team1', {}).get('wickets', '')} ({score.get('team1', {}).get('overs', '')})",
+                        "payload": m,
+                    })
+    return matches
+
+
+def fetch_live_feed():
+    """Download the live feed through the shared, budgeted API client."""
+    return api_client.get_json(LIVE_URL)
+
+
+def ensure_snapshot_table():
+    execute_query(CREATE_SNAPSHOT_TABLE, fetch=False)
+    score_events.ensure_events_table()
+
+
+def store_snapshots(matches, fetched_at=None):
+    """Replace the stored snapshot set with the latest poll, in one transaction.
+
+    Readers see either the previous poll or this one, never a mix.
+    """
+    fetched_at = fetched_at or time.time()
+    mark = "%s" if is_mysql() else "?"
+    rows = [
+        (
+            m["match_id"], m["series_name"], m["match_desc"], m["team1"], m["team2"],
+            m["venue"], m["status"], m["score"], json.dumps(m.get("payload", {})), fetched_at
+        )
+        for m in matches if m.get("match_id") is not None
+    ]
+    with db_instance.connection() as conn:
+        if conn is None:
+            raise RuntimeError("No database connection")
+        cursor = conn.cursor()
+        try:
+            if rows:
+                cursor.executemany(
+                    "REPLACE INTO live_match_snapshots "
+                    "(match_id, series_name, match_desc, team1, team2, venue, status, score, payload, fetched_at) "
+                    f"VALUES ({', '.join([mark] * 10)})",
+                    rows
+                )
+            # Matches that dropped out of the feed are no longer live
+            cursor.execute(f"DELETE FROM live_match_snapshots WHERE fetched_at < {mark}", (fetched_at,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    query_cache.invalidate_table("live_match_snapshots")
+    mark_write()
+
+
+def load_snapshots():
+    """Read the latest stored live matches (what pages render)."""
+    result = execute_query(
+        "SELECT match_id, series_name, match_desc, team1, team2, venue, status, score, payload, fetched_at "
+        "FROM live_match_snapshots ORDER BY match_id",
+        use_cache=False  # may be written by an ingestion service in another process
+    )
+    if not result:
+        return []
+    rows, columns = result
+    matches = []
+    for row in rows:
+        m = dict(zip(columns, row))
+        m["payload"] = json.loads(m["payload"]) if m["payload"] else {}
+        matches.append(m)
+    return matches
+
+
+class LiveIngestionWorker(threading.Thread):
+    """Daemon thread that polls the live feed every ``interval`` seconds."""
+
+    def __init__(self, interval=POLL_INTERVAL):
+        super().__init__(name="live-ingestion", daemon=True)
+        self.interval = interval
+        self.last_poll = 0.0
+        self.last_error = None
+        self.is_leader = not MULTI_PROCESS
+        self._requested = False
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._first_poll = threading.Event()
+
+    def poll_once(self):
+        try:
+            matches = normalize_live_matches(fetch_live_feed())
+            store_snapshots(matches)
+            score_events.record_deltas(matches)
+            live_hub.publish(matches)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            log.warning("Live ingestion poll failed: %s", e)
+        finally:
+            self.last_poll = time.time()
+            self._first_poll.set()
+
+    def wait_ready(self, timeout=10):
+        """Block a fresh process until the first poll has landed."""
+        return self._first_poll.wait(timeout)
+
+    def trigger(self):
+        """Ask for an early poll; ignored if the last one is very recent."""
+        if time.time() - self.last_poll >= MIN_REFRESH_INTERVAL:
+            self._requested = True
+            self._wake.set()
+            return True
+        return False
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+
+    def shutdown(self, timeout=5):
+        """Stop polling and hand back the poller lease so another worker takes over now.
+
+        The thread is a daemon, so at interpreter exit it is killed without
+        running ``run``'s ``finally``; ``atexit`` calls this instead.
+        """
+        self.stop()
+        self.join(timeout)
+        if MULTI_PROCESS and self.is_leader:
+            try:
+                shared_state.release_lease(LEASE_NAME)
+            except Exception as e:
+                log.warning("Releasing the poller lease failed: %s", e)
+
+    def _lead(self):
+        """Take or renew the poller lease; followers only read stored snapshots."""
+        if not MULTI_PROCESS:
+            return True
+        try:
+            self.is_leader = shared_state.acquire_lease(LEASE_NAME, LEASE_SECONDS)
+        except Exception as e:
+            log.warning("Poller lease check failed: %s", e)
+            self.is_leader = False
+        return self.is_leader
+
+    def run(self):
+        # A leader wakes often enough to renew its lease but polls on schedule
+        tick = min(self.interval, LEASE_SECONDS / 3) if MULTI_PROCESS else self.interval
+        try:
+            while not self._stopping.is_set():
+                if self._lead():
+                    if self._requested or time.time() - self.last_poll >= self.interval:
+                        self._requested = False
+                        self.poll_once()
+                else:
+                    self._first_poll.set()
+                self._wake.wait(tick)
+                self._wake.clear()
+        finally:
+            if MULTI_PROCESS and self.is_leader:
+                shared_state.release_lease(LEASE_NAME)
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def refresh_hub():
+    """Make sure ``live_hub`` is current for this process.
+
+    The embedded worker publishes every poll itself; otherwise (external
+    service, or another process holds the poller lease) the hub re-reads
+    the snapshot table on its own throttle.
+    """
+    follower = _worker is not None and not _worker.is_leader
+    if not EMBEDDED_WORKER or follower or live_hub.updated_at is None:
+        live_hub.refresh_from_store()
+
+
+def get_ingestion_worker():
+    """Start (once per process) and return the shared ingestion worker.
+
+    Returns None when an external ingestion service owns polling.
+    """
+    global _worker
+    if not EMBEDDED_WORKER:
+        return None
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            ensure_snapshot_table()
+            _worker = LiveIngestionWorker()
+            _worker.start()
+            atexit.register(_worker.shutdown)
+    return _worker
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    worker = LiveIngestionWorker()
+    ensure_snapshot_table()
+    log.info("Polling %s every %ss", LIVE_URL, worker.interval)
+    worker.run()
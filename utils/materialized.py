@@ -0,0 +1,453 @@
+"""Precomputed aggregates behind the heaviest predefined analytics queries.
+
+Summary tables hold decomposable totals (sums, counts, sums of squares) per
+player/format/year, per player/format, and per team pair/date, so the
+GROUP BY work no longer scans every innings row on each request.
+
+``schema.migrate()`` creates and fills the summaries once. Triggers on the
+source tables record affected keys in ``agg_dirty``. ``refresh()`` recomputes
+only those keys, or rebuilds everything when the backlog is large (e.g.
+after a bulk load). Writes to a source table start a background refresh
+through the query cache's invalidations. Served queries never wait for it:
+they read the current summaries and, if changes are still pending (e.g.
+writes from another process), start a background refresh, so results can
+trail committed writes by one refresh.
+"""
+import logging
+import os
+import threading
+
+from utils.config import is_mysql
+from utils.db_connection import db_instance, execute_query
+from utils.query_cache import query_cache
+
+log = logging.getLogger(__name__)
+
+# Above this many dirty players a full rebuild is cheaper than per-key work
+FULL_REBUILD_THRESHOLD = int(os.getenv("AGG_FULL_REBUILD_THRESHOLD", "5000"))
+
+AGG_TABLES = ["agg_batting_year", "agg_batting_format", "agg_team_pairs"]
+SOURCE_TABLES = ["players", "matches", "batting_stats"]
+
+_refresh_lock = threading.Lock()
+_ready = False
+_drain_lock = threading.Lock()
+_draining = False
+_drain_again = False
+
+
+def _year_expr(column):
+    return f"DATE_FORMAT({column}, '%Y')" if is_mysql() else f"strftime('%Y', {column})"
+
+
+def _ddl():
+    autoinc = "INT AUTO_INCREMENT PRIMARY KEY" if is_mysql() else "INTEGER PRIMARY KEY AUTOINCREMENT"
+    return [
+        """CREATE TABLE agg_batting_year (
+            player_id INTEGER NOT NULL,
+            player_name VARCHAR(255),
+            format VARCHAR(20),
+            year VARCHAR(4),
+            n_rows INTEGER,
+            n_runs INTEGER,
+            sum_runs DOUBLE,
+            n_sr INTEGER,
+            sum_sr DOUBLE,
+            n_rows_q INTEGER,
+            n_runs_q INTEGER,
+            sum_runs_q DOUBLE,
+            sum_runs_sq_q DOUBLE
+        )""",
+        "CREATE INDEX idx_agg_batting_year_player ON agg_batting_year (player_id)",
+        "CREATE INDEX idx_agg_batting_year_year ON agg_batting_year (year, player_name)",
+        """CREATE TABLE agg_batting_format (
+            player_id INTEGER NOT NULL,
+            player_name VARCHAR(255),
+            format VARCHAR(20),
+            sum_total_runs BIGINT,
+            n_avg INTEGER,
+            sum_avg DOUBLE
+        )""",
+        "CREATE INDEX idx_agg_batting_format_player ON agg_batting_format (player_id)",
+        """CREATE TABLE agg_team_pairs (
+            team1 VARCHAR(100) NOT NULL,
+            team2 VARCHAR(100) NOT NULL,
+            match_date DATE,
+            matches_played INTEGER,
+            team1_wins INTEGER,
+            team2_wins INTEGER
+        )""",
+        "CREATE INDEX idx_agg_team_pairs_pair ON agg_team_pairs (team1, team2)",
+        "CREATE INDEX idx_agg_team_pairs_date ON agg_team_pairs (match_date)",
+        # Created last: its presence marks a completed build
+        f"""CREATE TABLE agg_dirty (
+            id {autoinc},
+            kind VARCHAR(16) NOT NULL,
+            key1 VARCHAR(255),
+            key2 VARCHAR(255)
+        )""",
+    ]
+
+
+# (name, timing, table, rows to enqueue as (kind, key1, key2) SQL expressions)
+_TRIGGERS = [
+    ("trg_agg_batting_ins", "INSERT", "batting_stats", [("'player'", "NEW.player_id", "NULL")]),
+    ("trg_agg_batting_upd", "UPDATE", "batting_stats",
+     [("'player'", "OLD.player_id", "NULL"), ("'player'", "NEW.player_id", "NULL")]),
+    ("trg_agg_batting_del", "DELETE", "batting_stats", [("'player'", "OLD.player_id", "NULL")]),
+    ("trg_agg_players_ins", "INSERT", "players", [("'player'", "NEW.player_id", "NULL")]),
+    ("trg_agg_players_upd", "UPDATE", "players", [("'player'", "NEW.player_id", "NULL")]),
+    ("trg_agg_players_del", "DELETE", "players", [("'player'", "OLD.player_id", "NULL")]),
+    ("trg_agg_matches_ins", "INSERT", "matches",
+     [("'match'", "NEW.match_id", "NULL"),
+      ("'pair'", "COALESCE(NEW.team1, '')", "COALESCE(NEW.team2, '')")]),
+    ("trg_agg_matches_upd", "UPDATE", "matches",
+     [("'match'", "NEW.match_id", "NULL"),
+      ("'pair'", "COALESCE(OLD.team1, '')", "COALESCE(OLD.team2, '')"),
+      ("'pair'", "COALESCE(NEW.team1, '')", "COALESCE(NEW.team2, '')")]),
+    ("trg_agg_matches_del", "DELETE", "matches",
+     [("'match'", "OLD.match_id", "NULL"),
+      ("'pair'", "COALESCE(OLD.team1, '')", "COALESCE(OLD.team2, '')")]),
+]
+
+
+def _trigger_ddl():
+    statements = []
+    for name, timing, table, rows in _TRIGGERS:
+        values = ", ".join(f"({kind}, {k1}, {k2})" for kind, k1, k2 in rows)
+        insert = f"INSERT INTO agg_dirty (kind, key1, key2) VALUES {values}"
+        if is_mysql():
+            statements.append(
+                f"CREATE TRIGGER {name} AFTER {timing} ON {table} FOR EACH ROW {insert}"
+            )
+        else:
+            statements.append(
+                f"CREATE TRIGGER {name} AFTER {timing} ON {table} BEGIN {insert}; END"
+            )
+    return statements
+
+
+def _batting_year_insert(where):
+    year = _year_expr("m.match_date")
+    return f"""
+        INSERT INTO agg_batting_year
+            (player_id, player_name, format, year, n_rows, n_runs, sum_runs, n_sr, sum_sr,
+             n_rows_q, n_runs_q, sum_runs_q, sum_runs_sq_q)
+        SELECT p.player_id, p.player_name, b.format, {year},
+               COUNT(b.match_id), COUNT(b.runs), SUM(b.runs),
+               COUNT(b.strike_rate), SUM(b.strike_rate),
+               COUNT(CASE WHEN b.balls >= 10 THEN 1 END),
+               COUNT(CASE WHEN b.balls >= 10 THEN b.runs END),
+               SUM(CASE WHEN b.balls >= 10 THEN b.runs END),
+               SUM(CASE WHEN b.balls >= 10 THEN b.runs * b.runs END)
+        FROM batting_stats b
+        JOIN players p ON b.player_id = p.player_id
+        JOIN matches m ON b.match_id = m.match_id
+        {where}
+        GROUP BY p.player_id, p.player_name, b.format, {year}
+    """
+
+
+def _batting_format_insert(where):
+    return f"""
+        INSERT INTO agg_batting_format
+            (player_id, player_name, format, sum_total_runs, n_avg, sum_avg)
+        SELECT p.player_id, p.player_name, b.format,
+               SUM(b.total_runs), COUNT(b.batting_avg), SUM(b.batting_avg)
+        FROM players p
+        JOIN batting_stats b ON p.player_id = b.player_id
+        {where}
+        GROUP BY p.player_id, p.player_name, b.format
+    """
+
+
+def _team_pairs_insert(where):
+    return f"""
+        INSERT INTO agg_team_pairs
+            (team1, team2, match_date, matches_played, team1_wins, team2_wins)
+        SELECT COALESCE(team1, ''), COALESCE(team2, ''), match_date, COUNT(*),
+               SUM(CASE WHEN winner=team1 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN winner=team2 THEN 1 ELSE 0 END)
+        FROM matches
+        {where}
+        GROUP BY COALESCE(team1, ''), COALESCE(team2, ''), match_date
+    """
+
+
+def _table_names(cursor):
+    if is_mysql():
+        cursor.execute("SHOW TABLES")
+    else:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    return {row[0].lower() for row in cursor.fetchall()}
+
+
+def _placeholders(n):
+    mark = "%s" if is_mysql() else "?"
+    return ", ".join([mark] * n)
+
+
+def _rebuild_all(cursor):
+    for table in AGG_TABLES:
+        cursor.execute(f"DELETE FROM {table}")
+    cursor.execute(_batting_year_insert(""))
+    cursor.execute(_batting_format_insert(""))
+    cursor.execute(_team_pairs_insert(""))
+
+
+def _refresh_players(cursor, player_ids):
+    ids = list(player_ids)
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        marks = _placeholders(len(chunk))
+        cursor.execute(f"DELETE FROM agg_batting_year WHERE player_id IN ({marks})", chunk)
+        cursor.execute(f"DELETE FROM agg_batting_format WHERE player_id IN ({marks})", chunk)
+        cursor.execute(_batting_year_insert(f"WHERE b.player_id IN ({marks})"), chunk)
+        cursor.execute(_batting_format_insert(f"WHERE b.player_id IN ({marks})"), chunk)
+
+
+def _refresh_pairs(cursor, pairs):
+    mark = _placeholders(1)
+    for team1, team2 in pairs:
+        cursor.execute(f"DELETE FROM agg_team_pairs WHERE team1 = {mark} AND team2 = {mark}", (team1, team2))
+        cursor.execute(
+            _team_pairs_insert(f"WHERE COALESCE(team1, '') = {mark} AND COALESCE(team2, '') = {mark}"),
+            (team1, team2)
+        )
+
+
+def build(force=False):
+    """Create summary tables and triggers and populate them.
+
+    Existing summaries are kept (and caught up by ``refresh()``) unless
+    ``force`` asks for a full rebuild.
+    """
+    global _ready
+    with _refresh_lock, db_instance.connection() as conn:
+        if conn is None:
+            return False
+        cursor = conn.cursor()
+        try:
+            names = _table_names(cursor)
+            if not all(t in names for t in SOURCE_TABLES):
+                return False
+            created = "agg_dirty" not in names
+            if created:
+                for statement in _ddl() + _trigger_ddl():
+                    cursor.execute(statement)
+            if created or force:
+                _rebuild_all(cursor)
+                cursor.execute("DELETE FROM agg_dirty")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    for table in AGG_TABLES:
+        query_cache.invalidate_table(table)
+    _ready = True
+    return True
+
+
+def is_built():
+    with db_instance.connection() as conn:
+        if conn is None:
+            return False
+        cursor = conn.cursor()
+        try:
+            return "agg_dirty" in _table_names(cursor)
+        finally:
+            cursor.close()
+
+
+def rebuild_if_built():
+    """Rebuild existing summaries from scratch, e.g. after a bulk load.
+
+    One full rebuild is cheaper than replaying a per-row dirty log.
+    """
+    return build(force=True) if is_built() else False
+
+
+def refresh():
+    """Apply pending source changes recorded in ``agg_dirty``.
+
+    Returns the number of dirty entries processed.
+    """
+    with _refresh_lock, db_instance.connection() as conn:
+        if conn is None:
+            return 0
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT MAX(id) FROM agg_dirty")
+            high_water = cursor.fetchone()[0]
+            if high_water is None:
+                return 0
+            mark = _placeholders(1)
+            cursor.execute(f"SELECT DISTINCT kind, key1, key2 FROM agg_dirty WHERE id <= {mark}", (high_water,))
+            entries = cursor.fetchall()
+
+            players, matches, pairs = set(), set(), set()
+            for kind, key1, key2 in entries:
+                if kind == 'player':
+                    players.add(int(key1))
+                elif kind == 'match':
+                    matches.add(int(key1))
+                elif kind == 'pair':
+                    pairs.add((key1, key2))
+            # A match's date change moves every innings in it to another year
+            match_list = list(matches)
+            for start in range(0, len(match_list), 500):
+                chunk = match_list[start:start + 500]
+                cursor.execute(
+                    f"SELECT DISTINCT player_id FROM batting_stats WHERE match_id IN ({_placeholders(len(chunk))})",
+                    chunk
+                )
+                players.update(row[0] for row in cursor.fetchall())
+
+            if len(players) > FULL_REBUILD_THRESHOLD:
+                _rebuild_all(cursor)
+            else:
+                _refresh_players(cursor, players)
+                _refresh_pairs(cursor, pairs)
+            cursor.execute(f"DELETE FROM agg_dirty WHERE id <= {mark}", (high_water,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    for table in AGG_TABLES:
+        query_cache.invalidate_table(table)
+    return len(entries)
+
+
+def _has_pending():
+    with db_instance.connection() as conn:
+        if conn is None:
+            return False
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1 FROM agg_dirty LIMIT 1")
+            return cursor.fetchone() is not None
+        finally:
+            cursor.close()
+
+
+def ensure_ready():
+    """True once ``build()`` has created the summaries.
+
+    Pending changes are handed to ``refresh_in_background()`` rather than
+    applied here, so callers read the summaries as they stand.
+    """
+    global _ready
+    if not _ready:
+        _ready = is_built()
+        if not _ready:
+            return False
+    if _has_pending():
+        refresh_in_background()
+    return True
+
+
+def _drain():
+    global _draining, _drain_again
+    while True:
+        try:
+            refresh()
+        except Exception:
+            log.exception("Background refresh of materialized aggregates failed")
+        with _drain_lock:
+            if not _drain_again:
+                _draining = False
+                return
+            _drain_again = False
+
+
+def refresh_in_background():
+    """Drain ``agg_dirty`` on a worker thread; requests made meanwhile run once more after it."""
+    global _draining, _drain_again
+    with _drain_lock:
+        if _draining:
+            _drain_again = True
+            return
+        _draining = True
+    threading.Thread(target=_drain, name="agg-refresh", daemon=True).start()
+
+
+def _on_change(table, keys):
+    if _ready and (table == "*" or table in SOURCE_TABLES):
+        refresh_in_background()
+
+
+query_cache.subscribe(_on_change)
+
+
+# Predefined-query names (as in SQL_QUERIES) answered from the summary tables
+MATERIALIZED_QUERIES = {
+    "Question 11: Player Format Comparison": """
+        SELECT player_name,
+               CAST(SUM(CASE WHEN format = 'Test' THEN sum_total_runs ELSE 0 END) AS INTEGER) AS TestRuns,
+               CAST(SUM(CASE WHEN format = 'ODI' THEN sum_total_runs ELSE 0 END) AS INTEGER) AS ODIRuns,
+               CAST(SUM(CASE WHEN format = 'T20I' THEN sum_total_runs ELSE 0 END) AS INTEGER) AS T20Runs,
+               SUM(sum_avg) * 1.0 / NULLIF(SUM(n_avg), 0) AS overall_batting_avg
+        FROM agg_batting_format
+        GROUP BY player_name
+        HAVING COUNT(DISTINCT format) >= 2;
+    """,
+    "Question 16: Yearly Batting Performance": """
+        SELECT player_name, year,
+               SUM(sum_runs) * 1.0 / NULLIF(SUM(n_runs), 0) AS avg_runs,
+               SUM(sum_sr) * 1.0 / NULLIF(SUM(n_sr), 0) AS avg_sr
+        FROM agg_batting_year
+        WHERE year >= '2020'
+        GROUP BY player_name, year
+        HAVING SUM(n_rows) >= 5;
+    """,
+    "Question 19: Consistent Batsmen": """
+        SELECT player_name,
+               SUM(sum_runs_q) * 1.0 / NULLIF(SUM(n_runs_q), 0) AS avg_runs,
+               (SUM(sum_runs_sq_q) * 1.0 / NULLIF(SUM(n_runs_q), 0)
+                - (SUM(sum_runs_q) * 1.0 / NULLIF(SUM(n_runs_q), 0))
+                * (SUM(sum_runs_q) * 1.0 / NULLIF(SUM(n_runs_q), 0))) AS run_variability
+        FROM agg_batting_year
+        WHERE year >= '2022' AND n_rows_q > 0
+        GROUP BY player_name;
+    """,
+    "Question 22: Head-to-Head Analysis": """
+        SELECT NULLIF(team1, '') AS team1, NULLIF(team2, '') AS team2,
+               SUM(matches_played) AS matches_played,
+               SUM(team1_wins) AS team1_wins,
+               SUM(team2_wins) AS team2_wins
+        FROM agg_team_pairs
+        WHERE match_date >= DATE('now','-3 year')
+        GROUP BY NULLIF(team1, ''), NULLIF(team2, '')
+        HAVING SUM(matches_played) >= 5;
+    """,
+    "Question 25: Player Career Trajectory": """
+        SELECT player_name, year,
+               SUM(sum_runs) * 1.0 / NULLIF(SUM(n_runs), 0) AS avg_runs,
+               SUM(sum_sr) * 1.0 / NULLIF(SUM(n_sr), 0) AS avg_sr
+        FROM agg_batting_year
+        GROUP BY player_name, year
+        HAVING SUM(n_rows) >= 3;
+    """,
+}
+
+
+def run_materialized(query_name, use_cache=True):
+    """Serve a predefined query from the summary tables.
+
+    Returns ``execute_query``'s ``(rows, columns)`` or None when the query is
+    not materialized or the summaries cannot be built.
+    """
+    query = MATERIALIZED_QUERIES.get(query_name)
+    if query is None:
+        return None
+    try:
+        if not ensure_ready():
+            return None
+    except Exception:
+        log.exception("Materialized aggregates unavailable for %s; running the base query", query_name)
+        return None
+    return execute_query(query, use_cache=use_cache)
@@ -0,0 +1,181 @@
+"""Columnar parsing of Cricbuzz payloads into typed DataFrames.
+
+Cricbuzz returns tables either as ``headers`` + ``rows[].values`` (player
+recent form) or as dicts of per-player records (``batsmenData`` /
+``bowlersData`` in scorecards). These helpers transpose them straight into
+one list per column and convert numeric columns once, so runs, balls and
+strike rates arrive as numbers instead of strings.
+
+Parsed frames are memoised by a digest of the source payload, so a
+Streamlit rerun that renders the same scorecard again skips the parse.
+Returned frames are shared between reruns: treat them as read-only.
+"""
+import hashlib
+import marshal
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+CACHE_ENTRIES = int(os.getenv("PARSE_CACHE_ENTRIES", "512"))
+
+# Placeholder strings the API uses for "no value"
+MISSING = {"", "-", "--"}
+
+BATTING_COLUMNS = [
+    ("Batsman", "batName", "str"),
+    ("Runs", "runs", "int"),
+    ("Balls", "balls", "int"),
+    ("4s", "fours", "int"),
+    ("6s", "sixes", "int"),
+    ("SR", "strikeRate", "float"),
+]
+
+BOWLING_COLUMNS = [
+    ("Bowler", "bowlName", "str"),
+    ("Overs", "overs", "float"),
+    ("Runs", "runs", "int"),
+    ("Wickets", "wickets", "int"),
+    ("Economy", "economy", "float"),
+]
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def _memoized(kind, source, build):
+    """Return ``build(source)``, cached by a digest of the payload's content."""
+    try:
+        # marshal serialises plain JSON data several times faster than json.dumps
+        key = (kind, hashlib.blake2b(marshal.dumps(source), digest_size=16).digest())
+    except ValueError:
+        return build(source)
+    with _memo_lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return _memo[key]
+    value = build(source)
+    with _memo_lock:
+        _memo[key] = value
+        while len(_memo) > CACHE_ENTRIES:
+            _memo.popitem(last=False)
+    return value
+
+
+def _missing(value):
+    return value is None or (isinstance(value, str) and value.strip() in MISSING)
+
+
+def _float(value):
+    if _missing(value):
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _numbers(values):
+    """float64 array of ``values``; None if some present value is not numeric."""
+    try:
+        # numpy parses numeric strings itself, in C
+        return np.array(values, dtype="float64")
+    except (TypeError, ValueError):
+        converted = []
+        for value in values:
+            number = _float(value)
+            if number is None:
+                return None
+            converted.append(number)
+        return np.array(converted, dtype="float64")
+
+
+def _as_int(numbers):
+    """int64 when no value is missing; otherwise keep float64 with NaN."""
+    if np.isnan(numbers).any() or not (numbers % 1 == 0).all():
+        return numbers
+    return numbers.astype("int64")
+
+
+def _typed(values, kind):
+    """Convert one column to ``int``, ``float`` or ``str``."""
+    if kind != "str":
+        numbers = _numbers(values)
+        if numbers is None:
+            # Stray text in a numeric column becomes NaN
+            numbers = pd.to_numeric(pd.Series(values, dtype="object"), errors="coerce").to_numpy("float64")
+        return _as_int(numbers) if kind == "int" else numbers
+    return np.array(values, dtype="object")
+
+
+def _inferred(values):
+    """Numeric column if every present value parses as a number, else text."""
+    numbers = _numbers(values)
+    if numbers is None or np.isnan(numbers).all():
+        return np.array(values, dtype="object")
+    return _as_int(numbers)
+
+
+def records_frame(records, columns):
+    """Build a frame from record dicts using ``[(label, key, kind)]`` columns."""
+    records = list(records)
+    return pd.DataFrame({
+        label: _typed([r.get(key) for r in records], kind)
+        for label, key, kind in columns
+    })
+
+
+def _header_rows(section):
+    headers = section.get("headers", [])
+    rows = section.get("rows", [])
+    if not headers or not rows:
+        return pd.DataFrame()
+    width = len(headers)
+    values = [row.get("values", []) for row in rows]
+    padded = [v if len(v) == width else (v + [None] * width)[:width] for v in values]
+    return pd.DataFrame({
+        header: _inferred(list(column))
+        for header, column in zip(headers, zip(*padded))
+    })
+
+
+def header_rows_frame(section):
+    """Frame from a ``{"headers": [...], "rows": [{"values": [...]}]}`` section."""
+    return _memoized("header_rows", section or {}, _header_rows)
+
+
+def _rankings(rankings):
+    categories, metrics, values = [], [], []
+    for category, stats in rankings.items():
+        for metric, value in stats.items():
+            categories.append(category.upper())
+            metrics.append(metric)
+            values.append(value)
+    return pd.DataFrame({"Category": categories, "Metric": metrics, "Value": _inferred(values)})
+
+
+def rankings_frame(rankings):
+    """Long Category / Metric / Value frame from a profile's ``rankings`` dict."""
+    if not rankings:
+        return pd.DataFrame()
+    return _memoized("rankings", rankings, _rankings)
+
+
+def _scorecard(scorecard):
+    innings_frames = []
+    for innings in scorecard.get("scoreCard", []):
+        batters = innings.get("batTeamDetails", {}).get("batsmenData", {}).values()
+        bowlers = innings.get("bowlTeamDetails", {}).get("bowlersData", {}).values()
+        innings_frames.append({
+            "team": innings.get("batTeam", {}).get("teamName", "Unknown"),
+            "batting": records_frame(batters, BATTING_COLUMNS) if batters else None,
+            "bowling": records_frame(bowlers, BOWLING_COLUMNS) if bowlers else None,
+        })
+    return innings_frames
+
+
+def scorecard_frames(scorecard):
+    """Per innings ``{"team", "batting", "bowling"}``; frames are None when absent."""
+    return _memoized("scorecard", scorecard or {}, _scorecard)
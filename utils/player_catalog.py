@@ -0,0 +1,238 @@
+"""Local player catalog: indexed name search and background profile refresh.
+
+Players are upserted in batches from Cricbuzz squad lists, player search and
+fetched profiles into ``player_catalog``. Every lower-cased word of a name is
+kept in ``player_catalog_terms``, so a prefix search ("koh", "virat k") is an
+index range scan on both SQLite and MySQL. Stored profiles older than
+``CATALOG_PROFILE_MAX_AGE`` are re-fetched in parallel by a background thread,
+oldest first, ``CATALOG_REFRESH_BATCH`` at a time.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import api_client
+from utils.bulk_import import upsert_sql
+from utils.config import is_mysql
+from utils.db_connection import db_instance, execute_query
+from utils.query_cache import query_cache
+
+log = logging.getLogger(__name__)
+
+PLAYER_PROFILE_URL = "https://cricbuzz-cricket.p.rapidapi.com/stats/v1/player"
+PLAYER_SEARCH_URL = os.getenv("CRICBUZZ_PLAYER_SEARCH_URL")
+TEAM_PLAYERS_URL = os.getenv("CRICBUZZ_TEAM_PLAYERS_URL", "https://cricbuzz-cricket.p.rapidapi.com/teams/v1")
+
+PROFILE_MAX_AGE = int(os.getenv("CATALOG_PROFILE_MAX_AGE", "86400"))
+REFRESH_BATCH = int(os.getenv("CATALOG_REFRESH_BATCH", "50"))
+MAX_WORKERS = int(os.getenv("CATALOG_MAX_WORKERS", "4"))
+# Minimum seconds between background syncs started from page renders
+SYNC_INTERVAL = int(os.getenv("CATALOG_SYNC_INTERVAL", "300"))
+
+OPTIONAL_COLUMNS = ["team", "role", "profile", "fetched_at"]
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="catalog")
+_sync_lock = threading.Lock()
+_last_sync = 0.0
+_loaded_teams = set()
+
+
+def name_terms(name):
+    """Lower-cased words of a name, in order and without repeats."""
+    return list(dict.fromkeys(re.findall(r"\w+", (name or "").lower())))
+
+
+def upsert_players(players):
+    """Insert or update catalog rows in one transaction. Returns the row count.
+
+    Each player is a dict with ``player_id`` and ``name`` and optionally
+    ``team``, ``role``, ``profile`` (JSON text) and ``fetched_at``. An
+    optional column a player does not carry keeps its stored value.
+    """
+    players = [p for p in players if p.get("player_id") and p.get("name")]
+    if not players:
+        return 0
+    columns = ["player_id", "name"] + [c for c in OPTIONAL_COLUMNS if any(p.get(c) is not None for p in players)]
+    mark = "%s" if is_mysql() else "?"
+    with db_instance.connection() as conn:
+        if conn is None:
+            raise RuntimeError("No database connection")
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(
+                upsert_sql("player_catalog", columns, ["player_id"], keep_existing=OPTIONAL_COLUMNS),
+                [tuple(p.get(c) for c in columns) for p in players]
+            )
+            # Names can change between sources; rebuild their search terms
+            cursor.executemany(
+                f"DELETE FROM player_catalog_terms WHERE player_id = {mark}",
+                [(p["player_id"],) for p in players]
+            )
+            cursor.executemany(
+                upsert_sql("player_catalog_terms", ["term", "player_id"], ["term", "player_id"]),
+                [(term[:100], p["player_id"]) for p in players for term in name_terms(p["name"])]
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    query_cache.invalidate_table("player_catalog")
+    query_cache.invalidate_table("player_catalog_terms")
+    return len(players)
+
+
+def seed(players):
+    """Load ``{name: player_id}`` into an empty catalog so search works offline."""
+    result = execute_query("SELECT COUNT(*) FROM player_catalog")
+    if result and result[0][0][0] == 0:
+        upsert_players([{"player_id": pid, "name": name} for name, pid in players.items()])
+
+
+def search(text, limit=20):
+    """Catalog players whose name words start with every word of ``text``.
+
+    Each word is an index range scan over ``player_catalog_terms``, so the
+    LIMIT applies to players that already match all of them.
+    """
+    words = name_terms(text)
+    if not words:
+        return []
+    params = []
+    for word in words:
+        params += [word, word[:-1] + chr(ord(word[-1]) + 1)]
+    matches_word = "c.player_id IN (SELECT player_id FROM player_catalog_terms WHERE term >= ? AND term < ?)"
+    result = execute_query(
+        "SELECT c.player_id, c.name, c.team, c.role FROM player_catalog c "
+        f"WHERE {' AND '.join([matches_word] * len(words))} ORDER BY c.name LIMIT ?",
+        params + [limit]
+    )
+    if not result:
+        return []
+    rows, columns = result
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def search_remote(text):
+    """Look ``text`` up with the Cricbuzz player search and add the hits."""
+    data = api_client.get_json(PLAYER_SEARCH_URL, {"plrN": text})
+    players = [
+        {"player_id": int(p["id"]), "name": p.get("name"), "team": p.get("teamName")}
+        for p in data.get("player", []) if p.get("id")
+    ]
+    upsert_players(players)
+    return players
+
+
+def profile_entry(player_id, profile):
+    teams = (profile.get("teams") or "").split(",")
+    return {
+        "player_id": player_id,
+        "name": profile.get("name"),
+        "team": profile.get("intlTeam") or teams[0].strip() or None,
+        "role": profile.get("role") or None,
+        "profile": json.dumps(profile),
+        "fetched_at": time.time(),
+    }
+
+
+def get_profile(player_id):
+    """Stored profile for a player, or None if it was never fetched."""
+    result = execute_query("SELECT profile FROM player_catalog WHERE player_id = ?", (player_id,))
+    if result and result[0] and result[0][0][0]:
+        return json.loads(result[0][0][0])
+    return None
+
+
+def fetch_profiles(player_ids):
+    """Fetch profiles in parallel and store them in one batch.
+
+    Returns ``{player_id: profile}``; failures are logged and skipped.
+    """
+    futures = {
+        pid: _executor.submit(api_client.get_json, f"{PLAYER_PROFILE_URL}/{pid}")
+        for pid in dict.fromkeys(player_ids)
+    }
+    profiles = {}
+    for pid, future in futures.items():
+        try:
+            profiles[pid] = future.result()
+        except Exception as e:
+            log.warning("Profile %s not fetched: %s", pid, e)
+    upsert_players([profile_entry(pid, p) for pid, p in profiles.items()])
+    return profiles
+
+
+def load_squad(team_id, team_name=None):
+    """Add a team's players to the catalog. Returns their ids."""
+    data = api_client.get_json(f"{TEAM_PLAYERS_URL}/{team_id}/players")
+    players, role = [], None
+    for entry in data.get("player", []):
+        if not entry.get("id"):
+            # Section headers such as "BATSMEN" / "BOWLER" precede their players
+            role = (entry.get("name") or "").title() or None
+            continue
+        players.append({"player_id": int(entry["id"]), "name": entry.get("name"), "team": team_name, "role": role})
+    upsert_players(players)
+    return [p["player_id"] for p in players]
+
+
+def stale_players(max_age=PROFILE_MAX_AGE, limit=REFRESH_BATCH):
+    """Ids of players whose profile is missing or older than ``max_age``, oldest first."""
+    mark = "%s" if is_mysql() else "?"
+    with db_instance.connection() as conn:
+        if conn is None:
+            return []
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "SELECT player_id FROM player_catalog WHERE fetched_at IS NULL OR fetched_at < "
+                f"{mark} ORDER BY fetched_at LIMIT {int(limit)}",
+                (time.time() - max_age,)
+            )
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+
+def sync(teams=()):
+    """Load new squads for ``[(team_id, team_name)]``, then refresh stale profiles."""
+    for team_id, team_name in teams:
+        if team_id in _loaded_teams:
+            continue
+        try:
+            load_squad(team_id, team_name)
+            _loaded_teams.add(team_id)
+        except Exception as e:
+            log.warning("Squad %s not loaded: %s", team_id, e)
+    stale = stale_players()
+    if stale:
+        fetch_profiles(stale)
+    return len(stale)
+
+
+def sync_in_background(teams=()):
+    """Run ``sync`` on a daemon thread unless one ran recently or is running.
+
+    ``teams`` may be a callable, which is only called once a sync starts.
+    """
+    global _last_sync
+    if time.time() - _last_sync < SYNC_INTERVAL or not _sync_lock.acquire(blocking=False):
+        return False
+    _last_sync = time.time()
+
+    def _run():
+        try:
+            sync(teams() if callable(teams) else teams)
+        except Exception:
+            log.exception("Player catalog sync failed")
+        finally:
+            _sync_lock.release()
+
+    threading.Thread(target=_run, name="catalog-sync", daemon=True).start()
+    return True
@@ -0,0 +1,138 @@
+"""Batched player edits with optimistic locking, and indexed player search.
+
+Every ``players`` row carries a ``version``. Updates and deletes name the
+version the editor loaded and only match while it is unchanged; updates
+bump it. All inserts, updates and deletes from one save are sent with
+``executemany`` in a single transaction, so a bulk edit is one commit. If
+any row was changed or removed by someone else in the meantime, nothing is
+applied and ``ConcurrentEditError`` lists the stale player ids.
+"""
+import time
+
+from utils.config import is_mysql
+from utils.db_connection import db_instance, execute_query, mark_write
+from utils.query_cache import query_cache
+from utils.query_stats import query_stats
+
+EDITABLE = ["player_name", "country", "playing_role", "batting_style", "bowling_style"]
+COLUMNS = ["player_id"] + EDITABLE + ["version"]
+
+
+class ConcurrentEditError(Exception):
+    def __init__(self, player_ids):
+        super().__init__(
+            f"Player(s) {', '.join(map(str, player_ids))} changed since they were loaded. Reload and retry."
+        )
+        self.player_ids = player_ids
+
+
+def search_players(text, limit=50):
+    """Players by exact ID or by case-insensitive name prefix.
+
+    Served from ``record_index``, where any word of a name can be the prefix
+    ("root", "joe r"). With ``RECORD_INDEX=0`` a name prefix is an index
+    range scan: ``idx_players_name_nocase`` on SQLite, ``idx_players_name``
+    under MySQL's case-insensitive collation.
+    """
+    from utils import record_index
+
+    if record_index.ENABLED:
+        return [player.as_dict() for player in record_index.record_index.search_players(text, limit)]
+    text = (text or "").strip()
+    select = f"SELECT {', '.join(COLUMNS)} FROM players"
+    if not text:
+        result = execute_query(f"{select} ORDER BY player_id LIMIT ?", (limit,))
+    elif text.isdigit():
+        result = execute_query(f"{select} WHERE player_id = ?", (int(text),))
+    else:
+        prefix = text.replace("%", "").replace("_", "")
+        order = "player_name" if is_mysql() else "player_name COLLATE NOCASE"
+        result = execute_query(
+            f"{select} WHERE player_name LIKE ? ORDER BY {order} LIMIT ?",
+            (prefix + "%", limit)
+        )
+    if not result:
+        return []
+    rows, columns = result
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def _stale_ids(cursor, mark, expected):
+    """Ids in ``{player_id: version}`` whose row is gone or has another version."""
+    ids = list(expected)
+    cursor.execute(
+        f"SELECT player_id, version FROM players WHERE player_id IN ({', '.join([mark] * len(ids))})", ids
+    )
+    current = dict(cursor.fetchall())
+    return sorted(i for i in ids if current.get(i) != expected[i])
+
+
+def apply_changes(inserts=(), updates=(), deletes=()):
+    """Apply a batch of player edits in one transaction.
+
+    ``inserts`` are dicts of ``EDITABLE`` columns, ``updates`` dicts that also
+    hold ``player_id`` and the loaded ``version``, and ``deletes``
+    ``(player_id, version)`` pairs. Returns ``{"inserted", "updated", "deleted"}``.
+    """
+    inserts, updates, deletes = list(inserts), list(updates), list(deletes)
+    for row in inserts + updates:
+        if not (row.get("player_name") or "").strip():
+            raise ValueError("Every player needs a name")
+    if not (inserts or updates or deletes):
+        return {"inserted": 0, "updated": 0, "deleted": 0}
+
+    mark = "%s" if is_mysql() else "?"
+    statements = []
+    if deletes:
+        statements.append((
+            f"DELETE FROM players WHERE player_id = {mark} AND version = {mark}",
+            [(int(player_id), int(version)) for player_id, version in deletes],
+            {int(player_id): int(version) for player_id, version in deletes},
+        ))
+    if updates:
+        assign = ", ".join(f"{c} = {mark}" for c in EDITABLE)
+        statements.append((
+            f"UPDATE players SET {assign}, version = version + 1 WHERE player_id = {mark} AND version = {mark}",
+            [tuple(row.get(c) for c in EDITABLE) + (int(row["player_id"]), int(row["version"])) for row in updates],
+            {int(row["player_id"]): int(row["version"]) for row in updates},
+        ))
+    if inserts:
+        statements.append((
+            f"INSERT INTO players ({', '.join(EDITABLE)}) VALUES ({', '.join([mark] * len(EDITABLE))})",
+            [tuple(row.get(c) for c in EDITABLE) for row in inserts],
+            None,
+        ))
+
+    counts = []
+    with db_instance.connection() as conn:
+        if conn is None:
+            raise RuntimeError("No database connection")
+        cursor = conn.cursor()
+        try:
+            for query, params, expected in statements:
+                started = time.perf_counter()
+                cursor.executemany(query, params)
+                affected = cursor.rowcount
+                query_stats.record(query, None, time.perf_counter() - started, max(affected, 0))
+                if expected is not None and affected != len(params):
+                    # After the rollback, any version mismatch is someone else's write
+                    conn.rollback()
+                    raise ConcurrentEditError(_stale_ids(cursor, mark, expected))
+                counts.append(affected)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    # Inserted rows get new ids above the index's highest; name the others
+    changed = [int(row["player_id"]) for row in updates] + [int(player_id) for player_id, _ in deletes]
+    query_cache.invalidate_table("players", changed)
+    mark_write()
+    applied = iter(counts)
+    return {
+        "deleted": next(applied) if deletes else 0,
+        "updated": next(applied) if updates else 0,
+        "inserted": next(applied) if inserts else 0,
+    }
@@ -0,0 +1,217 @@
+"""In-process cache for SELECT results with table-level invalidation.
+
+Results are keyed by normalized SQL plus parameters and evicted LRU-first
+once either the entry or the byte budget is exceeded. Every cached result
+remembers the tables it read; a write through ``execute_query`` drops only
+the entries that depend on the written table. A TTL bounds staleness for
+time-relative SQL (``DATE('now', ...)``) and for writes made by other
+processes. With ``MULTI_PROCESS=1`` invalidations are also published to
+``shared_state``, and other workers apply them on their next lookup.
+
+Other in-process caches can ``subscribe`` to the same invalidations. A
+listener is called with the table and, when the writer knows them, the keys
+it changed: ``()`` for a plain INSERT that only appended rows, ``None`` when
+anything in the table may have changed.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from utils import config  # noqa: F401 - loads .env before the settings below
+from utils.shared_state import ENABLED as MULTI_PROCESS, SYNC_INTERVAL, shared_state
+
+MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256"))
+MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+TTL = int(os.getenv("QUERY_CACHE_TTL", "300"))
+
+# A FROM / JOIN target, including old-style comma lists: ``FROM a x, b AS y, c``
+_READ_TABLES = re.compile(
+    r"\b(?:FROM|JOIN)\s+((?:[`\"\[]?\w+[`\"\]]?(?:\s+(?:AS\s+)?\w+)?\s*,\s*)*[`\"\[]?\w+)",
+    re.IGNORECASE
+)
+_TABLE_NAME = re.compile(r"\s*[`\"\[]?(\w+)")
+_WRITE_TABLE = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM"
+    r"|CREATE\s+(?:UNIQUE\s+)?(?:TABLE|INDEX)(?:\s+IF\s+NOT\s+EXISTS)?(?:\s+\w+\s+ON)?"
+    r"|DROP\s+TABLE(?:\s+IF\s+EXISTS)?|ALTER\s+TABLE|TRUNCATE(?:\s+TABLE)?)\s+[`\"\[]?(\w+)",
+    re.IGNORECASE
+)
+_APPEND_ONLY = re.compile(r"^\s*INSERT\s+INTO\b(?!.*\bON\s+(?:CONFLICT|DUPLICATE)\b)", re.IGNORECASE | re.DOTALL)
+_QUOTED_OR_SPACE = re.compile(r"('(?:[^']|'')*'|\"[^\"]*\")|\s+")
+
+
+def normalize_sql(query):
+    """Collapse whitespace outside string literals and drop a trailing ';'."""
+    collapsed = _QUOTED_OR_SPACE.sub(lambda m: m.group(1) or " ", query)
+    return collapsed.strip().rstrip(";").strip()
+
+
+def tables_read(query):
+    return {
+        _TABLE_NAME.match(target).group(1).lower()
+        for targets in _READ_TABLES.findall(query)
+        for target in targets.split(",")
+    }
+
+
+def table_written(query):
+    """Table targeted by a write statement, or None if it cannot be told."""
+    match = _WRITE_TABLE.match(query)
+    return match.group(1).lower() if match else None
+
+
+def _estimate_size(rows, columns):
+    if not rows:
+        return sys.getsizeof(rows)
+    sample = rows[0]
+    row_size = sys.getsizeof(sample) + sum(sys.getsizeof(v) for v in sample)
+    return sys.getsizeof(rows) + row_size * len(rows) + sum(sys.getsizeof(c) for c in columns)
+
+
+class QueryCache:
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, ttl=TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._by_table = {}
+        self._generation = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._shared_seen = None
+        self._shared_synced = 0.0
+        self._listeners = []
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(query, params=None):
+        return normalize_sql(query), tuple(params) if params else ()
+
+    def generations(self, tables):
+        """Snapshot of table write generations, taken before running a read."""
+        with self._lock:
+            gens = {t: self._generation.get(t, 0) for t in tables}
+            gens["*"] = self._generation.get("*", 0)
+            return gens
+
+    def subscribe(self, listener):
+        """Call ``listener(table, keys)`` on every invalidation; ``"*"`` means everything."""
+        self._listeners.append(listener)
+
+    def _notify(self, table, keys):
+        for listener in self._listeners:
+            listener(table, keys)
+
+    def sync_shared(self):
+        """Apply invalidations other workers published since the last check."""
+        now = time.monotonic()
+        if now - self._shared_synced < SYNC_INTERVAL:
+            return
+        self._shared_synced = now
+        generations = shared_state.generations()
+        seen, self._shared_seen = self._shared_seen, generations
+        if seen is None:
+            return
+        for table, generation in generations.items():
+            if seen.get(table) != generation:
+                if table == "*":
+                    self._clear_local()
+                else:
+                    self._invalidate_local(table)
+
+    def get(self, key):
+        if MULTI_PROCESS:
+            self.sync_shared()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry["stored_at"] > self.ttl:
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["result"]
+
+    def put(self, key, result, tables, generations):
+        size = _estimate_size(*result)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            # A write landed while the read was running: the result may be stale
+            if any(self._generation.get(t, 0) != g for t, g in generations.items()):
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = {
+                "result": result, "tables": tables, "size": size,
+                "stored_at": time.monotonic()
+            }
+            self._bytes += size
+            for t in tables:
+                self._by_table.setdefault(t, set()).add(key)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry["size"]
+        for t in entry["tables"]:
+            keys = self._by_table.get(t)
+            if keys:
+                keys.discard(key)
+
+    def _invalidate_local(self, table, keys=None):
+        with self._lock:
+            self._generation[table] = self._generation.get(table, 0) + 1
+            for key in list(self._by_table.pop(table, ())):
+                if key in self._entries:
+                    self._drop(key)
+        self._notify(table, keys)
+
+    def _publish(self, name):
+        generation = shared_state.bump_generation(name)
+        if self._shared_seen is not None:
+            self._shared_seen[name] = generation
+
+    def invalidate_table(self, table, keys=None):
+        """Drop results that read ``table``; ``keys`` are the changed primary keys, if known."""
+        self._invalidate_local(table, keys)
+        if MULTI_PROCESS:
+            self._publish(table)
+
+    def invalidate_for_write(self, query):
+        table = table_written(query)
+        if table is None:
+            self.clear()
+        else:
+            self.invalidate_table(table, () if _APPEND_ONLY.match(query) else None)
+
+    def clear(self):
+        self._clear_local()
+        if MULTI_PROCESS:
+            self._publish("*")
+
+    def _clear_local(self):
+        with self._lock:
+            self._generation["*"] = self._generation.get("*", 0) + 1
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+        self._notify("*", None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+query_cache = QueryCache()
@@ -0,0 +1,381 @@
+"""Run SQL on a bounded worker pool with timeouts, cancellation and row limits.
+
+Pages submit statements with ``submit`` and keep the returned job id across
+reruns, so a slow query never blocks the Streamlit script thread and a
+runaway one can be stopped:
+
+- SQLite: a progress handler aborts the statement once the job is cancelled
+  or its deadline passes. Rows are stepped lazily and reading stops at the
+  row limit, so the engine never produces the rest.
+- MySQL: the session gets ``MAX_EXECUTION_TIME`` and ``sql_select_limit``
+  for the statement. Cancelling sends ``KILL QUERY`` for the job's
+  connection, and a watchdog does the same at the deadline for statements
+  ``MAX_EXECUTION_TIME`` does not cover.
+- DuckDB (``columnar=True`` with ``ANALYTICS_ENGINE=duckdb``): SELECTs over
+  the snapshotted analytics tables run on the columnar copy; cancelling
+  interrupts the DuckDB cursor.
+
+Jobs submitted with ``export`` stream the result into a CSV file instead,
+under the same time limit and cancellation, with ``max_rows`` and
+``max_bytes`` capping the file.
+"""
+import itertools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from utils import columnar
+from utils.config import is_mysql
+from utils.db_connection import _to_mysql_params, cacheable_read, db_instance, mark_write, reads_from_primary
+from utils.query_cache import query_cache, tables_read
+from utils.query_stats import call_site, estimate_bytes, labelled, query_stats
+from utils.result_streaming import MAX_BYTES, MAX_ROWS, export_path, write_csv
+
+log = logging.getLogger(__name__)
+
+WORKERS = int(os.getenv("QUERY_WORKERS", "4"))
+TIMEOUT = float(os.getenv("QUERY_TIMEOUT", "30"))
+# Finished jobs are forgotten after this many seconds
+JOB_TTL = int(os.getenv("QUERY_JOB_TTL", "600"))
+# SQLite VM instructions between progress-handler checks
+PROGRESS_STEPS = 10000
+
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="query")
+_jobs = {}
+_jobs_lock = threading.Lock()
+_ids = itertools.count(1)
+
+
+class QueryCancelled(Exception):
+    pass
+
+
+class QueryTimeout(Exception):
+    pass
+
+
+class QueryJob:
+    def __init__(self, query, params, timeout, max_rows, max_bytes, use_cache, label, materialized, columnar,
+                 export=None):
+        self.id = next(_ids)
+        self.query = query
+        self.params = params
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.use_cache = use_cache
+        self.label = label
+        self.materialized = materialized
+        self.columnar = columnar
+        self.export = export
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.cancelled = threading.Event()
+        self.timed_out = False
+        self.mysql_thread_id = None
+        # Pool of the connection running the statement; KILL must reach the same server
+        self.mysql_pool = None
+        self.duckdb_cursor = None
+        self.from_materialized = False
+        self.from_columnar = False
+        self.wrote = False
+        # Read-your-writes is decided on the submitting script thread
+        self.primary = reads_from_primary()
+        # Queries run on a worker thread, so attribute them to the submitter
+        self.site = call_site()
+        self.future = None
+
+    @property
+    def done(self):
+        return self.future.done()
+
+    @property
+    def elapsed(self):
+        end = self.finished or time.time()
+        return end - (self.started or end)
+
+    def result(self, timeout=None):
+        """``(rows, columns, truncated)`` for SELECTs, ``rowcount`` otherwise.
+
+        Export jobs return ``(path, rows written, truncated)``.
+
+        Call from the page so a write pins the session's reads to the primary.
+        """
+        result = self.future.result(timeout)
+        if self.wrote:
+            mark_write()
+        return result
+
+    def cancel(self):
+        """Stop the job: drop it if still queued, otherwise abort its statement."""
+        self.cancelled.set()
+        if self.future.cancel():
+            self.finished = time.time()
+            return
+        duck = self.duckdb_cursor
+        if duck is not None:
+            duck.interrupt()
+            return
+        thread_id, pool = self.mysql_thread_id, self.mysql_pool
+        if is_mysql() and thread_id and pool is not None:
+            try:
+                conn = pool.acquire()
+            except Exception as e:
+                log.warning("Could not cancel query job %s: %s", self.id, e)
+                return
+            broken = False
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"KILL QUERY {int(thread_id)}")
+            except Exception as e:
+                # Typically the statement finished in the meantime
+                log.warning("KILL QUERY %s for job %s failed: %s", thread_id, self.id, e)
+            finally:
+                try:
+                    cursor.close()
+                except Exception:
+                    broken = True
+                pool.release(conn, broken=broken)
+
+    def _expire(self):
+        self.timed_out = True
+        self.cancel()
+
+
+def _is_select(query):
+    return query.lstrip().upper().startswith(("SELECT", "WITH"))
+
+
+def _fetch(job, cursor):
+    rows, used = [], 0
+    while True:
+        batch = cursor.fetchmany(min(1000, job.max_rows + 1 - len(rows)))
+        if not batch:
+            return rows, False
+        rows.extend(batch)
+        used += estimate_bytes(batch)
+        if len(rows) > job.max_rows:
+            return rows[:job.max_rows], True
+        if used > job.max_bytes:
+            return rows, True
+
+
+def _export(job, cursor):
+    """Write the rows after ``skip_rows`` to a CSV, one batch at a time."""
+    path = export_path(job.export.get("name", "export"))
+    batches = iter(lambda: cursor.fetchmany(1000), [])
+    try:
+        written, truncated = write_csv(
+            path, [d[0] for d in cursor.description], batches,
+            job.export.get("skip_rows", 0), job.max_rows, job.max_bytes,
+        )
+        if truncated and is_mysql():
+            # An unbuffered MySQL cursor must be read to the end before reuse
+            for _ in batches:
+                pass
+    except Exception:
+        path.unlink(missing_ok=True)
+        raise
+    return path, written, truncated
+
+
+def _execute(job, conn):
+    query = job.query
+    mysql = is_mysql()
+    # Buffered on MySQL: sql_select_limit already bounds what is transferred.
+    # Exports stream instead, so a large file is never held in memory.
+    cursor = conn.cursor(buffered=not job.export) if mysql else conn.cursor()
+    select = _is_select(query)
+    try:
+        if mysql:
+            job.mysql_pool = db_instance.pool_of(conn)
+            job.mysql_thread_id = conn.connection_id
+            limit = job.max_rows + (job.export or {}).get("skip_rows", 0)
+            cursor.execute(f"SET SESSION MAX_EXECUTION_TIME = {int(job.timeout * 1000)}")
+            cursor.execute(f"SET SESSION sql_select_limit = {int(limit) + 1}")
+            if job.params:
+                query = _to_mysql_params(query)
+        else:
+            deadline = time.monotonic() + job.timeout
+
+            def _abort():
+                if time.monotonic() > deadline:
+                    job.timed_out = True
+                return job.cancelled.is_set() or job.timed_out
+
+            conn.set_progress_handler(_abort, PROGRESS_STEPS)
+        if job.params:
+            cursor.execute(query, job.params)
+        else:
+            cursor.execute(query)
+        if select and job.export:
+            return _export(job, cursor)
+        if select:
+            rows, truncated = _fetch(job, cursor)
+            return rows, [d[0] for d in cursor.description], truncated
+        conn.commit()
+        job.wrote = True
+        query_cache.invalidate_for_write(job.query)
+        return cursor.rowcount
+    finally:
+        try:
+            cursor.close()
+        finally:
+            if mysql:
+                job.mysql_thread_id = None
+                job.mysql_pool = None
+                reset = conn.cursor()
+                reset.execute("SET SESSION MAX_EXECUTION_TIME = DEFAULT")
+                reset.execute("SET SESSION sql_select_limit = DEFAULT")
+                reset.close()
+            else:
+                conn.set_progress_handler(None, 0)
+
+
+def _run(job):
+    job.started = time.time()
+    if job.cancelled.is_set():
+        raise QueryCancelled("Query cancelled before it started")
+    watchdog = threading.Timer(job.timeout, job._expire)
+    watchdog.daemon = True
+    try:
+        with labelled(job.label) if job.label else nullcontext():
+            if job.materialized:
+                from utils.materialized import run_materialized
+                result = run_materialized(job.materialized)
+                if result is not None:
+                    job.from_materialized = True
+                    return result[0], result[1], False
+            if job.columnar and not job.export and _columnar_ready(job.query):
+                return _run_columnar(job, watchdog)
+            return _run_statement(job, watchdog)
+    finally:
+        job.finished = time.time()
+
+
+def _columnar_ready(query):
+    """Whether the DuckDB snapshot can answer ``query``; keeps it synced."""
+    if not _is_select(query) or not columnar.handles(tables_read(query)):
+        return False
+    try:
+        ready = columnar.ready()
+    except RuntimeError as e:
+        log.warning("Columnar engine unavailable: %s", e)
+        return False
+    columnar.sync_in_background()
+    return ready
+
+
+def _run_columnar(job, watchdog):
+    started = time.perf_counter()
+    duck = columnar.cursor()
+    job.duckdb_cursor = duck
+    watchdog.start()
+    try:
+        duck.execute(columnar.translate(job.query), job.params or [])
+        rows, truncated = _fetch(job, duck)
+        columns = [d[0] for d in duck.description]
+    except Exception as e:
+        query_stats.record(job.query, job.params, time.perf_counter() - started, error=str(e), site=job.site)
+        if job.timed_out:
+            raise QueryTimeout(f"Query exceeded the {job.timeout:g}s time limit") from e
+        if job.cancelled.is_set():
+            raise QueryCancelled("Query cancelled") from e
+        raise
+    finally:
+        watchdog.cancel()
+        job.duckdb_cursor = None
+        duck.close()
+    job.from_columnar = True
+    query_stats.record(
+        job.query, job.params, time.perf_counter() - started, len(rows), estimate_bytes(rows), site=job.site
+    )
+    return rows, columns, truncated
+
+
+def _run_statement(job, watchdog):
+    select = _is_select(job.query)
+    key = None
+    if select and job.use_cache:
+        key = query_cache.make_key(job.query, job.params)
+        cached = query_cache.get(key)
+        if cached is not None:
+            query_stats.record(job.query, job.params, 0, len(cached[0]), cached=True, site=job.site)
+            return cached[0], cached[1], False
+        tables = tables_read(job.query)
+        generations = query_cache.generations(tables)
+
+    started = time.perf_counter()
+    conn = db_instance.get_connection(read=select and not job.primary)
+    if conn is None:
+        raise RuntimeError("No database connection")
+    broken = False
+    cacheable = cacheable_read(conn)
+    watchdog.start()
+    try:
+        result = _execute(job, conn)
+    except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            broken = True
+        query_stats.record(job.query, job.params, time.perf_counter() - started, error=str(e), site=job.site)
+        if job.timed_out:
+            raise QueryTimeout(f"Query exceeded the {job.timeout:g}s time limit") from e
+        if job.cancelled.is_set():
+            raise QueryCancelled("Query cancelled") from e
+        raise
+    finally:
+        watchdog.cancel()
+        db_instance.release_connection(conn, broken=broken)
+
+    if select and job.export:
+        query_stats.record(job.query, job.params, time.perf_counter() - started, result[1], site=job.site)
+        return result
+    if select:
+        rows, columns, truncated = result
+        query_stats.record(
+            job.query, job.params, time.perf_counter() - started, len(rows), estimate_bytes(rows), site=job.site
+        )
+        if key is not None and not truncated and cacheable:
+            query_cache.put(key, (rows, columns), tables, generations)
+        return result
+    query_stats.record(job.query, job.params, time.perf_counter() - started, max(result, 0), site=job.site)
+    return result
+
+
+def _prune():
+    cutoff = time.time() - JOB_TTL
+    with _jobs_lock:
+        for job_id in [i for i, j in _jobs.items() if j.finished and j.finished < cutoff]:
+            del _jobs[job_id]
+
+
+def submit(query, params=None, timeout=TIMEOUT, max_rows=MAX_ROWS, max_bytes=MAX_BYTES,
+           use_cache=False, label=None, materialized=None, columnar=False, export=None):
+    """Queue a statement on the worker pool and return its ``QueryJob``.
+
+    ``materialized`` names a predefined query to try against the
+    precomputed aggregates first. ``columnar`` lets a SELECT run on the
+    DuckDB snapshot when that engine is enabled. ``export`` (``{"name",
+    "skip_rows"}``) writes a SELECT's result to a CSV file instead of
+    returning its rows.
+    """
+    _prune()
+    job = QueryJob(
+        query.strip().rstrip(";"), params, timeout, max_rows, max_bytes, use_cache, label, materialized, columnar,
+        export,
+    )
+    with _jobs_lock:
+        _jobs[job.id] = job
+    job.future = _executor.submit(_run, job)
+    return job
+
+
+def get_job(job_id):
+    with _jobs_lock:
+        return _jobs.get(job_id)
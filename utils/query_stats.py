@@ -0,0 +1,246 @@
+"""Per-statement timing, row/byte counts and a slow-query log.
+
+``execute_query`` and ``iter_query`` call ``record`` for every statement.
+Each call is attributed to the first caller outside the database layer
+(``file:line function``) and to the active ``labelled`` block, which the SQL
+Analytics page sets to the ``SQL_QUERIES`` name. Recent latencies are kept in
+memory per statement for percentiles. Statements slower than
+``SLOW_QUERY_MS`` are appended to ``SLOW_QUERY_LOG`` (JSON lines) together
+with their ``EXPLAIN QUERY PLAN`` / ``EXPLAIN`` output. Plans are captured
+and the log is written on a background thread, after the slow statement
+has returned its connection to the pool.
+"""
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from utils.config import is_mysql
+from utils.query_cache import normalize_sql
+
+log = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_LOG = Path(__file__).parent.parent / os.getenv("SLOW_QUERY_LOG", "logs/slow_queries.jsonl")
+# Latency samples kept per statement for percentiles
+SAMPLES = int(os.getenv("QUERY_STATS_SAMPLES", "1000"))
+# A slow statement's plan is captured at most once per this many seconds
+EXPLAIN_INTERVAL = int(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+
+# Frames from these files are skipped when finding the call site
+_INTERNAL = ("db_connection.py", "query_stats.py", "query_runner.py", "result_streaming.py", "contextlib.py")
+
+_local = threading.local()
+# One thread, so plans are captured one at a time and log lines stay in order
+_slow_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-log")
+
+
+def estimate_bytes(rows):
+    """Approximate in-memory size of a row list, from its first row."""
+    if not rows:
+        return 0
+    sample = rows[0]
+    per_row = sys.getsizeof(sample) + sum(sys.getsizeof(v) for v in sample)
+    return per_row * len(rows)
+
+
+def call_site():
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.endswith(_INTERNAL):
+            return f"{Path(filename).parent.name}/{Path(filename).name}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def explain(query, params=None):
+    """Plan lines for a SELECT, run on a separate pooled connection."""
+    from utils.db_connection import _to_mysql_params, db_instance
+
+    with db_instance.connection() as conn:
+        if conn is None:
+            return []
+        cursor = conn.cursor()
+        try:
+            if is_mysql():
+                statement = "EXPLAIN " + (_to_mysql_params(query) if params else query)
+            else:
+                statement = "EXPLAIN QUERY PLAN " + query
+            cursor.execute(statement, params or ())
+            columns = [d[0] for d in cursor.description]
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+    if is_mysql():
+        return [
+            " ".join(f"{k}={v}" for k, v in zip(columns, row) if v is not None and k in
+                     ("table", "type", "key", "rows", "Extra"))
+            for row in rows
+        ]
+    return [row[-1] for row in rows]
+
+
+class _Entry:
+    def __init__(self, label, sql):
+        self.label = label
+        self.sql = sql
+        self.latencies = deque(maxlen=SAMPLES)
+        self.calls = 0
+        self.cached = 0
+        self.errors = 0
+        self.rows = 0
+        self.bytes = 0
+        self.sites = {}
+
+
+class QueryStats:
+    def __init__(self):
+        self._entries = {}
+        self._labels = {}
+        self._slow = deque(maxlen=200)
+        self._explained = {}
+        self._lock = threading.Lock()
+
+    def record(self, query, params, seconds, rows=0, size=0, cached=False, error=None, site=None):
+        sql = normalize_sql(query)
+        label = getattr(_local, "label", None)
+        site = site or call_site()
+        ms = seconds * 1000
+        with self._lock:
+            entry = self._entries.get((label, sql))
+            if entry is None:
+                entry = self._entries[(label, sql)] = _Entry(label, sql)
+            entry.calls += 1
+            entry.latencies.append(ms)
+            entry.rows += rows
+            entry.bytes += size
+            entry.cached += bool(cached)
+            entry.errors += error is not None
+            entry.sites[site] = entry.sites.get(site, 0) + 1
+        if error is not None:
+            log.warning("Query failed at %s: %s", site, error)
+        if ms >= SLOW_QUERY_MS and not cached:
+            self._log_slow(sql, params, ms, rows, size, site, label)
+
+    def _log_slow(self, sql, params, ms, rows, size, site, label):
+        record = {
+            "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "ms": round(ms, 1),
+            "rows": rows,
+            "bytes": size,
+            "site": site,
+            "label": label,
+            "sql": sql,
+            "params": [str(p) for p in params] if params else None,
+            "plan": None,
+        }
+        now = time.time()
+        with self._lock:
+            due = now - self._explained.get(sql, 0) >= EXPLAIN_INTERVAL
+            if due:
+                self._explained[sql] = now
+            self._slow.appendleft(record)
+        _slow_writer.submit(self._finish_slow, record, params, due and sql.upper().startswith("SELECT"))
+
+    def _finish_slow(self, record, params, with_plan):
+        """Fill in the plan and append the record to the log, off the caller's thread."""
+        if with_plan:
+            try:
+                record["plan"] = explain(record["sql"], params)
+            except Exception as e:
+                record["plan"] = [f"EXPLAIN failed: {e}"]
+        try:
+            SLOW_QUERY_LOG.parent.mkdir(parents=True, exist_ok=True)
+            with open(SLOW_QUERY_LOG, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(record) + "\n")
+        except OSError as e:
+            log.warning("Could not write slow query log: %s", e)
+
+    def summary(self):
+        """One dict per (label, statement) with latency percentiles in ms."""
+        with self._lock:
+            entries = [
+                (e, sorted(e.latencies), dict(e.sites)) for e in self._entries.values()
+            ]
+        report = []
+        for entry, latencies, sites in entries:
+            report.append({
+                "label": entry.label,
+                "sql": entry.sql,
+                "calls": entry.calls,
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "p99_ms": percentile(latencies, 99),
+                "max_ms": latencies[-1] if latencies else None,
+                "avg_rows": entry.rows / entry.calls,
+                "avg_bytes": entry.bytes / entry.calls,
+                "cache_hit_pct": 100 * entry.cached / entry.calls,
+                "errors": entry.errors,
+                "top_site": max(sites, key=sites.get) if sites else None,
+            })
+        return report
+
+    def record_label(self, label, seconds):
+        with self._lock:
+            latencies = self._labels.get(label)
+            if latencies is None:
+                latencies = self._labels[label] = deque(maxlen=SAMPLES)
+            latencies.append(seconds * 1000)
+
+    def by_label(self):
+        """End-to-end latency percentiles in ms per ``labelled`` name."""
+        with self._lock:
+            samples = {label: sorted(latencies) for label, latencies in self._labels.items()}
+        return {
+            label: {
+                "runs": len(latencies),
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "p99_ms": percentile(latencies, 99),
+                "max_ms": latencies[-1],
+            }
+            for label, latencies in samples.items()
+        }
+
+    def slow_queries(self):
+        with self._lock:
+            return list(self._slow)
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+            self._labels.clear()
+            self._slow.clear()
+            self._explained.clear()
+
+
+query_stats = QueryStats()
+
+
+@contextmanager
+def labelled(name):
+    """Attribute statements run inside the block to ``name`` and time the block."""
+    previous = getattr(_local, "label", None)
+    _local.label = name
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.label = previous
+        query_stats.record_label(name, time.perf_counter() - started)
@@ -0,0 +1,378 @@
+"""In-memory index of players, matches and teams for pickers and lookups.
+
+Each process loads ``players`` and ``matches`` once into ``__slots__``
+records (no per-row ``__dict__``), with a prefix trie over the words of player
+and team names. Teams are derived from the two sides of each match. Pickers
+and Python-side joins then read memory instead of querying on every rerun.
+
+The index stays current through the query cache's invalidations. Writes
+through ``player_edits`` name the rows they changed, so only those rows are
+re-read. A plain INSERT only appends, so rows above the highest known key
+are read. Any other write to the table reloads it. A row count check after an
+incremental refresh catches changes it could not see, and a full reload
+runs at least every ``RECORD_INDEX_MAX_AGE`` seconds for writes made by
+other processes. With ``MULTI_PROCESS=1`` other workers' writes arrive
+through ``shared_state`` like query-cache invalidations.
+
+    python -m utils.record_index kohli     # load the index and time a search
+"""
+import heapq
+import logging
+import os
+import sys
+import threading
+import time
+
+from utils.config import is_mysql
+from utils.db_connection import db_instance
+from utils.player_catalog import name_terms
+from utils.player_edits import COLUMNS as PLAYER_COLUMNS
+from utils.query_cache import query_cache
+from utils.shared_state import ENABLED as MULTI_PROCESS
+
+log = logging.getLogger(__name__)
+
+ENABLED = os.getenv("RECORD_INDEX", "1") == "1"
+MAX_AGE = int(os.getenv("RECORD_INDEX_MAX_AGE", "300"))
+# Keys per ``IN (...)`` when re-reading changed rows
+FETCH_CHUNK = 500
+
+MATCH_COLUMNS = ("match_id", "match_description", "team1", "team2", "venue", "match_date", "format", "status", "winner")
+
+
+class Record:
+    __slots__ = ()
+
+    def __init__(self, row):
+        for name, value in zip(self.__slots__, row):
+            setattr(self, name, value)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class PlayerRecord(Record):
+    __slots__ = tuple(PLAYER_COLUMNS)
+
+
+class MatchRecord(Record):
+    __slots__ = MATCH_COLUMNS
+
+    def label(self):
+        return f"{self.match_description or 'Match'}: {self.team1} vs {self.team2} ({self.match_date})"
+
+
+class TeamRecord:
+    __slots__ = ("name", "match_ids")
+
+    def __init__(self, name):
+        self.name = name
+        self.match_ids = set()
+
+
+class _TrieNode:
+    __slots__ = ("children", "keys")
+
+    def __init__(self):
+        self.children = {}
+        self.keys = None
+
+
+class PrefixTrie:
+    """Maps lower-case terms to sets of keys; finds every key under a prefix."""
+
+    def __init__(self):
+        self._root = _TrieNode()
+
+    def add(self, term, key):
+        node = self._root
+        for ch in term:
+            node = node.children.setdefault(ch, _TrieNode())
+        if node.keys is None:
+            node.keys = set()
+        node.keys.add(key)
+
+    def discard(self, term, key):
+        path = [self._root]
+        for ch in term:
+            node = path[-1].children.get(ch)
+            if node is None:
+                return
+            path.append(node)
+        if path[-1].keys:
+            path[-1].keys.discard(key)
+        # Prune the branch back to the last node still in use
+        for parent, ch, node in zip(reversed(path[:-1]), reversed(term), reversed(path)):
+            if node.keys or node.children:
+                break
+            del parent.children[ch]
+
+    def keys_with_prefix(self, prefix):
+        node = self._root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return set()
+        found = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.keys:
+                found |= node.keys
+            stack.extend(node.children.values())
+        return found
+
+
+def _match_words(trie, text):
+    """Keys under the first word of ``text``, and the words their names must also match."""
+    words = name_terms(text)
+    if not words:
+        return None, []
+    return trie.keys_with_prefix(words[0]), words[1:]
+
+
+class RecordIndex:
+    TABLES = {
+        "players": ("player_id", PLAYER_COLUMNS),
+        "matches": ("match_id", MATCH_COLUMNS),
+    }
+
+    def __init__(self):
+        self._players = {}
+        self._matches = {}
+        self._teams = {}
+        self._player_names = PrefixTrie()
+        self._team_names = PrefixTrie()
+        self._high = {table: 0 for table in self.TABLES}
+        # table -> changed keys to re-read, or None to reload the table
+        self._pending = {table: None for table in self.TABLES}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.refreshes = {"full": 0, "incremental": 0}
+        query_cache.subscribe(self._on_change)
+
+    def _on_change(self, table, keys):
+        with self._lock:
+            for name in (self.TABLES if table == "*" else [table]):
+                if name not in self.TABLES:
+                    continue
+                if keys is None:
+                    self._pending[name] = None
+                elif name not in self._pending:
+                    self._pending[name] = set(keys)
+                elif self._pending[name] is not None:
+                    self._pending[name].update(keys)
+
+    # --- loading ---
+
+    def _fetch(self, cursor, table, keys):
+        """Rows to apply: the given keys plus anything above the highest known key."""
+        key_col, columns = self.TABLES[table]
+        mark = "%s" if is_mysql() else "?"
+        select = f"SELECT {', '.join(columns)} FROM {table}"
+        if keys is None:
+            cursor.execute(select)
+            return cursor.fetchall(), None
+        keys = sorted(keys)
+        rows = []
+        for start in range(0, len(keys), FETCH_CHUNK):
+            chunk = keys[start:start + FETCH_CHUNK]
+            cursor.execute(f"{select} WHERE {key_col} IN ({', '.join([mark] * len(chunk))})", chunk)
+            rows += cursor.fetchall()
+        cursor.execute(f"{select} WHERE {key_col} > {mark}", (self._high[table],))
+        rows += cursor.fetchall()
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return rows, cursor.fetchone()[0]
+
+    def refresh(self):
+        """Apply pending changes; the first call loads everything."""
+        if MULTI_PROCESS:
+            query_cache.sync_shared()
+        if not self._pending and time.time() - self._loaded_at < MAX_AGE:
+            return
+        with self._refresh_lock:
+            if time.time() - self._loaded_at >= MAX_AGE:
+                self._on_change("*", None)
+            while True:
+                with self._lock:
+                    pending, self._pending = self._pending, {}
+                if not pending:
+                    return
+                started = time.perf_counter()
+                fetched = {}
+                with db_instance.connection() as conn:
+                    if conn is None:
+                        self._on_change("*", None)
+                        return
+                    cursor = conn.cursor()
+                    try:
+                        for table, keys in pending.items():
+                            fetched[table] = (keys, *self._fetch(cursor, table, keys))
+                    except Exception:
+                        # Nothing was applied; reload everything next time
+                        self._on_change("*", None)
+                        raise
+                    finally:
+                        cursor.close()
+                with self._lock:
+                    for table, (keys, rows, count) in fetched.items():
+                        self._apply(table, keys, rows)
+                        records = self._players if table == "players" else self._matches
+                        if count is not None and count != len(records):
+                            # Rows inserted below the high key or deleted by raw SQL
+                            self._pending[table] = None
+                    if all(keys is None for keys, _, _ in fetched.values()) and len(fetched) == len(self.TABLES):
+                        self._loaded_at = time.time()
+                full = sum(keys is None for keys, _, _ in fetched.values())
+                self.refreshes["full"] += full
+                self.refreshes["incremental"] += len(fetched) - full
+                log.debug("Record index refreshed %s in %.1f ms", sorted(fetched), (time.perf_counter() - started) * 1000)
+
+    def _apply(self, table, keys, rows):
+        if table == "players":
+            drop, add = self._drop_player, self._add_player
+            records = self._players
+        else:
+            drop, add = self._drop_match, self._add_match
+            records = self._matches
+        for key in (list(records) if keys is None else keys):
+            drop(key)
+        if keys is None:
+            self._high[table] = 0
+        for row in rows:
+            drop(row[0])
+            add(row)
+            self._high[table] = max(self._high[table], row[0])
+
+    def _add_player(self, row):
+        player = PlayerRecord(row)
+        self._players[player.player_id] = player
+        for term in name_terms(player.player_name):
+            self._player_names.add(term, player.player_id)
+
+    def _drop_player(self, player_id):
+        player = self._players.pop(player_id, None)
+        if player is not None:
+            for term in name_terms(player.player_name):
+                self._player_names.discard(term, player_id)
+
+    def _add_match(self, row):
+        match = MatchRecord(row)
+        self._matches[match.match_id] = match
+        for name in {match.team1, match.team2} - {None, ""}:
+            team = self._teams.get(name)
+            if team is None:
+                team = self._teams[name] = TeamRecord(name)
+                for term in name_terms(name):
+                    self._team_names.add(term, name)
+            team.match_ids.add(match.match_id)
+
+    def _drop_match(self, match_id):
+        match = self._matches.pop(match_id, None)
+        if match is None:
+            return
+        for name in {match.team1, match.team2} - {None, ""}:
+            team = self._teams.get(name)
+            if team is None:
+                continue
+            team.match_ids.discard(match_id)
+            if not team.match_ids:
+                del self._teams[name]
+                for term in name_terms(name):
+                    self._team_names.discard(term, name)
+
+    def load_in_background(self):
+        def _run():
+            try:
+                self.refresh()
+            except Exception as e:
+                log.warning("Record index load failed: %s", e)
+
+        threading.Thread(target=_run, name="record-index", daemon=True).start()
+
+    # --- lookups ---
+
+    def player(self, player_id):
+        self.refresh()
+        return self._players.get(player_id)
+
+    def player_name(self, player_id):
+        player = self.player(player_id)
+        return player.player_name if player else None
+
+    def search_players(self, text, limit=50):
+        """Players by exact ID, by name-word prefixes ("joe r"), or the first ``limit`` by ID."""
+        self.refresh()
+        text = (text or "").strip()
+        with self._lock:
+            if not text:
+                return [self._players[i] for i in heapq.nsmallest(limit, self._players)]
+            if text.isdigit():
+                player = self._players.get(int(text))
+                return [player] if player else []
+            candidates, rest = _match_words(self._player_names, text)
+            found = [self._players[i] for i in candidates or ()]
+        if rest:
+            found = [
+                p for p in found
+                if all(any(t.startswith(w) for t in name_terms(p.player_name)) for w in rest)
+            ]
+        return heapq.nsmallest(limit, found, key=lambda p: (p.player_name.lower(), p.player_id))
+
+    def match(self, match_id):
+        self.refresh()
+        return self._matches.get(match_id)
+
+    def match_label(self, match_id):
+        match = self.match(match_id)
+        return match.label() if match else None
+
+    def team(self, name):
+        self.refresh()
+        return self._teams.get(name)
+
+    def search_teams(self, text, limit=20):
+        self.refresh()
+        with self._lock:
+            candidates, rest = _match_words(self._team_names, text)
+            if candidates is None:
+                names = list(self._teams)
+            else:
+                names = [n for n in candidates if all(any(t.startswith(w) for t in name_terms(n)) for w in rest)]
+        return sorted(names, key=str.lower)[:limit]
+
+    def matches_for_team(self, name, limit=None):
+        """A team's matches, newest first."""
+        self.refresh()
+        with self._lock:
+            team = self._teams.get(name)
+            matches = [self._matches[i] for i in team.match_ids] if team else []
+        matches.sort(key=lambda m: (str(m.match_date or ""), m.match_id), reverse=True)
+        return matches[:limit] if limit else matches
+
+    def stats(self):
+        with self._lock:
+            return {
+                "players": len(self._players),
+                "matches": len(self._matches),
+                "teams": len(self._teams),
+                "loaded_at": self._loaded_at,
+                **self.refreshes,
+            }
+
+
+record_index = RecordIndex()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s")
+    started = time.perf_counter()
+    record_index.refresh()
+    print(f"Loaded {record_index.stats()} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    text = " ".join(sys.argv[1:])
+    runs = 1000
+    started = time.perf_counter()
+    for _ in range(runs):
+        found = record_index.search_players(text)
+    print(f"search_players({text!r}): {len(found)} players, {(time.perf_counter() - started) / runs * 1e6:.0f} µs each")
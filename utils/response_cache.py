@@ -0,0 +1,189 @@
+"""Persistent, compressed HTTP response cache shared by app replicas.
+
+Responses are stored in a local SQLite file (WAL mode, so every worker
+process on the host shares it). Entries are keyed by URL and params and
+survive restarts and deploys. Each endpoint has its own TTL. Payloads are
+zlib-compressed JSON, and once the file passes ``HTTP_CACHE_MAX_BYTES`` the
+least recently used entries are evicted. Expired entries are kept for
+revalidation (ETag / Last-Modified) and as a fallback while the API is down.
+
+    python -m utils.response_cache warm     # pre-fetch live feed and player profiles
+    python -m utils.response_cache stats
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from utils import config  # noqa: F401 - loads .env before the settings below
+
+CACHE_PATH = Path(__file__).parent.parent / os.getenv("HTTP_CACHE_PATH", "http_cache.db")
+MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+DEFAULT_TTL = int(os.getenv("HTTP_CACHE_DEFAULT_TTL", "300"))
+# Puts between exact size recounts, which also pick up other processes' writes
+RECOUNT_EVERY = 100
+
+PLAYER_PROFILE_PREFIX = "https://cricbuzz-cricket.p.rapidapi.com/stats/v1/player"
+
+# (URL prefix, TTL seconds); the first matching prefix wins
+ENDPOINT_TTLS = [
+    (os.getenv("CRICBUZZ_LIVE_URL"), int(os.getenv("HTTP_CACHE_TTL_LIVE", "30"))),
+    (os.getenv("CRICBUZZ_SCORECARD_URL"), int(os.getenv("HTTP_CACHE_TTL_SCORECARD", os.getenv("SCORECARD_FRESH_SECONDS", "30")))),
+    (os.getenv("CRICBUZZ_BATTING_RANKINGS_URL"), int(os.getenv("HTTP_CACHE_TTL_RANKINGS", "86400"))),
+    (os.getenv("CRICBUZZ_BOWLING_RANKINGS_URL"), int(os.getenv("HTTP_CACHE_TTL_RANKINGS", "86400"))),
+    (PLAYER_PROFILE_PREFIX, int(os.getenv("HTTP_CACHE_TTL_PLAYER", "21600"))),
+]
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS http_cache (
+        key TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        payload BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        etag TEXT,
+        last_modified TEXT,
+        stored_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        last_access REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_http_cache_access ON http_cache (last_access);
+"""
+
+
+def endpoint_ttl(url):
+    for prefix, ttl in ENDPOINT_TTLS:
+        if prefix and url.startswith(prefix):
+            return ttl
+    return DEFAULT_TTL
+
+
+def cache_key(url, params=None):
+    raw = url + "?" + json.dumps(sorted((params or {}).items()), default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        # Running estimate of the file's payload bytes; None until first counted
+        self._total = None
+        self._puts = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, url, params=None):
+        """Return ``{"payload", "fresh", "etag", "last_modified"}`` or None."""
+        key = cache_key(url, params)
+        row = self._conn().execute(
+            "SELECT payload, etag, last_modified, expires_at FROM http_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        self._conn().execute("UPDATE http_cache SET last_access = ? WHERE key = ?", (now, key))
+        payload, etag, last_modified, expires_at = row
+        return {
+            "payload": json.loads(zlib.decompress(payload)),
+            "fresh": expires_at > now,
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+
+    def put(self, url, params, payload, etag=None, last_modified=None, ttl=None):
+        now = time.time()
+        blob = zlib.compress(json.dumps(payload).encode(), 6)
+        ttl = endpoint_ttl(url) if ttl is None else ttl
+        conn = self._conn()
+        conn.execute(
+            "REPLACE INTO http_cache "
+            "(key, url, payload, size, etag, last_modified, stored_at, expires_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (cache_key(url, params), url, blob, len(blob), etag, last_modified, now, now + ttl, now)
+        )
+        self._evict(conn, len(blob))
+
+    def touch(self, url, params=None, ttl=None):
+        """Extend an entry's freshness after a 304 Not Modified."""
+        now = time.time()
+        ttl = endpoint_ttl(url) if ttl is None else ttl
+        self._conn().execute(
+            "UPDATE http_cache SET expires_at = ?, last_access = ? WHERE key = ?",
+            (now + ttl, now, cache_key(url, params))
+        )
+
+    def _count(self, conn):
+        self._total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        self._puts = 0
+        return self._total
+
+    def _evict(self, conn, added):
+        """Evict once over budget; the full SUM runs every ``RECOUNT_EVERY`` puts, not on each."""
+        self._puts += 1
+        if self._total is None or self._puts >= RECOUNT_EVERY:
+            self._count(conn)
+        else:
+            # Overcounts a replaced entry, which only brings the next recount forward
+            self._total += added
+        if self._total <= self.max_bytes or self._count(conn) <= self.max_bytes:
+            return
+        # Drop least recently used entries until back under 90% of the budget
+        excess = self._total - int(self.max_bytes * 0.9)
+        doomed, freed = [], 0
+        for key, size in conn.execute("SELECT key, size FROM http_cache ORDER BY last_access"):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM http_cache WHERE key = ?", doomed)
+        self._total -= freed
+
+    def stats(self):
+        count, size = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM http_cache"
+        ).fetchone()
+        fresh = self._conn().execute(
+            "SELECT COUNT(*) FROM http_cache WHERE expires_at > ?", (time.time(),)
+        ).fetchone()[0]
+        return {"entries": count, "fresh": fresh, "bytes": size, "max_bytes": self.max_bytes}
+
+
+response_cache = ResponseCache()
+
+
+def warm():
+    """Pre-fetch the live feed and known player profiles. Returns the count."""
+    from utils import api_client
+    from modules.top_stats import KNOWN_PLAYERS, PLAYER_PROFILE_URL
+
+    urls = [os.getenv("CRICBUZZ_LIVE_URL")]
+    urls += [f"{PLAYER_PROFILE_URL}/{pid}" for pid in KNOWN_PLAYERS.values()]
+    warmed = 0
+    for url in filter(None, urls):
+        try:
+            api_client.get_json(url)
+            warmed += 1
+        except Exception as e:
+            print(f"Skipped {url}: {e}")
+    return warmed
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "warm":
+        print(f"Warmed {warm()} responses")
+    print(response_cache.stats())
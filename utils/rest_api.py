@@ -0,0 +1,236 @@
+"""Read-only JSON API over the stats database and the live/API caches.
+
+Other services can read live matches, scorecards, player profiles and the
+predefined analytics queries here instead of calling RapidAPI themselves.
+The endpoints are unauthenticated, so they never call RapidAPI either: they
+serve the stored snapshots, the player catalog and the response cache, and
+a scorecard or profile the app has not fetched yet is a 404. Extra
+consumers therefore cost no Cricbuzz calls or quota.
+
+Tornado (installed with Streamlit) serves the endpoints. Blocking database
+and cache reads run on a thread pool (``REST_API_WORKERS``). Responses are
+gzip-compressed and carry an ``ETag``: a matching ``If-None-Match`` gets a
+304. Each endpoint sets its own ``Cache-Control`` max-age, and list
+endpoints take ``page`` / ``per_page``.
+
+    python -m utils.rest_api --port 8600
+
+    GET /api/live                          live matches with scores and run rates
+    GET /api/live/<match_id>/scorecard     full scorecard
+    GET /api/players?q=koh                 player catalog search
+    GET /api/players/<player_id>           player profile
+    GET /api/queries                       predefined analytics queries
+    GET /api/queries/<slug>?page=2         one query's rows, paginated
+"""
+import argparse
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.ioloop
+import tornado.web
+
+from utils.response_cache import PLAYER_PROFILE_PREFIX, endpoint_ttl
+
+log = logging.getLogger(__name__)
+
+PORT = int(os.getenv("REST_API_PORT", "8600"))
+WORKERS = int(os.getenv("REST_API_WORKERS", "8"))
+MAX_PER_PAGE = int(os.getenv("REST_API_MAX_PER_PAGE", "1000"))
+DEFAULT_PER_PAGE = 100
+
+# Cache-Control max-age per endpoint, in seconds
+LIVE_MAX_AGE = int(os.getenv("REST_API_LIVE_MAX_AGE", "5"))
+QUERY_MAX_AGE = int(os.getenv("REST_API_QUERY_MAX_AGE", "300"))
+
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="rest-api")
+
+
+def query_slug(name):
+    """``"Question 12: Home vs Away Performance"`` -> ``"question-12"``."""
+    return re.sub(r"[^a-z0-9]+", "-", name.split(":")[0].lower()).strip("-")
+
+
+def predefined_queries():
+    from modules.sql_queries import SQL_QUERIES
+
+    return {
+        query_slug(name): {"name": name, "level": level, "sql": sql}
+        for level, queries in SQL_QUERIES.items()
+        for name, sql in queries.items()
+    }
+
+
+def live_matches():
+    """Live matches from the hub, which re-reads the snapshot table on its own throttle."""
+    from utils.live_hub import live_hub
+
+    live_hub.refresh_from_store()
+    _, matches = live_hub.snapshot()
+    return [{"match_id": match_id, **fields} for match_id, fields in sorted(matches.items())]
+
+
+_OWN_LIMIT = re.compile(r"\bLIMIT\s+\d+(\s*(,|OFFSET)\s*\d+)?\s*$", re.IGNORECASE)
+
+
+def run_page(sql, page, per_page):
+    """One page of a predefined query, fetching one extra row to tell if more follow.
+
+    LIMIT / OFFSET are appended to the statement itself rather than to a
+    derived table, whose ORDER BY MySQL may ignore. A query with a LIMIT of
+    its own is short; it runs whole and is sliced here.
+    """
+    from utils.db_connection import execute_query
+
+    sql = sql.strip().rstrip(";")
+    start = (page - 1) * per_page
+    if _OWN_LIMIT.search(sql):
+        result = execute_query(sql)
+        skip = start
+    else:
+        result = execute_query(f"{sql} LIMIT ? OFFSET ?", (per_page + 1, start))
+        skip = 0
+    if result is None:
+        raise RuntimeError("Query failed")
+    rows, columns = result
+    rows = rows[skip:skip + per_page + 1]
+    return [dict(zip(columns, row)) for row in rows[:per_page]], len(rows) > per_page
+
+
+class JsonHandler(tornado.web.RequestHandler):
+    max_age = 60
+
+    def set_default_headers(self):
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.set_header("Access-Control-Allow-Origin", "*")
+
+    async def blocking(self, fn, *args):
+        return await tornado.ioloop.IOLoop.current().run_in_executor(_executor, fn, *args)
+
+    def send(self, data, max_age=None):
+        self.set_header("Cache-Control", f"public, max-age={self.max_age if max_age is None else max_age}")
+        # finish() adds the ETag and answers a matching If-None-Match with 304
+        self.finish(json.dumps(data, default=str, separators=(",", ":")))
+
+    def pagination(self):
+        try:
+            page = max(1, int(self.get_argument("page", "1")))
+            per_page = min(MAX_PER_PAGE, max(1, int(self.get_argument("per_page", str(DEFAULT_PER_PAGE)))))
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="page and per_page must be integers")
+        return page, per_page
+
+    def write_error(self, status_code, **kwargs):
+        self.set_header("Cache-Control", "no-store")
+        self.finish(json.dumps({"error": self._reason, "status": status_code}))
+
+
+class LiveHandler(JsonHandler):
+    max_age = LIVE_MAX_AGE
+
+    async def get(self):
+        matches = await self.blocking(live_matches)
+        self.send({"matches": matches})
+
+
+class ScorecardHandler(JsonHandler):
+    async def get(self, match_id):
+        from utils.scorecards import SCORECARD_URL, cached_scorecard
+
+        scorecard = await self.blocking(cached_scorecard, int(match_id))
+        if scorecard is None:
+            raise tornado.web.HTTPError(404, reason="Scorecard not cached yet")
+        self.send(scorecard, endpoint_ttl(SCORECARD_URL or ""))
+
+
+class PlayerSearchHandler(JsonHandler):
+    max_age = 300
+
+    async def get(self):
+        from utils import player_catalog
+
+        text = self.get_argument("q", "").strip()
+        if not text:
+            raise tornado.web.HTTPError(400, reason="q is required")
+        page, per_page = self.pagination()
+        players = await self.blocking(player_catalog.search, text, page * per_page + 1)
+        start = (page - 1) * per_page
+        self.send({
+            "players": players[start:start + per_page],
+            "page": page,
+            "per_page": per_page,
+            "has_more": len(players) > start + per_page,
+        })
+
+
+class PlayerHandler(JsonHandler):
+    async def get(self, player_id):
+        from utils import player_catalog
+
+        profile = await self.blocking(player_catalog.get_profile, int(player_id))
+        if profile is None:
+            raise tornado.web.HTTPError(404, reason="Player profile not stored yet")
+        self.send(profile, endpoint_ttl(PLAYER_PROFILE_PREFIX))
+
+
+class QueryListHandler(JsonHandler):
+    max_age = QUERY_MAX_AGE
+
+    def get(self):
+        self.send({
+            "queries": [
+                {"slug": slug, "name": q["name"], "level": q["level"], "url": f"/api/queries/{slug}"}
+                for slug, q in self.application.settings["queries"].items()
+            ]
+        })
+
+
+class QueryHandler(JsonHandler):
+    max_age = QUERY_MAX_AGE
+
+    async def get(self, slug):
+        query = self.application.settings["queries"].get(slug)
+        if query is None:
+            raise tornado.web.HTTPError(404, reason=f"Unknown query '{slug}'")
+        page, per_page = self.pagination()
+        try:
+            rows, has_more = await self.blocking(run_page, query["sql"], page, per_page)
+        except RuntimeError as e:
+            raise tornado.web.HTTPError(500, reason=str(e))
+        self.send({
+            "name": query["name"],
+            "rows": rows,
+            "page": page,
+            "per_page": per_page,
+            "has_more": has_more,
+        })
+
+
+def make_app():
+    return tornado.web.Application(
+        [
+            (r"/api/live", LiveHandler),
+            (r"/api/live/(\d+)/scorecard", ScorecardHandler),
+            (r"/api/players", PlayerSearchHandler),
+            (r"/api/players/(\d+)", PlayerHandler),
+            (r"/api/queries", QueryListHandler),
+            (r"/api/queries/([a-z0-9-]+)", QueryHandler),
+        ],
+        compress_response=True,
+        queries=predefined_queries(),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the read-only JSON API")
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from utils.schema import migrate
+    migrate()
+    make_app().listen(args.port)
+    log.info("REST API listening on :%s", args.port)
+    tornado.ioloop.IOLoop.current().start()
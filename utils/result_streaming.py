@@ -0,0 +1,83 @@
+"""Bounded result loading and streamed CSV export for large SELECTs.
+
+Pages load at most ``RESULT_MAX_ROWS`` rows / ``RESULT_MAX_BYTES`` bytes into
+memory. The remainder can be streamed batch by batch into a CSV file, so
+memory use stays flat however large the result is. Exports of user SQL are
+capped at ``EXPORT_MAX_ROWS`` rows / ``EXPORT_MAX_BYTES`` bytes.
+"""
+import csv
+import itertools
+import os
+import time
+from pathlib import Path
+
+import streamlit as st
+
+from utils.db_connection import iter_query
+
+MAX_ROWS = int(os.getenv("RESULT_MAX_ROWS", "10000"))
+MAX_BYTES = int(os.getenv("RESULT_MAX_BYTES", str(32 * 1024 * 1024)))
+EXPORT_DIR = Path(__file__).parent.parent / os.getenv("EXPORT_DIR", "exports")
+# Larger exports stay on disk instead of being offered as a browser download
+DOWNLOAD_MAX_BYTES = int(os.getenv("EXPORT_DOWNLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+# Caps for exports of user SQL, which run on the query workers
+EXPORT_MAX_ROWS = int(os.getenv("EXPORT_MAX_ROWS", "1000000"))
+EXPORT_MAX_BYTES = int(os.getenv("EXPORT_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+def export_path(name):
+    EXPORT_DIR.mkdir(exist_ok=True)
+    return EXPORT_DIR / f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+
+
+def write_csv(path, columns, batches, skip_rows=0, max_rows=None, max_bytes=None):
+    """Write row ``batches`` under a header row, leaving out the first ``skip_rows``.
+
+    Stops after ``max_rows`` rows or once the file passes ``max_bytes``.
+    Returns ``(rows written, truncated)``.
+    """
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(columns)
+        for batch in batches:
+            if skip_rows >= len(batch):
+                skip_rows -= len(batch)
+                continue
+            batch = batch[skip_rows:]
+            skip_rows = 0
+            if max_rows is not None and written + len(batch) > max_rows:
+                writer.writerows(batch[:max_rows - written])
+                return max_rows, True
+            writer.writerows(batch)
+            written += len(batch)
+            if max_bytes is not None and handle.tell() > max_bytes:
+                return written, True
+    return written, False
+
+
+def export_csv(query, params=None, skip_rows=0, name="export"):
+    """Stream a full result into a CSV under ``EXPORT_DIR``.
+
+    For the app's own statements; user SQL is exported through
+    ``query_runner`` so it keeps the time limit and cancel button. Returns
+    the file path and the number of rows written.
+    """
+    path = export_path(name)
+    stream = iter_query(query, params)
+    try:
+        first = next(stream, None)
+        columns = first[1] if first else []
+        batches = itertools.chain([first[0]] if first else [], (batch for batch, _ in stream))
+        written, _ = write_csv(path, columns, batches, skip_rows)
+    finally:
+        stream.close()
+    return path, written
+
+
+def show_export(path, rows):
+    """Report a streamed CSV export and offer it for download if small enough."""
+    st.success(f"Exported {rows} rows to {path}")
+    if path.stat().st_size <= DOWNLOAD_MAX_BYTES:
+        with open(path, "rb") as handle:
+            st.download_button("⬇️ Download CSV", handle, file_name=path.name, mime="text/csv")
@@ -0,0 +1,386 @@
+"""Versioned schema for the stats database, for SQLite and MySQL.
+
+``migrate()`` applies every migration newer than the version recorded in
+``schema_version`` and builds the materialized aggregates. ``check_index_usage()`` runs EXPLAIN over the predefined
+analytics queries and reports any table read by a full scan rather than an
+index.
+
+    python -m utils.schema            # apply pending migrations
+    python -m utils.schema --check    # also verify query plans
+"""
+import re
+import sys
+import time
+from contextlib import nullcontext
+
+from utils.config import is_mysql
+from utils.db_connection import db_instance
+from utils.shared_state import ENABLED as MULTI_PROCESS, shared_state
+
+
+def _pk():
+    return "INT AUTO_INCREMENT PRIMARY KEY" if is_mysql() else "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+
+def _core_tables():
+    pk = _pk()
+    return [
+        f"""CREATE TABLE IF NOT EXISTS players (
+            player_id {pk},
+            player_name VARCHAR(255) NOT NULL,
+            country VARCHAR(100),
+            playing_role VARCHAR(50),
+            batting_style VARCHAR(50),
+            bowling_style VARCHAR(100)
+        )""",
+        f"""CREATE TABLE IF NOT EXISTS venues (
+            venue_id {pk},
+            venue_name VARCHAR(255) NOT NULL,
+            city VARCHAR(100),
+            country VARCHAR(100),
+            capacity INTEGER
+        )""",
+        f"""CREATE TABLE IF NOT EXISTS matches (
+            match_id {pk},
+            match_description VARCHAR(255),
+            team1 VARCHAR(100),
+            team2 VARCHAR(100),
+            venue VARCHAR(255),
+            match_date DATE,
+            format VARCHAR(10),
+            status VARCHAR(50),
+            winner VARCHAR(100),
+            victory_margin INTEGER,
+            victory_type VARCHAR(20),
+            toss_winner VARCHAR(100),
+            toss_decision VARCHAR(20)
+        )""",
+        f"""CREATE TABLE IF NOT EXISTS batting_stats (
+            id {pk},
+            player_id INTEGER NOT NULL,
+            match_id INTEGER,
+            player_name VARCHAR(255),
+            team VARCHAR(100),
+            format VARCHAR(10),
+            runs INTEGER,
+            balls INTEGER,
+            fours INTEGER,
+            sixes INTEGER,
+            strike_rate DOUBLE,
+            total_runs INTEGER,
+            batting_avg DOUBLE,
+            centuries INTEGER,
+            highest_score INTEGER
+        )""",
+        f"""CREATE TABLE IF NOT EXISTS bowling_stats (
+            id {pk},
+            player_id INTEGER NOT NULL,
+            match_id INTEGER,
+            format VARCHAR(10),
+            overs DOUBLE,
+            runs_conceded INTEGER,
+            wickets INTEGER,
+            economy DOUBLE,
+            bowling_avg DOUBLE,
+            total_wickets INTEGER
+        )""",
+    ]
+
+
+# Each index is named after the predicate or join it serves in SQL_QUERIES
+_INDEXES = [
+    ("idx_players_country", "players", "country"),
+    ("idx_players_role", "players", "playing_role"),
+    ("idx_players_name", "players", "player_name"),
+    ("idx_venues_capacity", "venues", "capacity"),
+    ("idx_matches_date", "matches", "match_date, team1, team2, winner"),
+    ("idx_matches_status_date", "matches", "status, match_date"),
+    ("idx_matches_winner", "matches", "winner"),
+    ("idx_matches_toss", "matches", "toss_decision, toss_winner, winner"),
+    ("idx_matches_victory", "matches", "victory_type, victory_margin"),
+    # Wide indexes let the career/trajectory rollups scan an index instead of the table
+    ("idx_batting_player_format", "batting_stats", "player_id, format, total_runs, batting_avg"),
+    ("idx_batting_match", "batting_stats", "match_id, player_id, runs, strike_rate, balls"),
+    ("idx_batting_format_runs", "batting_stats", "format, total_runs"),
+    ("idx_batting_format_score", "batting_stats", "format, highest_score"),
+    ("idx_bowling_player_format", "bowling_stats", "player_id, format"),
+    ("idx_bowling_match", "bowling_stats", "match_id, player_id, economy, wickets"),
+    ("idx_bowling_total_wickets", "bowling_stats", "total_wickets, player_id"),
+    ("idx_bowling_format", "bowling_stats", "format, player_id"),
+]
+
+
+def _indexes():
+    return [f"CREATE INDEX {name} ON {table} ({columns})" for name, table, columns in _INDEXES]
+
+
+def _natural_keys():
+    """Per-innings rows are identified by (player, match, innings) for upserts."""
+    return [
+        "ALTER TABLE batting_stats ADD COLUMN innings INTEGER DEFAULT 1",
+        "ALTER TABLE bowling_stats ADD COLUMN innings INTEGER DEFAULT 1",
+        "CREATE UNIQUE INDEX uq_batting_natural ON batting_stats (player_id, match_id, innings)",
+        "CREATE UNIQUE INDEX uq_bowling_natural ON bowling_stats (player_id, match_id, innings)",
+        "CREATE UNIQUE INDEX uq_venues_name ON venues (venue_name)",
+    ]
+
+
+def _player_catalog():
+    """Searchable player catalog; each name word is a row in the prefix index."""
+    profile = "MEDIUMTEXT" if is_mysql() else "TEXT"
+    return [
+        f"""CREATE TABLE IF NOT EXISTS player_catalog (
+            player_id INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            team VARCHAR(100),
+            role VARCHAR(50),
+            profile {profile},
+            fetched_at DOUBLE
+        )""",
+        """CREATE TABLE IF NOT EXISTS player_catalog_terms (
+            term VARCHAR(100) NOT NULL,
+            player_id INTEGER NOT NULL,
+            PRIMARY KEY (term, player_id)
+        )""",
+        "CREATE INDEX idx_catalog_fetched ON player_catalog (fetched_at)",
+        "CREATE INDEX idx_catalog_terms_player ON player_catalog_terms (player_id)",
+    ]
+
+
+def _player_versions():
+    """Row versions for optimistic locking, and a case-insensitive name index."""
+    statements = ["ALTER TABLE players ADD COLUMN version INTEGER NOT NULL DEFAULT 1"]
+    if not is_mysql():
+        # MySQL's default collation already makes idx_players_name case-insensitive
+        statements.append("CREATE INDEX idx_players_name_nocase ON players (player_name COLLATE NOCASE)")
+    return statements
+
+
+def _date_range_plans():
+    """Drop the team1/venue index, which Question 22 scanned for its GROUP BY.
+
+    Without it the ``match_date`` filter seeks ``idx_matches_date``. Question
+    12, its only other user, aggregates every match and is allowed to scan.
+    """
+    if is_mysql():
+        return ["DROP INDEX idx_matches_team1_venue ON matches"]
+    return ["DROP INDEX idx_matches_team1_venue"]
+
+
+# Plans that may scan: the query reads a handful of rows under LIMIT, or
+# aggregates every row of the table it scans, so no index can narrow it
+SCANS_ALLOWED = {
+    "Question 6: Players by Role",
+    "Question 7: Highest Individual Scores by Format",
+    "Question 11: Player Format Comparison",
+    "Question 12: Home vs Away Performance",
+    "Question 13: 100+ Partnerships (Simplified)",
+    "Question 14: Bowling at Venues",
+    "Question 17: Toss Advantage",
+    "Question 20: Matches by Format",
+    "Question 21: Player Ranking",
+    "Question 25: Player Career Trajectory",
+}
+
+# (version, description, statement factory)
+MIGRATIONS = [
+    (1, "Core tables", _core_tables),
+    (2, "Indexes for analytics joins and filters", _indexes),
+    (3, "Natural keys for idempotent bulk upserts", _natural_keys),
+    (4, "Player catalog with name prefix index", _player_catalog),
+    (5, "Player row versions and name search index", _player_versions),
+    (6, "Serve the match_date range of head-to-head analysis from its index", _date_range_plans),
+]
+
+
+_CREATE_INDEX = re.compile(r"^\s*CREATE\s+(?:UNIQUE\s+)?INDEX\s+(\w+)\s+ON\s+(\w+)", re.IGNORECASE)
+_ADD_COLUMN = re.compile(r"^\s*ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+(\w+)", re.IGNORECASE)
+_DROP_INDEX = re.compile(r"^\s*DROP\s+INDEX\s+(\w+)(?:\s+ON\s+(\w+))?", re.IGNORECASE)
+
+
+def _already_applied(cursor, statement):
+    """True for an index or column a previous, interrupted run already created,
+    or an index it already dropped (or that never existed).
+
+    DDL commits on its own under MySQL, so a failed migration can leave some
+    of its statements applied; skipping them makes the rerun safe.
+    """
+    mark = "%s" if is_mysql() else "?"
+    index = _CREATE_INDEX.match(statement)
+    column = _ADD_COLUMN.match(statement)
+    dropped = _DROP_INDEX.match(statement)
+    if dropped:
+        name, table = dropped.groups()
+        if is_mysql():
+            cursor.execute(
+                "SELECT 1 FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s", (table, name)
+            )
+        else:
+            cursor.execute(f"SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = {mark}", (name,))
+        return cursor.fetchone() is None
+    if index:
+        name, table = index.groups()
+        if is_mysql():
+            cursor.execute(
+                "SELECT 1 FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s", (table, name)
+            )
+        else:
+            cursor.execute(f"SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = {mark}", (name,))
+    elif column:
+        table, name = column.groups()
+        if is_mysql():
+            cursor.execute(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s", (table, name)
+            )
+        else:
+            cursor.execute(f"SELECT 1 FROM pragma_table_info('{table}') WHERE name = {mark}", (name,))
+    else:
+        return False
+    return cursor.fetchone() is not None
+
+
+def _ensure_version_table(cursor):
+    cursor.execute("""CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description VARCHAR(255),
+        applied_at DOUBLE
+    )""")
+
+
+def current_version():
+    with db_instance.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            _ensure_version_table(cursor)
+            cursor.execute("SELECT MAX(version) FROM schema_version")
+            return cursor.fetchone()[0] or 0
+        finally:
+            cursor.close()
+
+
+def migrate(target=None):
+    """Apply pending migrations in order, then build the materialized aggregates.
+
+    Returns the list of migrations applied.
+    """
+    from utils import materialized
+
+    # Workers starting together take turns; later ones find nothing pending
+    with shared_state.exclusive("schema-migrate") if MULTI_PROCESS else nullcontext():
+        applied = _apply_migrations(target)
+        # Summary tables and triggers are created here, not on a page's first read
+        materialized.build()
+        return applied
+
+
+def _apply_migrations(target):
+    applied = []
+    mark = "%s" if is_mysql() else "?"
+    with db_instance.connection() as conn:
+        if conn is None:
+            return applied
+        cursor = conn.cursor()
+        try:
+            _ensure_version_table(cursor)
+            cursor.execute("SELECT MAX(version) FROM schema_version")
+            version = cursor.fetchone()[0] or 0
+            for number, description, statements in MIGRATIONS:
+                if number <= version or (target is not None and number > target):
+                    continue
+                for statement in statements():
+                    if not _already_applied(cursor, statement):
+                        cursor.execute(statement)
+                cursor.execute(
+                    f"INSERT INTO schema_version (version, description, applied_at) VALUES ({mark}, {mark}, {mark})",
+                    (number, description, time.time())
+                )
+                conn.commit()
+                applied.append(number)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    if applied:
+        from utils.query_cache import query_cache
+        query_cache.clear()
+    return applied
+
+
+def _plan_findings(cursor, query):
+    """Return ``[(table, detail, uses_index)]`` for one statement's plan."""
+    findings = []
+    if is_mysql():
+        cursor.execute("EXPLAIN " + query)
+        columns = [d[0] for d in cursor.description]
+        for row in cursor.fetchall():
+            plan = dict(zip(columns, row))
+            if not plan.get("table"):
+                continue
+            # "index" is a full scan of an index, not a lookup
+            uses_index = plan.get("type") in ("system", "const", "eq_ref", "ref", "range")
+            findings.append((plan["table"], f"type={plan.get('type')} key={plan.get('key')}", uses_index))
+    else:
+        cursor.execute("EXPLAIN QUERY PLAN " + query)
+        for row in cursor.fetchall():
+            detail = row[-1]
+            if not detail.startswith(("SCAN", "SEARCH")) or detail == "SCAN CONSTANT ROW":
+                continue
+            # SQLite before 3.36 writes "SCAN TABLE x"; "SCAN x USING (COVERING) INDEX" still reads every row
+            words = detail.split()
+            table = words[2] if words[1] == "TABLE" else words[1]
+            uses_index = detail.startswith("SEARCH")
+            findings.append((table, detail, uses_index))
+    return findings
+
+
+def _predefined_statements():
+    """``(label, name, sql)`` for every predefined query, plus the summary-table
+    SQL the page actually serves for the materialized ones."""
+    from modules.sql_queries import SQL_QUERIES
+    from utils.materialized import MATERIALIZED_QUERIES, is_built
+
+    statements = [(name, name, sql) for group in SQL_QUERIES.values() for name, sql in group.items()]
+    if is_built():
+        statements += [(f"{name} (materialized)", name, sql) for name, sql in MATERIALIZED_QUERIES.items()]
+    return statements
+
+
+def check_index_usage(queries=None):
+    """EXPLAIN each predefined query and flag full-table scans.
+
+    Materialized queries are checked in both forms: the page serves the
+    summary-table SQL and falls back to the original. Returns a list of dicts
+    with ``query``, ``table``, ``detail`` and ``uses_index``.
+    """
+    if queries is None:
+        statements = _predefined_statements()
+    else:
+        statements = [(name, name, sql) for name, sql in queries.items()]
+    report = []
+    with db_instance.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            for label, name, sql in statements:
+                for table, detail, uses_index in _plan_findings(cursor, sql.strip().rstrip(";")):
+                    report.append({
+                        "query": label, "table": table, "detail": detail,
+                        "uses_index": uses_index or name in SCANS_ALLOWED
+                    })
+        finally:
+            cursor.close()
+    return report
+
+
+if __name__ == "__main__":
+    done = migrate()
+    print(f"Applied migrations: {done or 'none'} (schema version {current_version()})")
+    if "--check" in sys.argv:
+        scans = [r for r in check_index_usage() if not r["uses_index"]]
+        for r in scans:
+            print(f"FULL SCAN  {r['query']}: {r['detail']}")
+        print("All predefined queries use indexes." if not scans else f"{len(scans)} full scan(s) found.")
+        sys.exit(1 if scans else 0)
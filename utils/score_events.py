@@ -0,0 +1,145 @@
+"""Append-only store of live score changes, one row per (match, innings, over).
+
+Each ingestion poll is diffed against the last recorded state of every
+innings and only changed scores are written, so a match's history can be
+replayed for run-rate and worm charts without re-fetching scorecards.
+"""
+import threading
+import time
+
+from utils.db_connection import execute_query
+
+CREATE_EVENTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS score_events (
+        match_id INTEGER NOT NULL,
+        innings INTEGER NOT NULL,
+        balls INTEGER NOT NULL,
+        team VARCHAR(100),
+        runs INTEGER,
+        wickets INTEGER,
+        overs VARCHAR(10),
+        recorded_at DOUBLE,
+        PRIMARY KEY (match_id, innings, balls)
+    )
+"""
+
+# match_id -> {innings: (runs, wickets, balls)}
+_last_state = {}
+_state_lock = threading.Lock()
+
+
+def overs_to_balls(overs):
+    """Convert cricket overs notation (``12.3``) to legal balls bowled."""
+    if overs in (None, ""):
+        return 0
+    whole, _, part = str(overs).partition(".")
+    return int(whole or 0) * 6 + int(part or 0)
+
+
+def extract_innings(payload):
+    """Pull numeric per-innings scores out of a live-feed match entry.
+
+    Handles the ``team1Score.inngs1`` layout of the Cricbuzz feed and the flat
+    ``team1.score/wickets/overs`` layout used elsewhere in the app.
+    """
+    info = payload.get("matchInfo", {})
+    score = payload.get("matchScore", {})
+    innings = []
+    for slot, team_key in (("team1", "team1Score"), ("team2", "team2Score")):
+        team = info.get(slot, {}).get("teamName")
+        nested = score.get(team_key)
+        if nested:
+            for n, (key, inn) in enumerate(sorted(nested.items())):
+                innings.append({
+                    "innings": inn.get("inningsId") or (n * 2 + (1 if slot == "team1" else 2)),
+                    "team": team,
+                    "runs": int(inn.get("runs") or 0),
+                    "wickets": int(inn.get("wickets") or 0),
+                    "overs": str(inn.get("overs") or "0"),
+                })
+        elif score.get(slot, {}).get("score") not in (None, ""):
+            flat = score[slot]
+            innings.append({
+                "innings": 1 if slot == "team1" else 2,
+                "team": team,
+                "runs": int(flat.get("score") or 0),
+                "wickets": int(flat.get("wickets") or 0),
+                "overs": str(flat.get("overs") or "0"),
+            })
+    return innings
+
+
+def ensure_events_table():
+    execute_query(CREATE_EVENTS_TABLE, fetch=False)
+
+
+def _load_last_state(match_id):
+    result = execute_query(
+        "SELECT innings, runs, wickets, balls FROM score_events "
+        "WHERE match_id = ? ORDER BY innings, balls",
+        (match_id,),
+        use_cache=False
+    )
+    state = {}
+    if result:
+        for innings, runs, wickets, balls in result[0]:
+            state[innings] = (runs, wickets, balls)
+    return state
+
+
+def record_deltas(matches, recorded_at=None):
+    """Diff the latest poll against the last state and append changes.
+
+    ``matches`` are snapshot dicts carrying the raw feed entry in
+    ``payload``. Returns the number of events written.
+    """
+    recorded_at = recorded_at or time.time()
+    written = 0
+    for m in matches:
+        match_id = m.get("match_id")
+        if match_id is None:
+            continue
+        with _state_lock:
+            if match_id not in _last_state:
+                _last_state[match_id] = _load_last_state(match_id)
+            state = _last_state[match_id]
+        for inn in extract_innings(m.get("payload", {})):
+            balls = overs_to_balls(inn["overs"])
+            current = (inn["runs"], inn["wickets"], balls)
+            if state.get(inn["innings"]) == current:
+                continue
+            execute_query(
+                "REPLACE INTO score_events "
+                "(match_id, innings, balls, team, runs, wickets, overs, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (match_id, inn["innings"], balls, inn["team"], inn["runs"],
+                 inn["wickets"], inn["overs"], recorded_at),
+                fetch=False
+            )
+            state[inn["innings"]] = current
+            written += 1
+    # Forget matches that have left the live feed
+    live_ids = {m.get("match_id") for m in matches}
+    with _state_lock:
+        for match_id in list(_last_state):
+            if match_id not in live_ids:
+                del _last_state[match_id]
+    return written
+
+
+def replay(match_id, innings=None):
+    """Return a match's score progression in ball order."""
+    query = (
+        "SELECT innings, team, balls, overs, runs, wickets, recorded_at "
+        "FROM score_events WHERE match_id = ?"
+    )
+    params = [match_id]
+    if innings is not None:
+        query += " AND innings = ?"
+        params.append(innings)
+    query += " ORDER BY innings, balls"
+    result = execute_query(query, tuple(params), use_cache=False)
+    if not result:
+        return []
+    rows, columns = result
+    return [dict(zip(columns, row)) for row in rows]
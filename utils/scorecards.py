@@ -0,0 +1,54 @@
+"""Parallel scorecard fetching through the shared API client.
+
+Scorecards go through the persistent response cache, so an unchanged
+scorecard is served locally or costs a 304 revalidation instead of a full
+download (``HTTP_CACHE_TTL_SCORECARD``). ``prefetch_scorecards`` fans
+requests out over a bounded thread pool, making page render time track the
+slowest fetch rather than the sum.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import api_client
+from utils.response_cache import response_cache
+
+SCORECARD_URL = os.getenv("CRICBUZZ_SCORECARD_URL")
+
+MAX_WORKERS = int(os.getenv("SCORECARD_MAX_WORKERS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="scorecard")
+
+
+def fetch_scorecard(match_id):
+    """Fetch one scorecard, serving the cached copy while fresh. Raises on failure."""
+    return api_client.get_json(SCORECARD_URL, {"matchId": match_id})
+
+
+def cached_scorecard(match_id):
+    """The cached scorecard, fresh or stale, without calling the API; None if never fetched."""
+    cached = response_cache.get(SCORECARD_URL, {"matchId": match_id}) if SCORECARD_URL else None
+    return cached["payload"] if cached else None
+
+
+def prefetch_scorecards(match_ids, max_concurrency=MAX_WORKERS):
+    """Fetch many scorecards in parallel.
+
+    Returns ``{match_id: payload}`` and ``{match_id: error message}``.
+    ``max_concurrency`` caps in-flight requests for this call on top of the
+    shared pool size.
+    """
+    results, errors = {}, {}
+    gate = threading.Semaphore(max(1, max_concurrency))
+
+    def _fetch(match_id):
+        with gate:
+            return fetch_scorecard(match_id)
+
+    futures = {match_id: _executor.submit(_fetch, match_id) for match_id in dict.fromkeys(match_ids)}
+    for match_id, future in futures.items():
+        try:
+            results[match_id] = future.result()
+        except Exception as e:
+            errors[match_id] = str(e)
+    return results, errors
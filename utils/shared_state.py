@@ -0,0 +1,201 @@
+"""Cross-process state for running several app workers on one host.
+
+With ``MULTI_PROCESS=1`` the app can run as several Streamlit processes
+behind a load balancer, for example one per core. They coordinate through a
+local SQLite file in WAL mode (``SHARED_STATE_PATH``):
+
+- the RapidAPI token bucket and daily quota are shared rows, so the budget
+  applies to the whole host instead of to each process;
+- one worker holds a renewable lease on the live poller and the others read
+  the snapshots it stores. If the leader dies, its lease expires after
+  ``LEADER_LEASE_SECONDS`` and another worker takes over;
+- query-cache invalidations are published as per-table generation counters,
+  so a write in one worker drops the cached results of the others within
+  ``SHARED_SYNC_INTERVAL`` seconds;
+- schema migrations run under an ``exclusive`` lease, renewed while they
+  run, so workers starting together do not apply the same migration twice.
+
+HTTP responses are already shared through ``utils.response_cache`` and live
+snapshots through the database.
+
+    python -m utils.shared_state     # show leases, counters and generations
+"""
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from utils import config  # noqa: F401 - loads .env before the settings below
+
+log = logging.getLogger(__name__)
+
+ENABLED = os.getenv("MULTI_PROCESS", "0") == "1"
+STATE_PATH = Path(__file__).parent.parent / os.getenv("SHARED_STATE_PATH", "shared_state.db")
+SYNC_INTERVAL = float(os.getenv("SHARED_SYNC_INTERVAL", "1"))
+
+# Identifies this process in lease rows
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS buckets (
+        name TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS counters (
+        name TEXT PRIMARY KEY,
+        day TEXT NOT NULL,
+        value INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS leases (
+        name TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS generations (
+        name TEXT PRIMARY KEY,
+        generation INTEGER NOT NULL
+    );
+"""
+
+
+class SharedState:
+    def __init__(self, path=STATE_PATH):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self):
+        """One IMMEDIATE transaction: the read-modify-write is atomic across processes."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def take_token(self, name, rate, capacity):
+        """Take one token from a shared bucket. Returns 0, or the seconds to wait."""
+        now = time.time()
+        with self._write() as conn:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            conn.execute("REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)", (name, tokens, now))
+        return wait
+
+    def consume(self, name, limit):
+        """Count one use for today (UTC); False once ``limit`` is reached (0 = unlimited)."""
+        today = datetime.now(timezone.utc).date().isoformat()
+        with self._write() as conn:
+            row = conn.execute("SELECT day, value FROM counters WHERE name = ?", (name,)).fetchone()
+            used = row[1] if row and row[0] == today else 0
+            if limit and used >= limit:
+                return False
+            conn.execute("REPLACE INTO counters (name, day, value) VALUES (?, ?, ?)", (name, today, used + 1))
+        return True
+
+    def used_today(self, name):
+        today = datetime.now(timezone.utc).date().isoformat()
+        row = self._conn().execute("SELECT day, value FROM counters WHERE name = ?", (name,)).fetchone()
+        return row[1] if row and row[0] == today else 0
+
+    def acquire_lease(self, name, ttl, owner=OWNER):
+        """Take or renew ``name`` for ``ttl`` seconds; False while another owner holds it."""
+        now = time.time()
+        with self._write() as conn:
+            row = conn.execute("SELECT owner, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+            if row and row[0] != owner and row[1] > now:
+                return False
+            conn.execute("REPLACE INTO leases (name, owner, expires_at) VALUES (?, ?, ?)", (name, owner, now + ttl))
+        return True
+
+    def release_lease(self, name, owner=OWNER):
+        with self._write() as conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    @contextmanager
+    def exclusive(self, name, ttl=60, poll=0.2):
+        """Hold ``name`` for the block, waiting for any other holder to release it.
+
+        Every call gets its own owner, so threads of one process exclude each
+        other too. The lease is renewed every ``ttl / 3`` seconds while the
+        block runs; it only lapses if the holder dies.
+        """
+        owner = f"{OWNER}:{uuid.uuid4().hex}"
+        while not self.acquire_lease(name, ttl, owner):
+            time.sleep(poll)
+        done = threading.Event()
+
+        def _renew():
+            while not done.wait(ttl / 3):
+                try:
+                    if not self.acquire_lease(name, ttl, owner):
+                        log.warning("Lease %s expired and was taken over", name)
+                        return
+                except Exception as e:
+                    log.warning("Renewing lease %s failed: %s", name, e)
+
+        renewer = threading.Thread(target=_renew, name=f"lease-{name}", daemon=True)
+        renewer.start()
+        try:
+            yield
+        finally:
+            done.set()
+            renewer.join()
+            self.release_lease(name, owner)
+
+    def bump_generation(self, name):
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO generations (name, generation) VALUES (?, 1) "
+                "ON CONFLICT (name) DO UPDATE SET generation = generation + 1", (name,)
+            )
+            return conn.execute("SELECT generation FROM generations WHERE name = ?", (name,)).fetchone()[0]
+
+    def generations(self):
+        return dict(self._conn().execute("SELECT name, generation FROM generations").fetchall())
+
+    def report(self):
+        conn = self._conn()
+        return {
+            "leases": conn.execute("SELECT name, owner, expires_at - ? FROM leases", (time.time(),)).fetchall(),
+            "counters": conn.execute("SELECT name, day, value FROM counters").fetchall(),
+            "buckets": conn.execute("SELECT name, tokens FROM buckets").fetchall(),
+            "generations": self.generations(),
+        }
+
+
+shared_state = SharedState()
+
+
+if __name__ == "__main__":
+    report = shared_state.report()
+    for name, owner, left in report["leases"]:
+        print(f"lease {name}: {owner} ({left:.0f}s left)")
+    for name, day, value in report["counters"]:
+        print(f"counter {name}: {value} on {day}")
+    for name, tokens in report["buckets"]:
+        print(f"bucket {name}: {tokens:.1f} tokens")
+    for name, generation in sorted(report["generations"].items()):
+        print(f"generation {name}: {generation}")